@@ -0,0 +1,31 @@
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fintracker import storage
+from fintracker.models import Expense
+
+"""
+Бенчмарк добавления транзакций по одной через add_expense.
+"""
+START = datetime(2020, 1, 1)
+
+def main():
+    """Замеряет скорость add_expense (транзакций в секунду)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        storage.configure(os.path.join(tmp, 'bench.db'))
+        rows = 5_000
+        expenses = [Expense('Обед', 100.0, 'Еда', START + timedelta(minutes=i)) for i in range(rows)]
+        begin = time.perf_counter()
+        for expense in expenses:
+            storage.add_expense(expense)
+        elapsed = time.perf_counter() - begin
+        storage.close_engine()
+        print(f"добавлено транзакций: {rows}, время: {elapsed:.2f} с, {rows / elapsed:.0f} транзакций/с")
+
+if __name__ == '__main__':
+    main()
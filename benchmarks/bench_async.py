@@ -0,0 +1,73 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fintracker import storage
+from fintracker.async_storage import AsyncStorage
+from fintracker.models import Expense
+
+"""
+Нагрузочный тест AsyncStorage: сотни конкурентных задач добавляют транзакции по одной,
+параллельно несколько задач строят отчеты. Для сравнения - последовательный add_expense.
+Количество задач-производителей задается первым аргументом командной строки (по умолчанию 500).
+"""
+START = datetime(2020, 1, 1)
+PER_PRODUCER = 20
+REPORTERS = 4
+
+async def producer(db: AsyncStorage, number: int, latencies: list):
+    """Добавляет PER_PRODUCER транзакций по одной, запоминая время ожидания фиксации."""
+    for i in range(PER_PRODUCER):
+        begin = time.perf_counter()
+        await db.add(Expense('Обед', 100.0, f'Категория {number % 20}', START + timedelta(minutes=number * PER_PRODUCER + i)))
+        latencies.append(time.perf_counter() - begin)
+
+async def reporter(db: AsyncStorage, done: asyncio.Event) -> int:
+    """Строит отчеты, пока производители не закончат работу; возвращает количество отчетов."""
+    count = 0
+    while not done.is_set():
+        await db.get_all_totals()
+        count += 1
+    return count
+
+async def run_async(producers: int) -> tuple:
+    """Запускает производителей и построителей отчетов; возвращает время, задержки, отчеты и счетчики записи."""
+    latencies = []
+    async with AsyncStorage() as db:
+        done = asyncio.Event()
+        reporters = [asyncio.create_task(reporter(db, done)) for _ in range(REPORTERS)]
+        begin = time.perf_counter()
+        await asyncio.gather(*(producer(db, number, latencies) for number in range(producers)))
+        elapsed = time.perf_counter() - begin
+        done.set()
+        reports = sum(await asyncio.gather(*reporters))
+        return elapsed, sorted(latencies), reports, db.stats()
+
+def main():
+    """Сравнивает пропускную способность AsyncStorage и последовательного add_expense."""
+    producers = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rows = producers * PER_PRODUCER
+    with tempfile.TemporaryDirectory() as tmp:
+        storage.configure(os.path.join(tmp, 'sync.db'))
+        begin = time.perf_counter()
+        for i in range(min(rows, 5_000)):
+            storage.add_expense(Expense('Обед', 100.0, 'Еда', START + timedelta(minutes=i)))
+        sync_rate = min(rows, 5_000) / (time.perf_counter() - begin)
+        storage.close_engine()
+
+        storage.configure(os.path.join(tmp, 'async.db'))
+        elapsed, latencies, reports, stats = asyncio.run(run_async(producers))
+        storage.close_engine()
+    p50, p99 = latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+    print(f"add_expense последовательно: {sync_rate:.0f} транзакций/с")
+    print(f"AsyncStorage, {producers} задач: {rows / elapsed:.0f} транзакций/с, задержка p50 {p50 * 1000:.1f} мс, "
+          f"p99 {p99 * 1000:.1f} мс")
+    print(f"фиксаций: {stats['commits']} на {stats['writes']} записей, отчетов параллельно: {reports}")
+
+if __name__ == '__main__':
+    main()
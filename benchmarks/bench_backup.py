@@ -0,0 +1,44 @@
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fintracker import backup, storage
+from fintracker.models import Expense
+
+"""
+Бенчмарк резервного копирования: полный снимок, инкрементальная копия и восстановление.
+Количество строк задается первым аргументом командной строки (по умолчанию 1 000 000).
+"""
+START = datetime(2020, 1, 1)
+
+def expenses(count: int, offset: int = 0):
+    """Генерирует расходы с шагом в одну минуту."""
+    for i in range(offset, offset + count):
+        yield Expense('Покупка', float(i % 500 + 1), 'Еда', START + timedelta(minutes=i))
+
+def measure(title: str, func, *args):
+    """Печатает время выполнения func(*args) и возвращает результат."""
+    begin = time.perf_counter()
+    result = func(*args)
+    print(f"{title}: {time.perf_counter() - begin:.2f} с")
+    return result
+
+def main():
+    """Замеряет время снимка, инкрементальной копии 1000 новых строк и восстановления."""
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        storage.configure(os.path.join(tmp, 'bench.db'), backup_dir=os.path.join(tmp, 'backups'))
+        storage.bulk_insert(expenses(rows), 10000)
+        print(f"строк в таблице: {rows}")
+        measure("полный снимок", backup.snapshot)
+        storage.bulk_insert(expenses(1000, rows))
+        measure("инкрементальная копия 1000 строк", backup.incremental)
+        measure("восстановление", backup.restore)
+        storage.close_engine()
+
+if __name__ == '__main__':
+    main()
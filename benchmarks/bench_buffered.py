@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fintracker import storage
+from fintracker.models import Expense
+
+"""
+Бенчмарк буфера записи BufferedWriter в режимах надежности memory, log и fsync по сравнению с add_expense,
+который фиксирует каждую транзакцию отдельно. Выводит транзакций в секунду и количество фиксаций.
+Количество транзакций задается первым аргументом командной строки (по умолчанию 20000).
+"""
+START = datetime(2020, 1, 1)
+
+def bench_add_expense(expenses: list) -> tuple:
+    """Добавляет транзакции по одной через add_expense; возвращает время и количество фиксаций."""
+    begin = time.perf_counter()
+    for expense in expenses:
+        storage.add_expense(expense)
+    return time.perf_counter() - begin, len(expenses)
+
+def bench_buffered(expenses: list, durability: str) -> tuple:
+    """Добавляет транзакции через BufferedWriter; возвращает время (включая запись остатка) и количество фиксаций."""
+    begin = time.perf_counter()
+    with storage.BufferedWriter(durability=durability, max_rows=1000, max_delay=0.2) as writer:
+        for expense in expenses:
+            writer.add(expense)
+    elapsed = time.perf_counter() - begin
+    return elapsed, writer.commits
+
+def main():
+    """Сравнивает пропускную способность путей записи на отдельных временных БД."""
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    expenses = [Expense('Обед', 100.0, 'Еда', START + timedelta(minutes=i)) for i in range(rows)]
+    cases = [('add_expense', bench_add_expense)] + [
+        (f'buffered/{mode}', lambda items, mode=mode: bench_buffered(items, mode)) for mode in storage.DURABILITY_MODES]
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, bench in cases:
+            storage.configure(os.path.join(tmp, f'{name.replace("/", "_")}.db'))
+            elapsed, commits = bench(expenses)
+            assert storage.get_summary()[0] == rows
+            storage.close_engine()
+            print(f"{name:<18} {rows / elapsed:10.0f} транзакций/с, фиксаций: {commits:6d} ({commits / elapsed:8.0f}/с)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fintracker import storage
+
+"""
+Бенчмарк отчетов с транзакциями в нескольких валютах: те же отчеты по таблице только в рублях и по таблице,
+где каждая пятая транзакция в USD или EUR, а курсы заданы на каждый день.
+Количество строк задается первым аргументом командной строки (по умолчанию 1 000 000).
+"""
+START = datetime(2020, 1, 1)
+YEARS = 5
+CURRENCIES = ('USD', 'EUR')
+
+def fill(path: str, rows: int, foreign: bool):
+    """
+    Заполняет БД транзакциями, равномерно распределенными по YEARS годам: каждая десятая - доход, остальные - расходы.
+
+    Args:
+        path(str): путь к файлу БД.
+        rows(int): количество транзакций.
+        foreign(bool): каждая пятая транзакция - в USD или EUR, иначе все в рублях.
+    """
+    step = timedelta(days=365 * YEARS) / rows
+    conn = sqlite3.connect(path)
+    conn.execute('DELETE FROM transactions')
+    category = storage._lookup_id(conn, 'category', 'Еда')
+    source = storage._lookup_id(conn, 'source', 'Зарплата')
+
+    def generate():
+        for i in range(rows):
+            date = str(START + step * i)
+            currency = CURRENCIES[i // 5 % 2] if foreign and i % 5 == 1 else storage.BASE_CURRENCY
+            if i % 10 == 0:
+                yield 'Доход', 'Поступление', 500000, None, source, date, currency
+            else:
+                yield 'Расход', 'Покупка', (i % 500) * 100, category, None, date, currency
+
+    conn.executemany(storage._INSERT_SQL, generate())
+    conn.commit()
+    conn.close()
+
+def measure(title: str, func, *args, repeats: int = 3):
+    """Печатает среднее время выполнения func(*args)."""
+    begin = time.perf_counter()
+    for _ in range(repeats):
+        func(*args)
+    elapsed = (time.perf_counter() - begin) / repeats
+    print(f"{title}: {elapsed * 1000:.1f} мс")
+
+def main():
+    """Замеряет отчеты за весь период и за год с неполными днями на краях для обеих таблиц (кэш запросов выключен)."""
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    days = 365 * YEARS + 2
+    with tempfile.TemporaryDirectory() as tmp:
+        storage.configure(os.path.join(tmp, 'bench.db'), cache='off')
+        storage.get_engine().writer()
+        storage.set_rates((currency, START + timedelta(days=day), 70 + day % 30 + index)
+                          for index, currency in enumerate(CURRENCIES) for day in range(days))
+        year = (datetime(2022, 2, 15, 12), datetime(2023, 2, 15, 10))
+        for foreign in (False, True):
+            fill(storage.DATA_FILE, rows, foreign)
+            print(f"строк в таблице: {rows}, " + ("каждая пятая в USD/EUR" if foreign else "только в рублях"))
+            # Первый отчет загружает pandas и курсы в память процесса
+            measure("  первый сводный отчет, весь период", storage.get_summary, repeats=1)
+            measure("  сводный отчет, весь период", storage.get_summary)
+            measure("  сводный отчет, год с неполными днями", storage.get_summary, *year)
+            measure("  все отчеты за один проход, весь период", storage.get_all_totals)
+            measure("  суммы по дням, весь период", storage.get_daily_totals)
+        storage.close_engine()
+
+if __name__ == '__main__':
+    main()
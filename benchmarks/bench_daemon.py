@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from fintracker import client
+
+"""
+Бенчмарк задержки команд через сервер (команда serve) по сравнению с запуском CLI в отдельном процессе.
+Для каждой команды выводится медиана времени от запуска до получения всего вывода.
+"""
+COMMANDS = [
+    ['add', '--description', 'Обед', '--sum', '150', '--expense', '--category', 'Еда', '--date', '2026-01-01'],
+    ['view', '--limit', '20'],
+    ['report', '--report-type', 'summary'],
+]
+
+def median(values: list) -> float:
+    """Возвращает медиану списка."""
+    values = sorted(values)
+    return values[len(values) // 2]
+
+def run_cli(argv: list, env: dict, cwd: str) -> float:
+    """Запускает main.py с --local в новом процессе и возвращает время выполнения в секундах."""
+    begin = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(ROOT, 'main.py'), '--local'] + argv, env=env, cwd=cwd,
+                   stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - begin
+
+def run_client(argv: list, env: dict, cwd: str) -> float:
+    """Запускает main.py в новом процессе (команда выполняется сервером) и возвращает время выполнения в секундах."""
+    begin = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(ROOT, 'main.py')] + argv, env=env, cwd=cwd,
+                   stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - begin
+
+def main():
+    """Запускает сервер на временной БД и сравнивает задержку команд."""
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, 'bench.db')
+        address = os.path.join(tmp, 'fintr.sock')
+        env = dict(os.environ, FINTR_DB=db, FINTR_SERVER=address)
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'main.py'), 'serve'], env=env, cwd=tmp,
+                                  stdout=subprocess.DEVNULL)
+        try:
+            while not client.ping(address):
+                time.sleep(0.05)
+            print(f"{'команда':<10} {'процесс':>10} {'клиент':>10} {'RPC':>10}")
+            for argv in COMMANDS:
+                local = median([run_cli(argv, env, tmp) for _ in range(repeats)])
+                remote = median([run_client(argv, env, tmp) for _ in range(repeats)])
+                with client.connect(address) as sock:
+                    rpc = []
+                    for _ in range(repeats):
+                        begin = time.perf_counter()
+                        client.request(address, argv, db, open(os.devnull, 'w'), sock=sock)
+                        rpc.append(time.perf_counter() - begin)
+                print(f"{argv[0]:<10} {local * 1000:8.1f}мс {remote * 1000:8.1f}мс {median(rpc) * 1000:8.1f}мс")
+        finally:
+            server.terminate()
+            server.wait()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fintracker import storage
+from fintracker.importer import read_transactions
+
+"""
+Бенчмарк импорта транзакций из CSV файла через read_transactions и bulk_insert.
+"""
+START = datetime(2020, 1, 1)
+
+def write_csv(path: str, rows: int):
+    """
+    Создает CSV файл в формате выгрузки банка.
+
+    Args:
+        path(str): путь к файлу.
+        rows(int): количество строк.
+    """
+    with open(path, 'w', encoding='cp1251') as f:
+        f.write('type;description;amount;category;source;date\n')
+        for i in range(rows):
+            f.write(f"Расход;Обед;{100 + i % 50}.5;Еда;;{START + timedelta(minutes=i)}\n")
+
+def main():
+    """Замеряет скорость импорта (строк в секунду) для разных размеров пачки."""
+    rows = 200_000
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'bank.csv')
+        write_csv(csv_path, rows)
+        for batch_size in (100, 1000, 10000):
+            storage.configure(os.path.join(tmp, f'bench_{batch_size}.db'))
+            begin = time.perf_counter()
+            count = storage.bulk_insert(read_transactions(csv_path), batch_size)
+            elapsed = time.perf_counter() - begin
+            print(f"пачка: {batch_size:>5}, строк: {count}, время: {elapsed:.2f} с, {count / elapsed:.0f} строк/с")
+        storage.close_engine()
+
+if __name__ == '__main__':
+    main()
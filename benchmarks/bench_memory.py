@@ -0,0 +1,48 @@
+import gc
+import os
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fintracker.models import Expense, TransactionBatch, EXPENSE
+
+"""
+Бенчмарк памяти на одну транзакцию: объекты Expense против колоночной пачки TransactionBatch.
+"""
+START = datetime(2020, 1, 1)
+CATEGORIES = ['Еда', 'Транспорт', 'Жилье', 'Развлечения', 'Здоровье']
+
+def measure(title: str, build, rows: int):
+    """Печатает прирост памяти на одну транзакцию после build()."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(f"{title}: {used / rows:.0f} байт на транзакцию")
+    return result
+
+def main():
+    """Сравнивает список объектов Expense и TransactionBatch на 200 000 транзакций."""
+    rows = 200_000
+    # исходные колонки общие для обоих вариантов, чтобы сравнивать только накладные расходы хранения
+    descriptions = [f"Покупка {i % 1000}" for i in range(rows)]
+    dates = [START + timedelta(minutes=i) for i in range(rows)]
+    amounts = [float(i % 500 + 1) for i in range(rows)]
+    categories = [CATEGORIES[i % 5] for i in range(rows)]
+    # numpy импортируется при создании первой пачки, его память не должна попасть в замер
+    TransactionBatch.from_columns([EXPENSE], descriptions[:1], amounts[:1], dates[:1], categories[:1], [None])
+
+    objects = measure("объекты Expense (__slots__)",
+                      lambda: [Expense(descriptions[i], amounts[i], categories[i], dates[i]) for i in range(rows)],
+                      rows)
+    del objects
+    measure("TransactionBatch",
+            lambda: TransactionBatch.from_columns([EXPENSE] * rows, descriptions, amounts, dates, categories, [None] * rows),
+            rows)
+
+if __name__ == '__main__':
+    main()
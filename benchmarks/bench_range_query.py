@@ -0,0 +1,54 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fintracker import storage
+
+"""
+Бенчмарк выборки транзакций за день: время запроса должно зависеть от размера результата, а не таблицы.
+"""
+START = datetime(2020, 1, 1)
+
+def fill(path: str, rows: int):
+    """
+    Заполняет БД транзакциями (суммы в копейках), по 100 транзакций в день.
+
+    Args:
+        path(str): путь к файлу БД.
+        rows(int): количество транзакций.
+    """
+    conn = sqlite3.connect(path)
+    conn.execute('DELETE FROM transactions')
+    category_id = storage._lookup_id(conn, 'category', 'Еда')
+    conn.executemany(
+        storage._INSERT_SQL,
+        (('Расход', 'Обед', 10000, category_id, None, str(START + timedelta(minutes=14 * i)), storage.BASE_CURRENCY)
+         for i in range(rows))
+    )
+    conn.commit()
+    conn.close()
+
+def main():
+    """Замеряет время get_transactions за один день на таблицах разного размера."""
+    with tempfile.TemporaryDirectory() as tmp:
+        storage.configure(os.path.join(tmp, 'bench.db'), cache='off')
+        storage.get_engine().writer()
+        day_start = START + timedelta(days=5)
+        day_end = day_start + timedelta(days=1) - timedelta(microseconds=1)
+        storage.get_transactions(day_start, day_end)  # загрузка pandas не входит в замеры
+        for rows in (10_000, 100_000, 1_000_000):
+            fill(storage.DATA_FILE, rows)
+            repeats = 20
+            begin = time.perf_counter()
+            for _ in range(repeats):
+                df = storage.get_transactions(day_start, day_end)
+            elapsed = (time.perf_counter() - begin) / repeats
+            print(f"строк в таблице: {rows:>9}, строк в результате: {len(df):>4}, время запроса: {elapsed * 1000:.2f} мс")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fintracker import storage
+from fintracker.report import generate_expenses, generate_incomings, gen_sum, generate_all
+
+"""
+Бенчмарк отчетов по категориям, источникам и сводного отчета.
+Количество строк задается первым аргументом командной строки (по умолчанию 1 000 000).
+"""
+START = datetime(2020, 1, 1)
+CATEGORIES = ['Еда', 'Транспорт', 'Жилье', 'Развлечения', 'Здоровье']
+SOURCES = ['Зарплата', 'Подработка']
+
+def fill(path: str, rows: int):
+    """
+    Заполняет БД транзакциями (суммы в копейках): каждая десятая - доход, остальные - расходы.
+
+    Args:
+        path(str): путь к файлу БД.
+        rows(int): количество транзакций.
+    """
+    conn = sqlite3.connect(path)
+    categories = [storage._lookup_id(conn, 'category', name) for name in CATEGORIES]
+    sources = [storage._lookup_id(conn, 'source', name) for name in SOURCES]
+
+    def generate():
+        for i in range(rows):
+            date = str(START + timedelta(minutes=3 * i))
+            if i % 10 == 0:
+                yield 'Доход', 'Поступление', 500000, None, sources[i % 2], date, storage.BASE_CURRENCY
+            else:
+                yield 'Расход', 'Покупка', (i % 500) * 100, categories[i % 5], None, date, storage.BASE_CURRENCY
+
+    conn.executemany(storage._INSERT_SQL, generate())
+    conn.commit()
+    conn.close()
+
+def measure(title: str, func, *args):
+    """Печатает среднее время выполнения func(*args)."""
+    repeats = 5
+    begin = time.perf_counter()
+    for _ in range(repeats):
+        func(*args)
+    elapsed = (time.perf_counter() - begin) / repeats
+    print(f"{title}: {elapsed * 1000:.1f} мс")
+
+def main():
+    """Замеряет время отчетов за месяц и за весь период."""
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        storage.configure(os.path.join(tmp, 'bench.db'), cache='off')
+        storage.get_engine().writer()
+        fill(storage.DATA_FILE, rows)
+        month = (datetime(2021, 3, 1), datetime(2021, 3, 31, 23, 59, 59, 999999))
+        print(f"строк в таблице: {rows}")
+        measure("расходы по категориям, месяц", generate_expenses, *month)
+        measure("расходы по категориям, неполные дни на краях", generate_expenses, datetime(2020, 2, 15, 12), datetime(2021, 11, 3, 10))
+        measure("расходы по категориям, весь период", generate_expenses)
+        measure("доходы по источникам, весь период", generate_incomings)
+        measure("сводный отчет, весь период", gen_sum)
+        measure("три отчета по очереди, неполные дни на краях",
+                lambda *period: (generate_expenses(*period), generate_incomings(*period), gen_sum(*period)),
+                datetime(2020, 2, 15, 12), datetime(2021, 11, 3, 10))
+        measure("все отчеты за один проход (generate_all), неполные дни на краях", generate_all,
+                datetime(2020, 2, 15, 12), datetime(2021, 11, 3, 10))
+        storage.close_engine()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fintracker import storage
+
+"""
+Бенчмарк поиска по описанию (storage.search) на таблицах разного размера.
+Для сравнения - полный просмотр с LIKE. Время поиска через FTS5 должно расти медленнее размера таблицы.
+Максимальное количество строк задается первым аргументом командной строки (по умолчанию 1 000 000).
+"""
+START = datetime(2020, 1, 1)
+MERCHANTS = ['Пятерочка', 'Магнит', 'Перекресток', 'Азбука вкуса', 'Лента', 'ВкусВилл', 'Аптека', 'Кофейня', 'Такси', 'Кино']
+
+def fill(path: str, first: int, last: int):
+    """
+    Добавляет в БД транзакции с номерами first..last-1; каждая тысячная - покупка в редком магазине "Редкий".
+
+    Args:
+        path(str): путь к файлу БД.
+        first(int): номер первой транзакции.
+        last(int): номер после последней транзакции.
+    """
+    conn = sqlite3.connect(path)
+    category = storage._lookup_id(conn, 'category', 'Еда')
+
+    def generate():
+        for i in range(first, last):
+            merchant = 'Редкий' if i % 1000 == 0 else MERCHANTS[i % len(MERCHANTS)]
+            yield 'Расход', f'{merchant} чек {i}', (i % 500) * 100, category, None, str(START + timedelta(minutes=3 * i)), storage.BASE_CURRENCY
+
+    conn.executemany(storage._INSERT_SQL, generate())
+    conn.commit()
+    conn.close()
+
+def measure(func, *args, repeats: int = 5) -> float:
+    """Возвращает среднее время выполнения func(*args) в миллисекундах."""
+    begin = time.perf_counter()
+    for _ in range(repeats):
+        func(*args)
+    return (time.perf_counter() - begin) / repeats * 1000
+
+def like_scan(text: str):
+    """Базовый вариант: полный просмотр описаний с LIKE."""
+    return storage.get_engine().reader().execute(
+        'SELECT * FROM transaction_rows WHERE description LIKE ? ORDER BY date', (f'%{text}%',)).fetchall()
+
+def main():
+    """Замеряет поиск редкого и частого слова на таблицах растущего размера."""
+    max_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    sizes = [size for size in (10_000, 100_000, 1_000_000, 10_000_000) if size <= max_rows]
+    with tempfile.TemporaryDirectory() as tmp:
+        storage.configure(os.path.join(tmp, 'bench.db'))
+        storage.get_engine().writer()
+        filled = 0
+        print(f"{'строк':>10} {'FTS редкое':>12} {'FTS частое (50)':>16} {'FTS за месяц':>13} {'LIKE редкое':>12}")
+        for size in sizes:
+            fill(storage.DATA_FILE, filled, size)
+            filled = size
+            month = (datetime(2020, 2, 1), datetime(2020, 2, 29, 23, 59))
+            print(f"{size:>10} {measure(storage.search, 'редкий'):10.2f}мс "
+                  f"{measure(storage.search, 'магнит', None, None, 50):14.2f}мс "
+                  f"{measure(storage.search, 'редкий', *month):11.2f}мс "
+                  f"{measure(like_scan, 'Редкий', repeats=1):10.2f}мс")
+        storage.close_engine()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+import compileall
+import os
+import subprocess
+import sys
+
+"""
+Бенчмарк времени запуска CLI (python -X importtime main.py --help).
+Завершается с кодом 1, если импорт модулей занял больше бюджета или был загружен pandas.
+Бюджет в миллисекундах задается первым аргументом командной строки (по умолчанию 100).
+Перед замером пакет компилируется в байт-код, как при установке: иначе при устаревших .pyc
+(например, с PYTHONDONTWRITEBYTECODE) замеряется компиляция исходников, а не импорт.
+"""
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+HEAVY_MODULES = ('pandas', 'numpy')
+
+def import_times(args: list) -> dict:
+    """
+    Запускает main.py с -X importtime и собирает накопленное время импорта модулей верхнего уровня.
+
+    Args:
+        args(list): аргументы main.py.
+
+    Returns:
+        словарь {модуль: время в микросекундах}.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', os.path.join(ROOT, 'main.py')] + args,
+                            capture_output=True, text=True, cwd=ROOT)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # вложенные импорты выводятся с дополнительным отступом, их время уже учтено у родителя
+        if cumulative.strip().isdigit() and not name.startswith('  '):
+            times[name.strip()] = int(cumulative)
+    return times
+
+def main():
+    """Печатает время импорта для --help и проверяет бюджет."""
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 100.0
+    compileall.compile_dir(os.path.join(ROOT, 'fintracker'), quiet=1)
+    times = import_times(['--help'])
+    total_ms = sum(times.values()) / 1000
+    for name, value in sorted(times.items(), key=lambda item: -item[1])[:10]:
+        print(f"{name:<30} {value / 1000:8.1f} мс")
+    print(f"итого импорт: {total_ms:.1f} мс (бюджет {budget_ms:.0f} мс)")
+    heavy = [name for name in times if name.split('.')[0] in HEAVY_MODULES]
+    if heavy:
+        print(f"при запуске загружены тяжелые модули: {', '.join(heavy)}")
+        sys.exit(1)
+    if total_ms > budget_ms:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fintracker import storage
+from fintracker.report import generate_timeseries
+
+"""
+Бенчмарк отчета по периодам (generate_timeseries) на данных за 5 лет.
+Для сравнения - загрузка всех транзакций в pandas и resample по ним.
+Количество строк задается первым аргументом командной строки (по умолчанию 2 000 000).
+"""
+START = datetime(2020, 1, 1)
+YEARS = 5
+
+def fill(path: str, rows: int):
+    """
+    Заполняет БД транзакциями, равномерно распределенными по YEARS годам: каждая десятая - доход, остальные - расходы.
+
+    Args:
+        path(str): путь к файлу БД.
+        rows(int): количество транзакций.
+    """
+    step = timedelta(days=365 * YEARS) / rows
+    conn = sqlite3.connect(path)
+    category = storage._lookup_id(conn, 'category', 'Еда')
+    source = storage._lookup_id(conn, 'source', 'Зарплата')
+
+    def generate():
+        for i in range(rows):
+            date = str(START + step * i)
+            if i % 10 == 0:
+                yield 'Доход', 'Поступление', 500000, None, source, date, storage.BASE_CURRENCY
+            else:
+                yield 'Расход', 'Покупка', (i % 500) * 100, category, None, date, storage.BASE_CURRENCY
+
+    conn.executemany(storage._INSERT_SQL, generate())
+    conn.commit()
+    conn.close()
+
+def pandas_timeseries(freq: str):
+    """Базовый вариант: все транзакции в pandas, resample по дате."""
+    df = storage.get_transactions()
+    df['signed'] = df['amount'].where(df['type'] == storage.INCOME_TYPE, -df['amount'])
+    return df.set_index('date')['signed'].resample(freq).sum().cumsum()
+
+def measure(title: str, func, *args, repeats: int = 3):
+    """Печатает среднее время выполнения func(*args)."""
+    begin = time.perf_counter()
+    for _ in range(repeats):
+        func(*args)
+    elapsed = (time.perf_counter() - begin) / repeats
+    print(f"{title}: {elapsed * 1000:.1f} мс")
+
+def main():
+    """Замеряет время отчета по дням, неделям и месяцам за весь период и за год с неполными днями на краях."""
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        storage.configure(os.path.join(tmp, 'bench.db'), cache='off')
+        storage.get_engine().writer()
+        fill(storage.DATA_FILE, rows)
+        output = os.path.join(tmp, 'timeseries.csv')
+        print(f"строк в таблице: {rows} за {YEARS} лет")
+        for freq in ('D', 'W', 'M'):
+            measure(f"timeseries {freq}, весь период, с записью CSV", generate_timeseries, None, None, freq, output)
+        measure("timeseries D, год с неполными днями на краях", generate_timeseries,
+                datetime(2021, 2, 15, 12), datetime(2022, 2, 15, 10))
+        measure("pandas: все транзакции и resample по дням", pandas_timeseries, 'D', repeats=1)
+        storage.close_engine()
+
+if __name__ == '__main__':
+    main()
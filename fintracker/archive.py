@@ -0,0 +1,409 @@
+import glob
+import os
+import shutil
+import tempfile
+from datetime import datetime, time, timedelta
+from fintracker import storage
+
+"""
+Модуль archive - колоночный архив транзакций в форматах Parquet и Arrow IPC.
+
+Транзакции выгружаются потоково, группами строк, в каталоги year=YYYY/month=MM (hive-разбиение).
+Колонки type, category, source и currency хранятся со словарным кодированием, дата - как timestamp,
+сумма - как int64 в копейках валюты транзакции (как в БД).
+Архив читается через pyarrow.dataset с отображением файлов в память, поэтому отчеты за
+исторические периоды можно строить без обращения к БД (курсы для пересчета сумм в базовую валюту берутся из БД).
+Требуется пакет pyarrow.
+"""
+
+FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+_DICTIONARY_COLUMNS = ('type', 'category', 'source', 'currency')
+
+def _pyarrow():
+    """
+    Импортирует pyarrow.
+
+    Returns:
+        модуль pyarrow.
+
+    Raises:
+        ImportError: Если pyarrow не установлен.
+    """
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("Для работы с архивом нужен пакет pyarrow (pip install pyarrow).") from e
+    return pyarrow
+
+def _schema():
+    """Возвращает схему Arrow для транзакций."""
+    pa = _pyarrow()
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ('id', pa.int64()),
+        ('type', dictionary),
+        ('description', pa.string()),
+        ('amount', pa.int64()),
+        ('category', dictionary),
+        ('source', dictionary),
+        ('date', pa.timestamp('us')),
+        ('currency', dictionary),
+    ])
+
+class _DictionaryEncoder:
+    """
+    Кодирует строки колонки в индексы растущего словаря.
+    Словарь только дополняется, поэтому в файл Arrow IPC пишутся лишь его приращения.
+    """
+    def __init__(self):
+        """Инициализирует пустой словарь."""
+        self.codes = {}
+        self.values = []
+
+    def encode(self, values):
+        """
+        Кодирует значения колонки.
+
+        Args:
+            values: строки (None сохраняется как null).
+
+        Returns:
+            pyarrow.DictionaryArray.
+        """
+        pa = _pyarrow()
+        indices = []
+        for value in values:
+            if value is None:
+                indices.append(None)
+                continue
+            code = self.codes.get(value)
+            if code is None:
+                code = self.codes[value] = len(self.values)
+                self.values.append(value)
+            indices.append(code)
+        return pa.DictionaryArray.from_arrays(pa.array(indices, pa.int32()), pa.array(self.values, pa.string()))
+
+class _PartitionWriter:
+    """Пишет группы строк одного месяца в файл Parquet или Arrow IPC."""
+    def __init__(self, path: str, file_format: str):
+        """
+        Открывает файл раздела.
+
+        Args:
+            path(str): путь к файлу.
+            file_format(str): 'parquet' или 'arrow'.
+        """
+        pa = _pyarrow()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.schema = _schema()
+        self.encoders = {column: _DictionaryEncoder() for column in _DICTIONARY_COLUMNS}
+        if file_format == 'parquet':
+            import pyarrow.parquet as pq
+            self.writer = pq.ParquetWriter(path, self.schema, use_dictionary=list(_DICTIONARY_COLUMNS))
+        else:
+            import pyarrow.ipc as ipc
+            self.writer = ipc.new_file(path, self.schema, options=ipc.IpcWriteOptions(emit_dictionary_deltas=True))
+        self.file_format = file_format
+        self.pa = pa
+
+    def write(self, rows: list):
+        """
+        Записывает строки одной группой.
+
+        Args:
+            rows(list): кортежи (id, type, description, amount, category, source, date, currency).
+        """
+        pa = self.pa
+        ids, kinds, descriptions, amounts, categories, sources, dates, currencies = zip(*rows)
+        batch = pa.record_batch([
+            pa.array(ids, pa.int64()),
+            self.encoders['type'].encode(kinds),
+            pa.array(descriptions, pa.string()),
+            pa.array(amounts, pa.int64()),
+            self.encoders['category'].encode(categories),
+            self.encoders['source'].encode(sources),
+            pa.array(dates, pa.string()).cast(pa.timestamp('us')),
+            self.encoders['currency'].encode(currencies),
+        ], schema=self.schema)
+        if self.file_format == 'parquet':
+            self.writer.write_batch(batch, row_group_size=len(rows))
+        else:
+            self.writer.write_batch(batch)
+
+    def close(self):
+        """Закрывает файл."""
+        self.writer.close()
+
+def _month_start(value: datetime) -> datetime:
+    """Возвращает начало месяца даты."""
+    return datetime(value.year, value.month, 1)
+
+def _next_month(value: datetime) -> datetime:
+    """Возвращает начало следующего месяца."""
+    return (_month_start(value) + timedelta(days=32)).replace(day=1)
+
+def partition_path(directory: str, year: int, month: int, file_format: str) -> str:
+    """
+    Возвращает путь к файлу раздела.
+
+    Args:
+        directory(str): каталог архива.
+        year(int): год.
+        month(int): месяц.
+        file_format(str): 'parquet' или 'arrow'.
+
+    Returns:
+        путь вида directory/year=YYYY/month=MM/data.parquet.
+    """
+    return os.path.join(directory, f'year={year}', f'month={month:02d}', f'data{FORMATS[file_format]}')
+
+def export(directory: str, file_format: str = 'parquet', start_date: datetime = None, end_date: datetime = None,
+           row_group_size: int = 100_000) -> int:
+    """
+    Потоково выгружает транзакции в колоночный архив, по одному файлу на месяц.
+    Период расширяется до целых месяцев. Разделы месяцев периода заменяются целиком: месяцы периода без транзакций
+    (например, после удаления) из архива удаляются, разделы вне периода не меняются. Файлы сначала пишутся
+    во временный каталог рядом с архивом, поэтому при ошибке прежний архив остается без изменений.
+
+    Args:
+        directory(str): каталог архива.
+        file_format(str): 'parquet' или 'arrow'.
+        start_date(datetime): начальная дата.
+        end_date(datetime): конечная дата.
+        row_group_size(int): количество строк в группе (row group / record batch).
+
+    Returns:
+        количество выгруженных транзакций.
+
+    Raises:
+        ValueError: Если формат не поддерживается.
+        ImportError: Если pyarrow не установлен.
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f"Формат {file_format} не поддерживается, используйте parquet или arrow.")
+    _pyarrow()
+    if start_date:
+        start_date = _month_start(start_date)
+    if end_date:
+        end_date = _next_month(end_date) - timedelta(microseconds=1)
+
+    directory = os.path.abspath(directory)
+    parent = os.path.dirname(directory)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f'.{os.path.basename(directory)}.export-', dir=parent)
+    try:
+        count = _write_partitions(staging, file_format, start_date, end_date, row_group_size)
+        for old in _partitions(directory):
+            if (start_date is None or old[1] >= start_date) and (end_date is None or old[1] <= end_date):
+                shutil.rmtree(old[0])
+        for new, month in _partitions(staging):
+            target = os.path.dirname(partition_path(directory, month.year, month.month, file_format))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(new, target)
+        for year in glob.glob(os.path.join(directory, 'year=*')):
+            if not os.listdir(year):
+                os.rmdir(year)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return count
+
+def _partitions(directory: str) -> list:
+    """Возвращает разделы архива - пары (каталог month=MM, начало месяца); каталоги с другими именами пропускаются."""
+    partitions = []
+    for path in glob.glob(os.path.join(directory, 'year=*', 'month=*')):
+        try:
+            year = int(os.path.basename(os.path.dirname(path))[len('year='):])
+            month = int(os.path.basename(path)[len('month='):])
+            partitions.append((path, datetime(year, month, 1)))
+        except ValueError:
+            continue
+    return partitions
+
+def _write_partitions(directory: str, file_format: str, start_date: datetime, end_date: datetime,
+                      row_group_size: int) -> int:
+    """Записывает транзакции за период в файлы разделов каталога directory и возвращает их количество."""
+    count = 0
+    writer, partition, pending = None, None, []
+    try:
+        for chunk in storage.iter_transactions(start_date, end_date, chunk_size=row_group_size):
+            for row in chunk:
+                key = (int(row[6][:4]), int(row[6][5:7]))
+                if key != partition:
+                    if pending:
+                        writer.write(pending)
+                        pending = []
+                    if writer is not None:
+                        writer.close()
+                    partition = key
+                    writer = _PartitionWriter(partition_path(directory, *key, file_format), file_format)
+                pending.append(row)
+                if len(pending) >= row_group_size:
+                    writer.write(pending)
+                    pending = []
+                count += 1
+        if pending:
+            writer.write(pending)
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+def _detect_format(directory: str) -> str:
+    """
+    Определяет формат архива по расширению файлов.
+
+    Raises:
+        FileNotFoundError: Если в каталоге нет файлов архива.
+    """
+    for file_format, suffix in FORMATS.items():
+        if glob.glob(os.path.join(directory, 'year=*', 'month=*', f'*{suffix}')):
+            return file_format
+    raise FileNotFoundError(f"В каталоге {directory} нет архива транзакций.")
+
+def read_archive(directory: str, start_date: datetime = None, end_date: datetime = None, columns: list = None,
+                 transaction_type: str = None):
+    """
+    Читает транзакции из архива за период. Файлы отображаются в память,
+    разделы за пределами периода отбрасываются по году без чтения.
+
+    Args:
+        directory(str): каталог архива.
+        start_date(datetime): начальная дата (включительно).
+        end_date(datetime): конечная дата (включительно).
+        columns(list): нужные колонки (по умолчанию - все); колонки, которых нет в архиве (currency в архивах,
+            выгруженных до появления валют), пропускаются.
+        transaction_type(str): тип транзакции для отбора.
+
+    Returns:
+        pyarrow.Table с транзакциями.
+    """
+    pa = _pyarrow()
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+
+    file_format = _detect_format(directory)
+    dataset = ds.dataset(directory, format='parquet' if file_format == 'parquet' else 'ipc', partitioning='hive',
+                         filesystem=pafs.LocalFileSystem(use_mmap=True))
+    if columns:
+        columns = [column for column in columns if column in dataset.schema.names]
+    condition = None
+    for expression in _filters(ds, pa, start_date, end_date, transaction_type):
+        condition = expression if condition is None else condition & expression
+    return dataset.to_table(columns=columns, filter=condition)
+
+def _filters(ds, pa, start_date: datetime, end_date: datetime, transaction_type: str) -> list:
+    """Формирует условия отбора для pyarrow.dataset."""
+    filters = []
+    if start_date:
+        if not isinstance(start_date, datetime):
+            start_date = datetime.combine(start_date, time.min)
+        filters.append(ds.field('year') >= start_date.year)
+        filters.append(ds.field('date') >= pa.scalar(start_date, pa.timestamp('us')))
+    if end_date:
+        if not isinstance(end_date, datetime):
+            end_date = datetime.combine(end_date, time.max)
+        filters.append(ds.field('year') <= end_date.year)
+        filters.append(ds.field('date') <= pa.scalar(end_date, pa.timestamp('us')))
+    if transaction_type:
+        filters.append(ds.field('type') == transaction_type)
+    return filters
+
+def _decode(table, column: str):
+    """
+    Заменяет словарную колонку строковой: словари разных файлов архива различаются,
+    а группировка pyarrow требует единого словаря.
+    """
+    pa = _pyarrow()
+    return table.set_column(table.schema.get_field_index(column), column, table.column(column).cast(pa.string()))
+
+def _grouped_totals(directory: str, start_date: datetime, end_date: datetime, keys: list, transaction_type: str = None) -> list:
+    """
+    Суммирует транзакции архива по колонкам keys в базовой валюте. Суммы в других валютах дополнительно
+    группируются по валюте и дню и пересчитываются одним соединением с курсами (storage.convert_totals).
+
+    Args:
+        directory(str): каталог архива.
+        start_date(datetime): начальная дата.
+        end_date(datetime): конечная дата.
+        keys(list): колонки группировки.
+        transaction_type(str): тип транзакции для отбора.
+
+    Returns:
+        список кортежей (значения keys..., сумма в копейках, количество транзакций).
+    """
+    pa = _pyarrow()
+    import pyarrow.compute as pc
+
+    table = read_archive(directory, start_date, end_date, keys + ['amount', 'date', 'currency'], transaction_type)
+    for column in keys:
+        table = _decode(table, column)
+    foreign = None
+    if 'currency' in table.column_names:
+        table = _decode(table, 'currency')
+        mask = pc.fill_null(pc.not_equal(table.column('currency'), storage.BASE_CURRENCY), False)
+        foreign, table = table.filter(mask), table.filter(pc.invert(mask))
+
+    totals = {}
+    grouped = table.group_by(keys).aggregate([('amount', 'sum'), ('amount', 'count')])
+    for row in zip(*(grouped.column(name).to_pylist() for name in keys + ['amount_sum', 'amount_count'])):
+        totals[row[:-2]] = [row[-2], row[-1]]
+    if foreign is not None and foreign.num_rows:
+        foreign = foreign.append_column('day', pc.cast(foreign.column('date'), pa.date32()))
+        grouped = foreign.group_by(keys + ['currency', 'day']).aggregate([('amount', 'sum'), ('amount', 'count')])
+        frame = storage.convert_totals(grouped.to_pandas().rename(columns={'amount_sum': 'total'}))
+        for row in zip(*(frame[name].tolist() for name in keys + ['total', 'amount_count'])):
+            entry = totals.setdefault(row[:-2], [0, 0])
+            entry[0] += row[-2]
+            entry[1] += row[-1]
+    return [key + tuple(value) for key, value in totals.items()]
+
+def archive_totals_by(directory: str, column: str, transaction_type: str, start_date: datetime = None,
+                      end_date: datetime = None) -> list:
+    """
+    Аналог storage.get_totals_by для архива: суммы по категориям или источникам.
+
+    Args:
+        directory(str): каталог архива.
+        column(str): 'category' или 'source'.
+        transaction_type(str): тип транзакции.
+        start_date(datetime): начальная дата.
+        end_date(datetime): конечная дата.
+
+    Returns:
+        список пар (значение колонки, сумма в копейках), отсортированный по убыванию суммы.
+    """
+    if column not in ('category', 'source'):
+        raise ValueError(f"Группировка по колонке {column} не поддерживается.")
+    rows = [(key, total) for key, total, _ in _grouped_totals(directory, start_date, end_date, [column], transaction_type)
+            if key is not None]
+    return sorted(rows, key=lambda row: row[1], reverse=True)
+
+def archive_summary(directory: str, start_date: datetime = None, end_date: datetime = None) -> tuple:
+    """
+    Аналог storage.get_summary для архива.
+
+    Args:
+        directory(str): каталог архива.
+        start_date(datetime): начальная дата.
+        end_date(datetime): конечная дата.
+
+    Returns:
+        (count, income, expense): количество транзакций, сумма доходов и сумма расходов в копейках.
+    """
+    rows = _grouped_totals(directory, start_date, end_date, ['type'])
+    totals = {kind: total for kind, total, _ in rows}
+    return sum(count for _, _, count in rows), totals.get(storage.INCOME_TYPE, 0), totals.get(storage.EXPENSE_TYPE, 0)
+
+def archive_all_totals(directory: str, start_date: datetime = None, end_date: datetime = None) -> tuple:
+    """
+    Аналог storage.get_all_totals для архива: данные всех отчетов за одно чтение архива.
+
+    Args:
+        directory(str): каталог архива.
+        start_date(datetime): начальная дата.
+        end_date(datetime): конечная дата.
+
+    Returns:
+        (categories, sources, summary): см. storage._split_totals, суммы - в копейках.
+    """
+    return storage._split_totals(_grouped_totals(directory, start_date, end_date, ['type', 'category', 'source']))
@@ -0,0 +1,268 @@
+import asyncio
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from fintracker import storage
+
+"""
+Модуль async_storage - асинхронный интерфейс к хранилищу для использования внутри цикла событий asyncio.
+
+Работа с SQLite не выполняется в потоке цикла событий. Запись идет в одном выделенном потоке: запросы на запись,
+поступившие одновременно от разных задач, объединяются в одну SQL-транзакцию (групповая фиксация), поэтому
+сотни конкурентных add стоят нескольких фиксаций, а не сотен. Чтение выполняется в пуле потоков, у каждого из которых
+свое соединение с БД (режим WAL - чтение не блокирует запись). Используется то же хранилище, что и синхронные
+функции модуля storage (storage.get_engine), включая кэш запросов и его версию данных.
+"""
+
+class _WriteRequest:
+    """Запрос на запись: строки для _INSERT_SQL и future задачи, ожидающей фиксации."""
+    __slots__ = ('rows', 'future')
+
+    def __init__(self, rows, future: asyncio.Future):
+        self.rows = rows
+        self.future = future
+
+def _resolve(future: asyncio.Future, result=None, error: BaseException = None):
+    """Передает результат записи ожидающей задаче (вызывается в потоке цикла событий)."""
+    if future.done():
+        return  # задача отменена, пока запись ждала очереди
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+class AsyncStorage:
+    """
+    Асинхронное хранилище транзакций: выделенный поток записи с групповой фиксацией и пул потоков чтения.
+
+    Использование::
+
+        async with AsyncStorage() as db:
+            await db.add(Expense('Обед', 150, 'Еда'))
+            categories, sources, summary = await db.get_all_totals()
+    """
+    def __init__(self, readers: int = 4, max_group: int = 1000, batch_size: int = 1000):
+        """Инициализирует новый объект AsyncStorage. Потоки запускаются при первом обращении.
+
+        Args:
+            readers(int): количество потоков чтения.
+            max_group(int): максимальное количество запросов на запись, объединяемых в одну SQL-транзакцию.
+            batch_size(int): размер пачки для executemany.
+
+        Raises:
+            ValueError: Если readers, max_group или batch_size меньше 1.
+        """
+        if min(readers, max_group, batch_size) < 1:
+            raise ValueError("Количество потоков чтения, размер группы и пачки должны быть положительными числами.")
+        self.readers = readers
+        self.max_group = max_group
+        self.batch_size = batch_size
+        self.writes = 0
+        self.commits = 0
+        self._queue = queue.SimpleQueue()
+        self._writer = None
+        self._pool = None
+        self._lock = threading.Lock()
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def start(self):
+        """Запускает поток записи и пул потоков чтения (повторный вызов ничего не делает)."""
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run_writer, name='fintr-writer', daemon=True)
+                self._writer.start()
+                self._pool = ThreadPoolExecutor(max_workers=self.readers, thread_name_prefix='fintr-reader')
+
+    async def close(self):
+        """Дожидается записи всех поставленных в очередь транзакций и останавливает потоки."""
+        with self._lock:
+            writer, pool = self._writer, self._pool
+            self._writer = self._pool = None
+        if writer is None:
+            return
+        self._queue.put(None)
+        await asyncio.get_running_loop().run_in_executor(None, writer.join)
+        pool.shutdown()
+
+    def stats(self) -> dict:
+        """
+        Возвращает счетчики записи.
+
+        Returns:
+            словарь с ключами writes (запросы на запись) и commits (SQL-транзакции, в которые они объединены).
+        """
+        return {'writes': self.writes, 'commits': self.commits}
+
+    def _run_writer(self):
+        """Цикл потока записи: забирает все накопившиеся запросы (не больше max_group) и фиксирует их вместе."""
+        while True:
+            request = self._queue.get()
+            if request is None:
+                return
+            group = [request]
+            stop = False
+            while len(group) < self.max_group:
+                try:
+                    request = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    stop = True
+                    break
+                group.append(request)
+            self._commit(group)
+            if stop:
+                return
+
+    def _commit(self, group: list):
+        """
+        Записывает группу запросов одной SQL-транзакцией. Строки каждого запроса сначала собираются в список:
+        ошибка при этом передается только этому запросу. Если транзакция не удалась, запросы группы записываются
+        по одному, чтобы ошибка одного запроса не отменяла остальные.
+        """
+        ready = []
+        for request in group:
+            # Преобразование транзакций в строки выполняется здесь, а не в потоке цикла событий
+            try:
+                if not isinstance(request.rows, list):
+                    request.rows = list(request.rows)
+            except Exception as e:
+                self._deliver(request.future, error=e)
+                continue
+            ready.append(request)
+        if ready:
+            self._write_group(ready)
+
+    def _write_group(self, group: list):
+        """Записывает запросы с уже собранными строками одной SQL-транзакцией (при ошибке - по одному)."""
+        try:
+            engine = storage.get_engine()
+            with engine.write() as conn:
+                counts = [storage._write_rows(engine, conn, request.rows, self.batch_size) for request in group]
+                if any(counts):
+                    storage._bump_version(conn)
+        except Exception as e:
+            if len(group) > 1:
+                for request in group:
+                    self._write_group([request])
+            else:
+                self._deliver(group[0].future, error=e)
+            return
+        self.writes += len(group)
+        self.commits += 1
+        for request, count in zip(group, counts):
+            self._deliver(request.future, count)
+
+    @staticmethod
+    def _deliver(future: asyncio.Future, result=None, error: BaseException = None):
+        """Передает результат в цикл событий задачи; если цикл уже закрыт, результат отбрасывается."""
+        try:
+            future.get_loop().call_soon_threadsafe(_resolve, future, result, error)
+        except RuntimeError:
+            pass
+
+    def _submit(self, rows) -> asyncio.Future:
+        """Ставит строки в очередь записи и возвращает future с количеством записанных строк."""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put(_WriteRequest(rows, future))
+        return future
+
+    async def add(self, transaction):
+        """
+        Записывает транзакцию (расход или доход). Возвращается после фиксации SQL-транзакции,
+        в которую запись объединена с одновременными запросами других задач.
+
+        Args:
+            transaction(Expense | Income): транзакция для записи.
+
+        Raises:
+            ValueError: Если тип транзакции не поддерживается.
+            sqlite3.Error: Если произошла ошибка при записи.
+        """
+        row = storage._transaction_row(transaction)
+        if row is None:
+            raise ValueError("Неподдерживаемый тип транзакции.")
+        await self._submit([row])
+
+    async def bulk_insert(self, transactions) -> int:
+        """
+        Записывает транзакции одной SQL-транзакцией (возможно, вместе с одновременными запросами других задач).
+        Транзакции неподдерживаемого типа пропускаются.
+
+        Args:
+            transactions: итерируемый объект с Expense/Income или TransactionBatch.
+
+        Returns:
+            count: количество записанных транзакций.
+
+        Raises:
+            sqlite3.Error: Если произошла ошибка при записи (изменения этого вызова откатываются).
+        """
+        return await self._submit(storage._transaction_rows(transactions))
+
+    async def _read(self, function, *args):
+        """Выполняет функцию чтения модуля storage в пуле потоков чтения."""
+        self.start()
+        return await asyncio.get_running_loop().run_in_executor(self._pool, function, *args)
+
+    async def get_transactions(self, start_date: datetime = None, end_date: datetime = None):
+        """
+        Возвращает транзакции за период (см. storage.get_transactions).
+
+        Args:
+            start_date(datetime): начальная дата фильтрации.
+            end_date(datetime): конечная дата фильтрации.
+
+        Returns:
+            df: датафрейм транзакций.
+        """
+        return await self._read(storage.get_transactions, start_date, end_date)
+
+    async def get_totals_by(self, column: str, transaction_type: str, start_date: datetime = None, end_date: datetime = None) -> list:
+        """
+        Суммирует транзакции по категориям или источникам (см. storage.get_totals_by).
+
+        Args:
+            column(str): колонка группировки - 'category' или 'source'.
+            transaction_type(str): тип транзакции (storage.EXPENSE_TYPE или storage.INCOME_TYPE).
+            start_date(datetime): начальная дата фильтрации.
+            end_date(datetime): конечная дата фильтрации.
+
+        Returns:
+            rows: список пар (значение колонки, сумма в копейках).
+        """
+        return await self._read(storage.get_totals_by, column, transaction_type, start_date, end_date)
+
+    async def get_summary(self, start_date: datetime = None, end_date: datetime = None) -> tuple:
+        """
+        Считает количество транзакций и общие суммы доходов и расходов (см. storage.get_summary).
+
+        Args:
+            start_date(datetime): начальная дата фильтрации.
+            end_date(datetime): конечная дата фильтрации.
+
+        Returns:
+            (count, income, expense): суммы в копейках.
+        """
+        return await self._read(storage.get_summary, start_date, end_date)
+
+    async def get_all_totals(self, start_date: datetime = None, end_date: datetime = None) -> tuple:
+        """
+        Возвращает данные всех отчетов одним запросом (см. storage.get_all_totals).
+
+        Args:
+            start_date(datetime): начальная дата фильтрации.
+            end_date(datetime): конечная дата фильтрации.
+
+        Returns:
+            (categories, sources, summary).
+        """
+        return await self._read(storage.get_all_totals, start_date, end_date)
@@ -0,0 +1,310 @@
+import glob
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+from datetime import datetime
+from fintracker import storage
+from fintracker.models import BASE_CURRENCY, to_minor
+
+"""
+Модуль backup - резервное копирование и восстановление БД.
+
+Полный снимок делается онлайн через backup API SQLite. Инкрементальная копия дописывает в сжатый
+сегмент только транзакции, добавленные и удаленные после предыдущей копии (водяной знак хранится
+в таблице backup_state). Снимок и следующие за ним сегменты образуют цепочку, восстановление
+копирует снимок и последовательно применяет сегменты.
+"""
+
+BASE_PREFIX = 'base-'
+BASE_SUFFIX = '.db'
+SEGMENT_SUFFIX = '.jsonl.gz'
+
+_RESTORE_SQL = ('INSERT INTO transactions (id, type, description, amount, category_id, source_id, date, currency) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)')
+
+def _backup_dir(backup_dir: str = None) -> str:
+    """Возвращает каталог копий (по умолчанию storage.BACKUP_DIR) и создает его при необходимости."""
+    path = backup_dir or storage.BACKUP_DIR
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def _read_state(conn: sqlite3.Connection) -> dict:
+    """
+    Читает состояние резервного копирования.
+
+    Returns:
+        словарь с ключами base (имя снимка), last_id, last_seq, segments.
+    """
+    state = dict(conn.execute('SELECT key, value FROM backup_state').fetchall())
+    return {
+        'base': state.get('base'),
+        'last_id': int(state.get('last_id') or 0),
+        'last_seq': int(state.get('last_seq') or 0),
+        'segments': int(state.get('segments') or 0),
+    }
+
+def _write_state(conn: sqlite3.Connection, state: dict):
+    """
+    Записывает состояние резервного копирования и удаляет записи об удалениях, уже попавшие в копию.
+
+    Args:
+        conn(sqlite3.Connection): соединение для записи.
+        state(dict): состояние (см. _read_state).
+    """
+    conn.executemany('INSERT OR REPLACE INTO backup_state (key, value) VALUES (?, ?)',
+                     [(key, str(value)) for key, value in state.items()])
+    conn.execute('DELETE FROM deleted_transactions WHERE seq <= ?', (state['last_seq'],))
+
+def _watermark(conn: sqlite3.Connection) -> tuple:
+    """
+    Returns:
+        (last_id, last_seq): максимальный id транзакции и номер последней записи об удалении.
+    """
+    last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM transactions').fetchone()[0]
+    last_seq = conn.execute('SELECT COALESCE(MAX(seq), 0) FROM deleted_transactions').fetchone()[0]
+    return last_id, last_seq
+
+def list_bases(backup_dir: str = None) -> list:
+    """
+    Возвращает имена снимков в каталоге копий, от старых к новым.
+
+    Args:
+        backup_dir(str): каталог копий.
+
+    Returns:
+        список имен файлов снимков.
+    """
+    path = _backup_dir(backup_dir)
+    return sorted(os.path.basename(name) for name in glob.glob(os.path.join(path, f'{BASE_PREFIX}*{BASE_SUFFIX}')))
+
+def list_segments(base: str, backup_dir: str = None) -> list:
+    """
+    Возвращает пути к сегментам цепочки снимка в порядке применения.
+
+    Args:
+        base(str): имя файла снимка.
+        backup_dir(str): каталог копий.
+
+    Returns:
+        список путей к сегментам.
+    """
+    path = _backup_dir(backup_dir)
+    stem = base[:-len(BASE_SUFFIX)]
+    return sorted(glob.glob(os.path.join(path, f'{stem}.seg*{SEGMENT_SUFFIX}')))
+
+def rotate(keep: int = 2, backup_dir: str = None) -> int:
+    """
+    Удаляет старые цепочки (снимок и его сегменты), оставляя keep последних.
+
+    Args:
+        keep(int): сколько цепочек оставить.
+        backup_dir(str): каталог копий.
+
+    Returns:
+        количество удаленных файлов.
+    """
+    path = _backup_dir(backup_dir)
+    removed = 0
+    bases = list_bases(path)
+    for base in bases[:max(len(bases) - keep, 0)]:
+        for name in list_segments(base, path) + [os.path.join(path, base)]:
+            os.remove(name)
+            removed += 1
+    return removed
+
+def snapshot(backup_dir: str = None, keep: int = 2) -> str:
+    """
+    Делает полный согласованный снимок БД через backup API SQLite, не останавливая запись,
+    и начинает от него новую цепочку инкрементальных копий.
+
+    Args:
+        backup_dir(str): каталог копий.
+        keep(int): сколько последних цепочек хранить (см. rotate).
+
+    Returns:
+        путь к файлу снимка.
+    """
+    path = _backup_dir(backup_dir)
+    engine = storage.get_engine()
+    name = f"{BASE_PREFIX}{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}{BASE_SUFFIX}"
+    target = os.path.join(path, name)
+    dest = sqlite3.connect(target + '.tmp')
+    try:
+        engine.reader().backup(dest)
+        last_id, last_seq = _watermark(dest)
+    finally:
+        dest.close()
+    os.replace(target + '.tmp', target)
+    with engine.write() as conn:
+        _write_state(conn, {'base': name, 'last_id': last_id, 'last_seq': last_seq, 'segments': 0})
+    rotate(keep, path)
+    return target
+
+def incremental(backup_dir: str = None, max_segments: int = 30, keep: int = 2) -> str:
+    """
+    Записывает в новый сжатый сегмент транзакции, добавленные и удаленные после предыдущей копии.
+    Если снимка еще нет или в цепочке уже max_segments сегментов, вместо сегмента делается новый снимок.
+
+    Args:
+        backup_dir(str): каталог копий.
+        max_segments(int): максимальная длина цепочки сегментов.
+        keep(int): сколько последних цепочек хранить (см. rotate).
+
+    Returns:
+        путь к записанному сегменту или снимку; None, если изменений не было.
+    """
+    path = _backup_dir(backup_dir)
+    engine = storage.get_engine()
+    state = _read_state(engine.reader())
+    if not state['base'] or not os.path.exists(os.path.join(path, state['base'])) or state['segments'] >= max_segments:
+        return snapshot(path, keep)
+
+    stem = state['base'][:-len(BASE_SUFFIX)]
+    target = os.path.join(path, f"{stem}.seg{state['segments'] + 1:06d}{SEGMENT_SUFFIX}")
+    conn = engine.reader()
+    # Все чтения в одной транзакции, чтобы водяной знак и содержимое сегмента были согласованы
+    conn.execute('BEGIN')
+    try:
+        last_id, last_seq = _watermark(conn)
+        if last_id <= state['last_id'] and last_seq <= state['last_seq']:
+            return None
+        cursor = conn.execute(f'SELECT {", ".join(storage._COLUMNS)} FROM transaction_rows WHERE id > ? AND id <= ? ORDER BY id',
+                              (state['last_id'], last_id))
+        columns = [column[0] for column in cursor.description]
+        with gzip.open(target + '.tmp', 'wt', encoding='utf-8') as f:
+            f.write(json.dumps({'base': state['base'], 'columns': columns, 'last_id': last_id, 'last_seq': last_seq,
+                                'minor_units': True}) + '\n')
+            for chunk in iter(lambda: cursor.fetchmany(1000), []):
+                f.writelines(json.dumps({'op': 'insert', 'row': row}, ensure_ascii=False) + '\n' for row in chunk)
+            deleted = conn.execute('SELECT DISTINCT id FROM deleted_transactions WHERE seq > ? AND seq <= ?',
+                                   (state['last_seq'], last_seq))
+            f.writelines(json.dumps({'op': 'delete', 'id': row[0]}) + '\n' for row in deleted)
+    finally:
+        conn.rollback()
+    os.replace(target + '.tmp', target)
+    with engine.write() as conn:
+        _write_state(conn, {'base': state['base'], 'last_id': last_id, 'last_seq': last_seq, 'segments': state['segments'] + 1})
+    return target
+
+def _apply_segment(conn: sqlite3.Connection, segment: str) -> dict:
+    """
+    Применяет сегмент к восстанавливаемой БД пачками. Сегменты хранят названия категорий и источников,
+    при восстановлении они заменяются на id справочников восстанавливаемой БД.
+
+    Args:
+        conn(sqlite3.Connection): соединение с восстанавливаемой БД.
+        segment(str): путь к сегменту.
+
+    Returns:
+        заголовок сегмента (снимок, колонки, водяной знак).
+    """
+    with gzip.open(segment, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        columns = header['columns']
+        # Сегменты, записанные до перехода на копейки (миграция 4), хранят суммы в рублях
+        convert = not header.get('minor_units')
+        lookup_ids = {column: {} for column in storage._LOOKUP_TABLES}
+
+        def lookup(column, name):
+            if name is None:
+                return None
+            if name not in lookup_ids[column]:
+                lookup_ids[column][name] = storage._lookup_id(conn, column, name)
+            return lookup_ids[column][name]
+
+        inserts, deletes = [], []
+        for line in f:
+            record = json.loads(line)
+            if record['op'] == 'insert':
+                row = dict(zip(columns, record['row']))
+                amount = to_minor(row['amount']) if convert else row['amount']
+                # Сегменты, записанные до появления валют (миграция 11), хранят суммы в базовой валюте
+                inserts.append((row['id'], row['type'], row['description'], amount, lookup('category', row['category']),
+                                lookup('source', row['source']), row['date'], row.get('currency') or BASE_CURRENCY))
+                if len(inserts) >= 1000:
+                    _restore_rows(conn, inserts)
+                    inserts = []
+            else:
+                deletes.append((record['id'],))
+        if inserts:
+            _restore_rows(conn, inserts)
+        conn.executemany('DELETE FROM transactions WHERE id = ?', deletes)
+    return header
+
+def _restore_rows(conn: sqlite3.Connection, rows: list):
+    """
+    Записывает строки сегмента, заменяя транзакции с теми же id. Замена выполняется явным DELETE, а не INSERT OR REPLACE:
+    при REPLACE триггеры удаления не срабатывают, и сводные суммы и полнотекстовый индекс разошлись бы с транзакциями.
+    """
+    conn.executemany('DELETE FROM transactions WHERE id = ?', [(row[0],) for row in rows])
+    conn.executemany(_RESTORE_SQL, rows)
+
+def _data_version(path: str) -> int:
+    """Возвращает версию данных БД (0, если файла нет или в нем еще нет счетчика версии)."""
+    if not os.path.exists(path):
+        return 0
+    conn = sqlite3.connect(path)
+    try:
+        row = conn.execute("SELECT value FROM cache_state WHERE key = 'data_version'").fetchone()
+        return row[0] if row else 0
+    except sqlite3.Error:
+        return 0
+    finally:
+        conn.close()
+
+def restore(backup_dir: str = None, base: str = None, target: str = None) -> str:
+    """
+    Восстанавливает БД из снимка и всех сегментов его цепочки.
+    Восстановление выполняется во временный файл, который затем атомарно заменяет target.
+
+    Args:
+        backup_dir(str): каталог копий.
+        base(str): имя снимка (по умолчанию - последний).
+        target(str): путь к восстанавливаемой БД (по умолчанию - storage.DATA_FILE).
+
+    Returns:
+        путь к восстановленной БД.
+
+    Raises:
+        FileNotFoundError: Если в каталоге нет снимков или указанного снимка.
+        ValueError: Если восстанавливается БД в памяти.
+    """
+    path = _backup_dir(backup_dir)
+    target = target or storage.DATA_FILE
+    if target == storage.MEMORY:
+        raise ValueError("Восстановление в БД в памяти не поддерживается.")
+    bases = list_bases(path)
+    if not bases:
+        raise FileNotFoundError(f"В каталоге {path} нет снимков.")
+    base = base or bases[-1]
+    if base not in bases:
+        raise FileNotFoundError(f"Снимок {base} не найден в каталоге {path}.")
+
+    temp = target + '.restore'
+    shutil.copyfile(os.path.join(path, base), temp)
+    conn = sqlite3.connect(temp)
+    try:
+        storage._init_schema(conn)
+        segments = list_segments(base, path)
+        for segment in segments:
+            with conn:
+                _apply_segment(conn, segment)
+        with conn:
+            last_id, last_seq = _watermark(conn)
+            _write_state(conn, {'base': base, 'last_id': last_id, 'last_seq': last_seq, 'segments': len(segments)})
+            # Версия данных восстановленной БД должна быть больше версии заменяемой, иначе
+            # закэшированные результаты прежних данных совпали бы с ней по версии
+            conn.execute("UPDATE cache_state SET value = MAX(value, ?) + 1 WHERE key = 'data_version'",
+                         (_data_version(target),))
+    finally:
+        conn.close()
+
+    if os.path.abspath(target) == os.path.abspath(storage.DATA_FILE):
+        storage.close_engine()
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(target + suffix):
+            os.remove(target + suffix)
+    os.replace(temp, target)
+    return target
@@ -0,0 +1,163 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+
+"""
+Модуль cache - кэш результатов запросов (транзакции за период, данные отчетов).
+
+Результат хранится вместе с версией данных, при которой он получен. Версию увеличивает каждая запись
+в БД (см. storage._bump_version), поэтому устаревший результат никогда не возвращается: он просто
+не совпадает по версии. Кэш в памяти ограничен количеством записей и вытесняет давно не использованные (LRU).
+Дополнительно результаты можно сохранять в таблицу query_cache самой БД, чтобы ими пользовались
+следующие запуски CLI.
+"""
+
+class QueryCache:
+    """
+    Кэш результатов в памяти процесса с вытеснением давно не использованных записей и счетчиками попаданий.
+    """
+    def __init__(self, maxsize: int = 128):
+        """Инициализирует новый объект QueryCache.
+
+        Args:
+            maxsize(int): максимальное количество записей.
+
+        Raises:
+            ValueError: Если maxsize меньше 1.
+        """
+        if maxsize < 1:
+            raise ValueError("Размер кэша должен быть положительным числом.")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.persistent_hits = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, version: int) -> tuple:
+        """
+        Ищет результат для ключа, полученный при заданной версии данных.
+
+        Args:
+            key(str): ключ запроса (см. make_key).
+            version(int): текущая версия данных.
+
+        Returns:
+            (found, value): найден ли результат и сам результат.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def put(self, key: str, version: int, value):
+        """
+        Сохраняет результат, вытесняя самую давно использованную запись при переполнении.
+
+        Args:
+            key(str): ключ запроса.
+            version(int): версия данных, при которой получен результат.
+            value: результат.
+        """
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Удаляет все записи и обнуляет счетчики."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.persistent_hits = 0
+
+    def stats(self) -> dict:
+        """
+        Возвращает счетчики кэша.
+
+        Returns:
+            словарь с ключами hits, misses, persistent_hits (попадания в таблицу query_cache) и entries.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'persistent_hits': self.persistent_hits, 'entries': len(self._entries)}
+
+def make_key(name: str, start: str = None, end: str = None) -> str:
+    """
+    Формирует ключ кэша.
+
+    Args:
+        name(str): имя запроса (функции).
+        start(str): начальная дата периода в формате БД.
+        end(str): конечная дата периода в формате БД.
+
+    Returns:
+        строковый ключ.
+    """
+    return f"{name}|{start or ''}|{end or ''}"
+
+def copy_value(value):
+    """Возвращает копию результата, чтобы изменения у вызывающего не портили кэш (для списков и датафреймов)."""
+    return value.copy() if hasattr(value, 'copy') else value
+
+def load_persisted(conn: sqlite3.Connection, key: str, version: int) -> tuple:
+    """
+    Ищет результат в таблице query_cache.
+
+    Args:
+        conn(sqlite3.Connection): соединение с БД.
+        key(str): ключ запроса.
+        version(int): текущая версия данных.
+
+    Returns:
+        (found, value): найден ли результат и сам результат.
+    """
+    row = conn.execute('SELECT value FROM query_cache WHERE key = ? AND version = ?', (key, version)).fetchone()
+    if row is None:
+        return False, None
+    import pickle  # нужен только режиму persist, не загружается при запуске CLI
+    return True, pickle.loads(row[0])
+
+def touch_persisted(conn: sqlite3.Connection, key: str):
+    """
+    Отмечает использование записи query_cache (для вытеснения давно не использованных).
+
+    Args:
+        conn(sqlite3.Connection): соединение для записи.
+        key(str): ключ запроса.
+    """
+    conn.execute('UPDATE query_cache SET used = (SELECT MAX(used) + 1 FROM query_cache), hits = hits + 1 WHERE key = ?', (key,))
+
+def store_persisted(conn: sqlite3.Connection, key: str, version: int, value, max_entries: int = 256,
+                    max_bytes: int = 4 * 1024 * 1024) -> bool:
+    """
+    Сохраняет результат в таблицу query_cache, удаляя записи устаревших версий и лишние давно не использованные записи.
+
+    Args:
+        conn(sqlite3.Connection): соединение для записи.
+        key(str): ключ запроса.
+        version(int): версия данных, при которой получен результат.
+        value: результат.
+        max_entries(int): максимальное количество записей в таблице.
+        max_bytes(int): результаты большего размера (после сериализации) не сохраняются.
+
+    Returns:
+        True, если результат сохранен.
+    """
+    import pickle
+    data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    conn.execute('DELETE FROM query_cache WHERE version < ?', (version,))
+    if len(data) > max_bytes:
+        return False
+    conn.execute(
+        'INSERT OR REPLACE INTO query_cache (key, version, value, used, hits) '
+        'VALUES (?, ?, ?, (SELECT COALESCE(MAX(used), 0) + 1 FROM query_cache), 0)',
+        (key, version, data)
+    )
+    conn.execute('DELETE FROM query_cache WHERE key NOT IN (SELECT key FROM query_cache ORDER BY used DESC LIMIT ?)',
+                 (max_entries,))
+    return True
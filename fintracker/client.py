@@ -0,0 +1,97 @@
+import json
+import os
+import socket
+import sys
+from fintracker.config import parse_tcp_address, canonical_db_path
+
+"""
+Модуль client - тонкий клиент сервера (команда serve, см. fintracker.server).
+Передает серверу аргументы командной строки и выводит потоковый ответ. Использует только стандартную библиотеку
+без asyncio, чтобы запуск CLI в режиме клиента оставался быстрым.
+"""
+
+# Команды, которые CLI передает серверу, если он запущен.
+REMOTE_COMMANDS = ('add', 'view', 'search', 'report', 'delete')
+
+def encode(message: dict) -> bytes:
+    """Кодирует сообщение протокола в строку JSON."""
+    return json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n'
+
+def connect(address: str, timeout: float = None) -> socket.socket:
+    """
+    Подключается к серверу.
+
+    Args:
+        address(str): путь к Unix-сокету или 'tcp://хост:порт'.
+        timeout(float): время ожидания подключения в секундах.
+
+    Returns:
+        сокет соединения.
+
+    Raises:
+        OSError: Если сервер не запущен.
+    """
+    tcp = parse_tcp_address(address)
+    if tcp:
+        return socket.create_connection(tcp, timeout=timeout)
+    if not hasattr(socket, 'AF_UNIX') or not os.path.exists(address):
+        raise FileNotFoundError(address)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(address)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+def ping(address: str) -> bool:
+    """Проверяет, принимает ли сервер подключения по адресу."""
+    try:
+        connect(address, timeout=1).close()
+        return True
+    except OSError:
+        return False
+
+def request(address: str, argv: list, db: str, stdout=None, stderr=None, sock: socket.socket = None, cache: str = None) -> bool:
+    """
+    Выполняет команду на сервере и выводит ее результат.
+
+    Args:
+        address(str): адрес сервера.
+        argv(list): аргументы командной строки.
+        db(str): путь к БД клиента (передается абсолютным; сервер откажется выполнять команду для другой БД).
+        stdout: поток для вывода команды (по умолчанию sys.stdout).
+        stderr: поток для сообщений об ошибках (по умолчанию sys.stderr).
+        sock(socket.socket): открытое соединение (по умолчанию открывается новое).
+        cache(str): режим кэша запросов клиента (сервер откажется выполнять команду при другом режиме).
+
+    Returns:
+        True, если команда выполнена сервером; False, если сервер не запущен или отказался ее выполнять.
+    """
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    try:
+        conn = sock or connect(address)
+    except (OSError, ValueError):
+        return False
+    try:
+        conn.settimeout(None)
+        stream = conn.makefile('rwb')
+        stream.write(encode({'argv': argv, 'db': canonical_db_path(db), 'cwd': os.getcwd(), 'cache': cache}))
+        stream.flush()
+        for line in stream:
+            message = json.loads(line)
+            if 'stream' in message:
+                (stdout if message['stream'] == 'stdout' else stderr).write(message['data'])
+            elif message.get('done'):
+                return True
+            elif 'refused' in message:
+                return False
+        print("Сервер закрыл соединение до завершения команды.", file=stderr)
+        return True
+    except OSError:
+        return False
+    finally:
+        if sock is None:
+            conn.close()
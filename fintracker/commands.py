@@ -1,17 +1,42 @@
+import sys
+import time
 from datetime import datetime, timedelta
-from fintracker.models import Expense, Income
-from fintracker.storage import add_expense, get_transactions, delete_transaction, save_backup
-from fintracker.report import generate_expenses, generate_incomings, gen_sum
+from fintracker.models import Expense, Income, from_minor, to_minor
+from fintracker.storage import add_expense, iter_transactions, delete_transaction, delete_transactions, delete_range, save_backup, bulk_insert, rebuild_rollups, cache_stats, clear_cache, search, set_budget, get_budgets, budget_status, set_rates, get_rates
+from fintracker.importer import read_transactions, read_rates
 
 """
 Модуль commands - обработчик команд для командной строки main.py.
 """
+def _parse_from_to(value: str):
+    """
+    Разбирает диапазон дат из аргумента --from-to.
+
+    Args:
+        value(str): строка вида YYYY-MM-DD,YYYY-MM-DD.
+
+    Returns:
+        (start_date, end_date): начало первого и конец второго дня или None, если формат неверный (ошибка выводится на экран).
+    """
+    try:
+        dates = value.split(',')
+        if len(dates) == 2:
+            start_date = datetime.strptime(dates[0].strip(), '%Y-%m-%d')
+            end_date = datetime.strptime(dates[1].strip(), '%Y-%m-%d')
+            # Устанавливаем конец дня для end_date, чтобы включить весь день
+            end_date = end_date.replace(hour=23, minute=59, second=59, microsecond=999999)
+            return start_date, end_date
+        print("Ошибка формата для --from-to. Используйте YYYY-MM-DD,YYYY-MM-DD.")
+    except ValueError:
+        print("Ошибка формата даты для --from-to. Используйте YYYY-MM-DD.")
+    return None
+
 def add_command(args):
     """
     Обработчик команды add.
 
     Args:
-        args: аргументы, передаваемые через подкоманды "--date" (дата совершения транзакции, по умолчанию - текущий день), "--expense", "--income", "--description", "--sum", "--category" (для расходов), "--source" (для доходов).
+        args: аргументы, передаваемые через подкоманды "--date" (дата совершения транзакции, по умолчанию - текущий день), "--expense", "--income", "--description", "--sum", "--currency" (по умолчанию - базовая валюта), "--category" (для расходов), "--source" (для доходов).
 
     Raises:
         ValueError: Ошибка ввода (указывается причина ошибки).
@@ -23,11 +48,14 @@ def add_command(args):
             transaction_date = datetime.strptime(args.date, '%Y-%m-%d')
 
         if args.expense: # Добавление расхода
-            expense = Expense(description=args.description, amount=args.sum, category=args.category, date=transaction_date)
+            expense = Expense(description=args.description, amount=args.sum, category=args.category, date=transaction_date,
+                              currency=args.currency)
             add_expense(expense)
             print(f"Добавлен расход: {expense}")
+            _warn_budget(expense)
         elif args.income: # Добавление дохода
-            income = Income(description=args.description, amount=args.sum, source=args.source, date=transaction_date)
+            income = Income(description=args.description, amount=args.sum, source=args.source, date=transaction_date,
+                            currency=args.currency)
             add_expense(income)
             print(f"Добавлен доход: {income}")
         else:
@@ -38,12 +66,69 @@ def add_command(args):
     except Exception as e:
         print(f"Произошла ошибка при добавлении транзакции: {e}")
 
+def _warn_budget(expense: Expense):
+    """
+    Выводит предупреждение, если после расхода превышен месячный лимит его категории.
+    Расход к этому моменту уже сохранен, поэтому ошибка пересчета валют выводится как предупреждение о бюджете.
+    """
+    try:
+        status = budget_status(expense.category, expense.date)
+    except ValueError as ve:
+        print(f"Внимание: не удалось проверить бюджет категории {expense.category}: {ve}")
+        return
+    if status is None:
+        return
+    limit, spent = status
+    if spent > limit:
+        print(f"Внимание: превышен лимит категории {expense.category} за {expense.date.strftime('%Y-%m')}: "
+              f"потрачено {from_minor(spent)} из {from_minor(limit)} (перерасход {from_minor(spent - limit)}).")
+
+_VIEW_COLUMNS = ['id', 'type', 'description', 'amount', 'category', 'source', 'date', 'currency']
+
+def _write_transactions(chunks, output_format: str, stream) -> tuple:
+    """
+    Выводит транзакции по мере чтения из БД, не накапливая их в памяти.
+
+    Args:
+        chunks: пачки строк из storage.iter_transactions (суммы в копейках выводятся в рублях).
+        output_format(str): формат вывода - 'table', 'csv' или 'jsonl'.
+        stream: поток вывода.
+
+    Returns:
+        (count, last_row): количество выведенных строк и последняя строка (None, если строк не было).
+    """
+    # csv и json нужны только view, поэтому не загружаются при запуске CLI
+    import csv
+    import json
+    count, last_row = 0, None
+    writer = csv.writer(stream, delimiter=';', lineterminator='\n') if output_format == 'csv' else None
+    for chunk in chunks:
+        if count == 0:
+            if output_format == 'csv':
+                writer.writerow(_VIEW_COLUMNS)
+            elif output_format == 'table':
+                stream.write("\n Ваши Транзакции\n")
+                stream.write(f"{'id':>8}  {'type':<6}  {'description':<30}  {'amount':>12}  {'cur':<3}  {'category':<15}  {'source':<15}  date\n")
+        if output_format == 'csv':
+            writer.writerows(row[:3] + (from_minor(row[3]),) + row[4:] for row in chunk)
+        elif output_format == 'jsonl':
+            stream.writelines(json.dumps(dict(zip(_VIEW_COLUMNS, row[:3] + (float(from_minor(row[3])),) + row[4:])),
+                                         ensure_ascii=False) + '\n' for row in chunk)
+        else:
+            for row_id, kind, description, amount, category, source, date, currency in chunk:
+                stream.write(f"{row_id:>8}  {kind:<6}  {description:<30}  {from_minor(amount):>12}  {currency:<3}  {category or '':<15}  {source or '':<15}  {date}\n")
+        count += len(chunk)
+        last_row = chunk[-1]
+    if count and output_format == 'table':
+        stream.write("-----------------------\n\n")
+    return count, last_row
+
 def view_command(args):
     """
     Обработчик команды view.
 
     Args:
-        args: аргументы, передаваемые через подкоманды "--period" (month - месяц, day - день, year - год), "--since" (указывается дата), "--from-to" (указывается одна или две даты).
+        args: аргументы, передаваемые через подкоманды "--period" (month - месяц, day - день, year - год), "--since" (указывается дата), "--from-to" (указывается одна или две даты), "--limit", "--offset", "--after" (ключ последней строки предыдущей страницы), "--format" (table, csv, jsonl), "--category", "--source" (отбор по категории или источнику).
 
     Raises:
         ValueError: Ошибка ввода (указывается причина ошибки, чаще всего она возникает из-за неверного формата даты).
@@ -69,41 +154,93 @@ def view_command(args):
             print("Ошибка формата даты для --since. Используйте YYYY-MM-DD.")
             return
     elif args.from_to:
+        dates = _parse_from_to(args.from_to)
+        if dates is None:
+            return
+        start_date, end_date = dates
+
+    after = None
+    if args.after:
         try:
-            dates = args.from_to.split(',')
-            if len(dates) == 2:
-                start_date = datetime.strptime(dates[0].strip(), '%Y-%m-%d')
-                end_date = datetime.strptime(dates[1].strip(), '%Y-%m-%d')
-                # Устанавливаем конец дня для end_date, чтобы включить весь день
-                end_date = end_date.replace(hour=23, minute=59, second=59, microsecond=999999)
-            else:
-                print("Ошибка формата для --from-to. Используйте YYYY-MM-DD,YYYY-MM-DD.")
-                return
+            after_date, after_id = args.after.rsplit(',', 1)
+            after = (after_date.strip(), int(after_id))
         except ValueError:
-            print("Ошибка формата даты для --from-to. Используйте YYYY-MM-DD.")
+            print("Ошибка формата для --after. Используйте 'YYYY-MM-DD HH:MM:SS,ID' (см. подсказку в конце предыдущей страницы).")
             return
 
     try:
-        df = get_transactions(start_date, end_date)
-        if df.empty:
+        chunks = iter_transactions(start_date, end_date, limit=args.limit, offset=args.offset, after=after,
+                                   category=args.category, source=args.source)
+        count, last_row = _write_transactions(chunks, args.format, sys.stdout)
+        if count == 0 and args.format == 'table':
             print("Нет транзакций за указанный период.")
-        else:
-            print("\n Ваши Транзакции")
-            print(df)
-            print("-----------------------\n")
+        if args.limit is not None and count == args.limit:
+            print(f"Следующая страница: --after '{last_row[6]},{last_row[0]}'", file=sys.stderr)
     except Exception as e:
         print(f"Произошла ошибка при просмотре транзакций: {e}")
 
+def search_command(args):
+    """
+    Обработчик команды search.
+
+    Args:
+        args: аргументы, передаваемые через подкоманды "text" (слова для поиска в описании), "--from-to" (период), "--limit", "--format" (table, csv, jsonl).
+
+    Raises:
+        ValueError: Ошибка ввода (указывается причина ошибки, например, пустая строка поиска).
+        Exception: Ошибка при поиске транзакций (указывается причина ошибки).
+    """
+    start_date, end_date = None, None
+    if args.from_to:
+        dates = _parse_from_to(args.from_to)
+        if dates is None:
+            return
+        start_date, end_date = dates
+    try:
+        rows = search(args.text, start_date, end_date, args.limit)
+        _write_transactions([rows] if rows else [], args.format, sys.stdout)
+        if not rows and args.format == 'table':
+            print("Транзакции не найдены.")
+    except ValueError as ve:
+        print(f"Ошибка ввода: {ve}")
+    except Exception as e:
+        print(f"Произошла ошибка при поиске транзакций: {e}")
+
+def _print_report(name: str, report_df):
+    """
+    Выводит отчет в консоль.
+
+    Args:
+        name(str): тип отчета - 'categories', 'sources', 'summary' или 'timeseries'.
+        report_df: датафрейм с отчетом (пустой не выводится).
+    """
+    if report_df.empty:
+        return
+    if name == 'summary':
+        print(report_df)
+        return
+    if name == 'timeseries':
+        print("\n--- Отчет по периодам ---")
+        print(report_df.to_string(float_format='{:.2f}'.format, max_rows=60))
+        print("--------------------------------------\n")
+        return
+    print("\n--- Отчет по расходам по категориям ---" if name == 'categories' else "\n--- Отчет по доходам по категориям ---")
+    print(report_df.to_string(index=False))
+    print("--------------------------------------\n")
+
 def report_command(args):
     """
     Обработчик команды report.
 
     Args:
-        args: аргументы, передаваемые через подкоманды "--period" (month - месяц), "--from-to" (указывается одна или две даты), "--report_type" (отчет по доходам/расходам).
+        args: аргументы, передаваемые через подкоманды "--period" (month - месяц), "--from-to" (указывается одна или две даты), "--report_type" (отчет по доходам/расходам, сводный, все сразу - all или по периодам - timeseries), "--freq" (D/W/M для timeseries), "--archive" (каталог колоночного архива вместо БД).
 
     Raises:
-        ValueError: Ошибка ввода (указывается причина ошибки, чаще всего она возникает из-за неверного формата даты).
+        ValueError: Ошибка ввода (указывается причина ошибки: неверный формат даты, частоты или нет курса валюты).
     """
+    # report тянет за собой pandas, поэтому импортируется только при построении отчета
+    from fintracker.report import generate_expenses, generate_incomings, gen_sum, generate_all, generate_timeseries, REPORT_FILES
+
     start_date, end_date = None, None
 
     if args.period == 'month':
@@ -112,67 +249,364 @@ def report_command(args):
         next_month = start_date.replace(month=start_date.month + 1) if start_date.month < 12 else start_date.replace(year=start_date.year + 1, month=1)
         end_date = next_month - timedelta(microseconds=1)
     elif args.from_to:
-        try:
-            dates = args.from_to.split(',')
-            if len(dates) == 2:
-                start_date = datetime.strptime(dates[0].strip(), '%Y-%m-%d')
-                end_date = datetime.strptime(dates[1].strip(), '%Y-%m-%d')
-                end_date = end_date.replace(hour=23, minute=59, second=59, microsecond=999999)
-            else:
-                print("Ошибка формата для --from-to. Используйте YYYY-MM-DD,YYYY-MM-DD.")
-                return
-        except ValueError:
-            print("Ошибка формата даты для --from-to. Используйте YYYY-MM-DD.")
+        dates = _parse_from_to(args.from_to)
+        if dates is None:
             return
+        start_date, end_date = dates
+
+    # При --output - отчет выводится в консоль в виде CSV, таблица не печатается
+    show = _print_report if args.output != '-' else lambda name, report_df: None
 
-    if args.report_type == 'categories':
-        output_file = args.output if args.output else 'expenses_by_category_report.csv'
-        report_df = generate_expenses(start_date, end_date, output_file)
-        if not report_df.empty:
-            print("\n--- Отчет по расходам по категориям ---")
-            print(report_df.to_string(index=False))
-            print("--------------------------------------\n")
-    elif args.report_type == 'sources':
-        output_file = args.output if args.output else 'incomings_by_category_report.csv'
-        report_df = generate_incomings(start_date, end_date, output_file)
-        if not report_df.empty:
-            print("\n--- Отчет по доходам по категориям ---")
-            print(report_df.to_string(index=False))
-            print("--------------------------------------\n")
-    elif args.report_type == 'summary':
-        output_file = args.output if args.output else 'summary_report.csv'
-        report_df = gen_sum(start_date, end_date, output_file)
-        if not report_df.empty:
-            print(report_df)
-    else:
-        print("Неизвестный тип отчета.")
+    # ValueError - неверная частота или нет курса для пересчета суммы в другой валюте
+    try:
+        if args.report_type == 'categories':
+            output_file = args.output if args.output else REPORT_FILES['categories']
+            show('categories', generate_expenses(start_date, end_date, output_file, args.archive))
+        elif args.report_type == 'sources':
+            output_file = args.output if args.output else REPORT_FILES['sources']
+            show('sources', generate_incomings(start_date, end_date, output_file, args.archive))
+        elif args.report_type == 'summary':
+            output_file = args.output if args.output else REPORT_FILES['summary']
+            show('summary', gen_sum(start_date, end_date, output_file, args.archive))
+        elif args.report_type == 'all':
+            if args.output == '-':
+                print("Для отчета all --output - каталог, вывод в консоль не поддерживается.")
+                return
+            reports = generate_all(start_date, end_date, args.output or '.', args.archive)
+            for name, report_df in reports.items():
+                _print_report(name, report_df)
+        elif args.report_type == 'timeseries':
+            if args.archive:
+                print("Отчет по периодам строится только по БД (--archive не поддерживается).")
+                return
+            output_file = args.output if args.output else REPORT_FILES['timeseries']
+            show('timeseries', generate_timeseries(start_date, end_date, args.freq, output_file))
+        else:
+            print("Неизвестный тип отчета.")
+    except ValueError as ve:
+        print(f"Ошибка ввода: {ve}")
 
 def delete_command(args):
     """
     Обработчик команды delete.
 
     Args:
-        args: аргументы, передаваемые через подкоманду "--number".
+        args: аргументы, передаваемые через подкоманды "--number" (один или несколько номеров транзакций из вывода view) или "--from-to" (удаление всех транзакций за период).
 
     Raises:
         Exception: Ошибка при удалении транзакции (указывается причина ошибки, чаще всего возникает из-за того, что номера транзакции нет в базе).
     """
-    if args.number is None:
-        print("Ошибка: Необходимо указать номер транзакции для удаления с помощью --number.")
+    if not args.number and not args.from_to:
+        print("Ошибка: Необходимо указать номер транзакции для удаления с помощью --number или период с помощью --from-to.")
         return
     try:
-        delete_transaction(args.number)
+        if args.from_to:
+            dates = _parse_from_to(args.from_to)
+            if dates is None:
+                return
+            count = delete_range(*dates)
+            print(f"Удалено транзакций за период: {count}.")
+        elif len(args.number) == 1:
+            delete_transaction(args.number[0])
+        else:
+            count = delete_transactions(args.number)
+            print(f"Удалено транзакций: {count} из {len(args.number)}.")
     except Exception as e:
         print(f"Произошла ошибка при удалении транзакции: {e}")
 
-def backup_command():
+def backup_command(args):
     """
     Обработчик команды backup.
 
+    Args:
+        args: аргументы, передаваемые через подкоманды "--mode" (incremental - сегмент с изменениями, snapshot - полный снимок, csv - выгрузка в CSV файл), "--dir" (каталог копий), "--keep" (сколько цепочек хранить), "--max-segments" (длина цепочки до нового снимка).
+
     Raises:
         Exception: Ошибка при создании копии (указывается причина ошибки).
     """
     try:
-        save_backup()
+        if args.mode == 'csv':
+            save_backup()
+            return
+        from fintracker import backup
+        if args.mode == 'snapshot':
+            path = backup.snapshot(args.dir, args.keep)
+            print(f"Снимок БД сохранен в файле {path}")
+        else:
+            path = backup.incremental(args.dir, args.max_segments, args.keep)
+            if path is None:
+                print("Изменений с момента предыдущей копии нет.")
+            else:
+                print(f"Копия сохранена в файле {path}")
+    except Exception as e:
+        print(f"Произошла ошибка при создании копии: {e}")
+
+def restore_command(args):
+    """
+    Обработчик команды restore.
+
+    Args:
+        args: аргументы, передаваемые через подкоманды "--dir" (каталог копий), "--base" (имя снимка, по умолчанию - последний).
+
+    Raises:
+        Exception: Ошибка при восстановлении (указывается причина ошибки, текущая БД при этом не изменяется).
+    """
+    try:
+        from fintracker import backup
+        path = backup.restore(args.dir, args.base)
+        print(f"БД {path} восстановлена из копии.")
+    except Exception as e:
+        print(f"Произошла ошибка при восстановлении из копии: {e}")
+
+def import_command(args):
+    """
+    Обработчик команды import.
+
+    Args:
+        args: аргументы, передаваемые через подкоманды "--file" (путь к CSV или JSONL файлу), "--format" (csv/jsonl, по умолчанию - по расширению), "--batch-size" (размер пачки вставки), "--encoding", "--delimiter" (для CSV).
+
+    Raises:
+        Exception: Ошибка при импорте (указывается причина ошибки, все изменения при этом откатываются).
+    """
+    skipped = 0
+
+    def report_error(line_no, message):
+        nonlocal skipped
+        skipped += 1
+        print(f"Строка {line_no} пропущена: {message}")
+
+    try:
+        start = time.perf_counter()
+        transactions = read_transactions(args.file, args.format, args.encoding, args.delimiter, on_error=report_error)
+        count = bulk_insert(transactions, args.batch_size)
+        elapsed = time.perf_counter() - start
+        print(f"Импортировано транзакций: {count}, пропущено строк: {skipped}, время: {elapsed:.2f} с.")
+    except Exception as e:
+        print(f"Произошла ошибка при импорте транзакций: {e}")
+
+def rebuild_rollups_command(args):
+    """
+    Обработчик команды rebuild-rollups.
+
+    Raises:
+        Exception: Ошибка при пересчете сводных сумм (указывается причина ошибки).
+    """
+    try:
+        rebuild_rollups()
+        print("Сводные суммы по дням и месяцам пересчитаны.")
+    except Exception as e:
+        print(f"Произошла ошибка при пересчете сводных сумм: {e}")
+
+def cache_command(args):
+    """
+    Обработчик команды cache.
+
+    Args:
+        args: аргументы, передаваемые через подкоманду "--clear" (очистить кэш).
+
+    Raises:
+        Exception: Ошибка при работе с кэшем (указывается причина ошибки).
+    """
+    try:
+        if args.clear:
+            clear_cache()
+            print("Кэш запросов очищен.")
+            return
+        stats = cache_stats()
+        print(f"Режим кэша: {stats['mode']}")
+        print(f"Версия данных: {stats['data_version']}")
+        print(f"Записей в БД: {stats['persistent_entries']}, попаданий в них: {stats['persistent_total_hits']}")
+    except Exception as e:
+        print(f"Произошла ошибка при работе с кэшем: {e}")
+
+def budget_command(args):
+    """
+    Обработчик команды budget.
+
+    Args:
+        args: аргументы, передаваемые через подкоманды "set" ("--category", "--limit" - месячный лимит в рублях, 0 - удалить лимит) и "show" ("--month" - месяц YYYY-MM, по умолчанию текущий).
+
+    Raises:
+        ValueError: Ошибка ввода (указывается причина ошибки).
+        Exception: Ошибка при работе с лимитами (указывается причина ошибки).
+    """
+    try:
+        if args.budget_action == 'set':
+            if set_budget(args.category, args.limit):
+                print(f"Лимит категории {args.category}: {from_minor(to_minor(args.limit))} в месяц.")
+            else:
+                print(f"Лимит категории {args.category} удален.")
+            return
+        rows = get_budgets(args.month)
+        if not rows:
+            print("Лимиты не установлены.")
+            return
+        print(f"\n--- Лимиты за {args.month or datetime.now().strftime('%Y-%m')} ---")
+        print(f"{'category':<20}  {'limit':>12}  {'spent':>12}  {'left':>12}")
+        for category, limit, spent in rows:
+            mark = '  превышен' if spent > limit else ''
+            print(f"{category:<20}  {from_minor(limit):>12}  {from_minor(spent):>12}  {from_minor(limit - spent):>12}{mark}")
+        print("--------------------------------------\n")
+    except ValueError as ve:
+        print(f"Ошибка ввода: {ve}")
+    except Exception as e:
+        print(f"Произошла ошибка при работе с лимитами: {e}")
+
+def _parse_day(value: str, name: str) -> datetime:
+    """Разбирает дату YYYY-MM-DD аргумента name (None остается None)."""
+    if value is None:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f"Неверный формат даты {name}: {value}. Используйте YYYY-MM-DD.")
+
+def recurring_command(args):
+    """
+    Обработчик команды recurring.
+
+    Args:
+        args: аргументы, передаваемые через подкоманды "add" ("--description", "--sum", "--currency", "--expense"/"--income", "--category" (для расходов), "--source" (для доходов), "--freq", "--every", "--day", "--start", "--end"), "list" и "delete" ("id" - номер правила).
+
+    Raises:
+        ValueError: Ошибка ввода (указывается причина ошибки).
+        Exception: Ошибка при работе с правилами (указывается причина ошибки).
+    """
+    try:
+        from fintracker.recurring import RecurringRule, add_rule, get_rules, delete_rule
+        if args.recurring_action == 'add':
+            if args.expense:
+                template = Expense(description=args.description, amount=args.sum, category=args.category, currency=args.currency)
+            else:
+                template = Income(description=args.description, amount=args.sum, source=args.source, currency=args.currency)
+            rule = RecurringRule(template, args.freq, _parse_day(args.start, '--start'), args.every, args.day,
+                                 _parse_day(args.end, '--end'))
+            print(f"Добавлено правило {add_rule(rule)}: {template.description}, {args.freq}, с {rule.start.strftime('%Y-%m-%d')}.")
+        elif args.recurring_action == 'delete':
+            if delete_rule(args.id):
+                print(f"Правило {args.id} удалено.")
+            else:
+                print(f"Правило {args.id} не найдено.")
+        else:
+            rules = get_rules()
+            if not rules:
+                print("Правила не заданы.")
+                return
+            print(f"{'id':>4}  {'type':<6}  {'description':<20}  {'amount':>12}  {'cur':<3}  {'category/source':<16}  {'schedule':<20}  {'start':<10}  {'end':<10}  {'last':<10}")
+            for rule in rules:
+                template = rule.transaction
+                kind, name = ('Расход', template.category) if isinstance(template, Expense) else ('Доход', template.source)
+                schedule = f"{rule.freq}/{rule.every}" + (f", {rule.day} число" if rule.freq == 'monthly' else '')
+                end = rule.end.strftime('%Y-%m-%d') if rule.end else '-'
+                last = rule.last.strftime('%Y-%m-%d') if rule.last else '-'
+                print(f"{rule.id:>4}  {kind:<6}  {template.description:<20}  {template.amount:>12.2f}  {template.currency:<3}  {name or '':<16}  "
+                      f"{schedule:<20}  {rule.start.strftime('%Y-%m-%d'):<10}  {end:<10}  {last:<10}")
+    except ValueError as ve:
+        print(f"Ошибка ввода: {ve}")
+    except Exception as e:
+        print(f"Произошла ошибка при работе с правилами: {e}")
+
+def materialize_command(args):
+    """
+    Обработчик команды materialize.
+
+    Args:
+        args: аргументы, передаваемые через подкоманды "--until" (последняя дата, по умолчанию - сегодня) и "--project" (только рассчитать будущий баланс, ничего не записывая).
+
+    Raises:
+        ValueError: Ошибка ввода (указывается причина ошибки).
+        Exception: Ошибка при создании транзакций (указывается причина ошибки).
+    """
+    try:
+        from fintracker.recurring import materialize, project
+        until = _parse_day(args.until, '--until') or datetime.now()
+        if not args.project:
+            print(f"Создано транзакций по правилам: {materialize(until)} (по {until.strftime('%Y-%m-%d')}).")
+            return
+        opening, rows = project(until)
+        print(f"\n--- Прогноз баланса по {until.strftime('%Y-%m-%d')} ---")
+        print(f"Текущий баланс: {from_minor(opening)}")
+        print(f"{'date':<10}  {'description':<20}  {'amount':>12}  {'balance':>12}")
+        for date, description, amount, balance in rows:
+            print(f"{date.strftime('%Y-%m-%d'):<10}  {description:<20}  {from_minor(amount):>12}  {from_minor(balance):>12}")
+        print(f"Баланс на {until.strftime('%Y-%m-%d')}: {from_minor(rows[-1][3] if rows else opening)}")
+        print("--------------------------------------\n")
+    except ValueError as ve:
+        print(f"Ошибка ввода: {ve}")
+    except Exception as e:
+        print(f"Произошла ошибка при создании транзакций по правилам: {e}")
+
+def rates_command(args):
+    """
+    Обработчик команды rates.
+
+    Args:
+        args: аргументы, передаваемые через подкоманды "load" ("file" - CSV или JSONL файл с колонками currency, date, rate, "--format", "--encoding", "--delimiter") и "show" ("--currency").
+
+    Raises:
+        ValueError: Ошибка ввода (указывается причина ошибки).
+        Exception: Ошибка при работе с курсами (указывается причина ошибки, при загрузке все изменения откатываются).
+    """
+    try:
+        if args.rates_action == 'load':
+            skipped = 0
+
+            def report_error(line_no, message):
+                nonlocal skipped
+                skipped += 1
+                print(f"Строка {line_no} пропущена: {message}")
+
+            count = set_rates(read_rates(args.file, args.format, args.encoding, args.delimiter, on_error=report_error))
+            print(f"Загружено курсов: {count}, пропущено строк: {skipped}.")
+            return
+        rows = get_rates(args.currency)
+        if not rows:
+            print("Курсы не загружены.")
+            return
+        print(f"{'currency':<8}  {'date':<10}  {'rate':>14}")
+        for currency, date, rate in rows:
+            print(f"{currency:<8}  {date:<10}  {rate:>14.6g}")
+    except ValueError as ve:
+        print(f"Ошибка ввода: {ve}")
+    except Exception as e:
+        print(f"Произошла ошибка при работе с курсами: {e}")
+
+def export_command(args):
+    """
+    Обработчик команды export.
+
+    Args:
+        args: аргументы, передаваемые через подкоманды "--dir" (каталог архива), "--format" (parquet/arrow), "--from-to" (период, расширяется до целых месяцев), "--row-group-size".
+
+    Raises:
+        Exception: Ошибка при выгрузке (указывается причина ошибки, например, не установлен pyarrow).
+    """
+    start_date, end_date = None, None
+    if args.from_to:
+        dates = _parse_from_to(args.from_to)
+        if dates is None:
+            return
+        start_date, end_date = dates
+    try:
+        from fintracker.archive import export
+        count = export(args.dir, args.format, start_date, end_date, args.row_group_size)
+        print(f"Выгружено транзакций: {count} в каталог {args.dir} ({args.format}).")
+    except Exception as e:
+        print(f"Произошла ошибка при выгрузке транзакций: {e}")
+
+def serve_command(args):
+    """
+    Обработчик команды serve.
+
+    Args:
+        args: аргументы, передаваемые через глобальный флаг "--server" (адрес сервера).
+
+    Raises:
+        Exception: Ошибка при запуске сервера (указывается причина ошибки, например, сервер уже запущен).
+    """
+    try:
+        from fintracker.config import resolve_server_address
+        from fintracker.server import serve
+        serve(args.parser, resolve_server_address(args.server))
     except Exception as e:
-        print(f"Произошла ошибка при создании копии: {e}")
\ No newline at end of file
+        print(f"Произошла ошибка при запуске сервера: {e}")
@@ -0,0 +1,186 @@
+import os
+
+"""
+Модуль config - определяет расположение БД и резервной копии, режим кэша запросов и адрес сервера (команда serve).
+Порядок приоритета: флаг --db, переменные окружения, файл настроек, значения по умолчанию.
+"""
+
+MEMORY = ':memory:'
+TMPFS = 'tmpfs'
+
+ENV_DB = 'FINTR_DB'
+ENV_BACKUP = 'FINTR_BACKUP'
+ENV_BACKUP_DIR = 'FINTR_BACKUP_DIR'
+ENV_CONFIG = 'FINTR_CONFIG'
+ENV_CACHE = 'FINTR_CACHE'
+ENV_SERVER = 'FINTR_SERVER'
+
+CACHE_MODES = ('off', 'memory', 'persist')
+
+CONFIG_SECTION = 'fintr'
+DEFAULT_DIR = os.path.join(os.path.expanduser('~'), 'fintr')
+
+def config_files() -> list:
+    """
+    Возвращает пути к файлам настроек в порядке возрастания приоритета.
+
+    Returns:
+        список путей: ~/.config/fintr/config.ini, ./fintr.ini и файл из переменной FINTR_CONFIG.
+    """
+    files = [os.path.join(os.path.expanduser('~'), '.config', 'fintr', 'config.ini'), 'fintr.ini']
+    if os.environ.get(ENV_CONFIG):
+        files.append(os.environ[ENV_CONFIG])
+    return files
+
+def read_config() -> dict:
+    """
+    Читает секцию [fintr] из файлов настроек. Отсутствующие файлы пропускаются.
+
+    Returns:
+        словарь настроек (ключи db, backup, backup_dir, cache, server).
+
+    Raises:
+        ValueError: Если файл настроек поврежден.
+    """
+    import configparser  # не загружается при запуске CLI с настройками только из флагов и переменных окружения
+    parser = configparser.ConfigParser()
+    try:
+        parser.read(config_files(), encoding='utf-8')
+    except (configparser.Error, UnicodeDecodeError) as e:
+        raise ValueError(f"Ошибка в файле настроек: {e}")
+    if not parser.has_section(CONFIG_SECTION):
+        return {}
+    return dict(parser.items(CONFIG_SECTION))
+
+def tmpfs_dir() -> str:
+    """
+    Возвращает каталог в оперативной памяти (/dev/shm), а если его нет - системный временный каталог.
+
+    Returns:
+        путь к каталогу fintr внутри tmpfs.
+    """
+    import tempfile
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(base, 'fintr')
+
+def expand_db_path(value: str) -> str:
+    """
+    Раскрывает специальные значения пути к БД.
+
+    Args:
+        value(str): путь к файлу, ':memory:' (БД в памяти процесса), 'tmpfs' или 'tmpfs:имя.db' (файл в tmpfs).
+
+    Returns:
+        путь, пригодный для sqlite3.connect.
+    """
+    if value == MEMORY:
+        return MEMORY
+    if value == TMPFS or value.startswith(TMPFS + ':'):
+        name = value[len(TMPFS) + 1:] or 'fintr.db'
+        return os.path.join(tmpfs_dir(), name)
+    return os.path.expanduser(value)
+
+def canonical_db_path(path: str, cwd: str = None) -> str:
+    """
+    Приводит путь к БД к виду, по которому клиент и сервер сравнивают свои БД.
+
+    Args:
+        path(str): путь к БД (уже раскрытый expand_db_path).
+        cwd(str): каталог, относительно которого задан путь (по умолчанию - текущий).
+
+    Returns:
+        абсолютный путь без символических ссылок; ':memory:' не меняется.
+    """
+    if path == MEMORY:
+        return MEMORY
+    return os.path.realpath(os.path.join(cwd or os.getcwd(), path))
+
+def resolve_db_path(cli_value: str = None) -> str:
+    """
+    Определяет путь к БД.
+
+    Args:
+        cli_value(str): значение флага --db.
+
+    Returns:
+        путь к БД: из флага, переменной FINTR_DB, ключа db файла настроек или ~/fintr/fintr.db.
+    """
+    value = cli_value or os.environ.get(ENV_DB) or read_config().get('db') or os.path.join(DEFAULT_DIR, 'fintr.db')
+    return expand_db_path(value)
+
+def resolve_backup_path(cli_value: str = None) -> str:
+    """
+    Определяет путь к файлу резервной копии.
+
+    Args:
+        cli_value(str): значение из командной строки.
+
+    Returns:
+        путь к копии: из аргумента, переменной FINTR_BACKUP, ключа backup файла настроек или ~/fintr/transactions_backup.csv.
+    """
+    value = cli_value or os.environ.get(ENV_BACKUP) or read_config().get('backup') or os.path.join(DEFAULT_DIR, 'transactions_backup.csv')
+    return os.path.expanduser(value)
+
+def resolve_backup_dir(cli_value: str = None) -> str:
+    """
+    Определяет каталог снимков и инкрементальных сегментов резервного копирования.
+
+    Args:
+        cli_value(str): значение из командной строки.
+
+    Returns:
+        путь к каталогу: из аргумента, переменной FINTR_BACKUP_DIR, ключа backup_dir файла настроек или ~/fintr/backups.
+    """
+    value = cli_value or os.environ.get(ENV_BACKUP_DIR) or read_config().get('backup_dir') or os.path.join(DEFAULT_DIR, 'backups')
+    return os.path.expanduser(value)
+
+def resolve_cache_mode(cli_value: str = None) -> str:
+    """
+    Определяет режим кэша результатов запросов (см. fintracker.cache).
+
+    Args:
+        cli_value(str): значение из командной строки.
+
+    Returns:
+        'off' (без кэша), 'memory' (в памяти процесса) или 'persist' (еще и в таблице query_cache БД):
+        из аргумента, переменной FINTR_CACHE, ключа cache файла настроек или 'memory'.
+
+    Raises:
+        ValueError: Если режим неизвестен.
+    """
+    value = cli_value or os.environ.get(ENV_CACHE) or read_config().get('cache') or 'memory'
+    if value not in CACHE_MODES:
+        raise ValueError(f"Неизвестный режим кэша: {value!r}. Допустимые значения: off, memory, persist.")
+    return value
+
+def resolve_server_address(cli_value: str = None) -> str:
+    """
+    Определяет адрес сервера команды serve.
+
+    Args:
+        cli_value(str): значение из командной строки.
+
+    Returns:
+        путь к Unix-сокету или 'tcp://127.0.0.1:порт': из аргумента, переменной FINTR_SERVER, ключа server файла настроек
+        или ~/fintr/fintr.sock.
+    """
+    value = cli_value or os.environ.get(ENV_SERVER) or read_config().get('server') or os.path.join(DEFAULT_DIR, 'fintr.sock')
+    return value if value.startswith('tcp://') else os.path.expanduser(value)
+
+def parse_tcp_address(address: str) -> tuple:
+    """
+    Разбирает адрес вида 'tcp://хост:порт'.
+
+    Args:
+        address(str): адрес сервера.
+
+    Returns:
+        (host, port) или None, если адрес - путь к Unix-сокету.
+
+    Raises:
+        ValueError: Если порт указан неверно.
+    """
+    if not address.startswith('tcp://'):
+        return None
+    host, _, port = address[len('tcp://'):].rpartition(':')
+    return host or '127.0.0.1', int(port)
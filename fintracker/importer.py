@@ -0,0 +1,180 @@
+import os
+from datetime import datetime
+from fintracker.models import Expense, Income, parse_amount, normalize_currency, BASE_CURRENCY
+
+"""
+Модуль importer - потоковое чтение транзакций и курсов валют из CSV и JSONL файлов.
+"""
+
+EXPENSE_TYPES = ('Расход', 'expense')
+INCOME_TYPES = ('Доход', 'income')
+
+def detect_format(path: str) -> str:
+    """
+    Определяет формат файла по расширению.
+
+    Args:
+        path(str): путь к файлу.
+
+    Returns:
+        'jsonl' для файлов .jsonl/.ndjson, иначе 'csv'.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    return 'jsonl' if ext in ('.jsonl', '.ndjson') else 'csv'
+
+def parse_date(value) -> datetime:
+    """
+    Разбирает дату транзакции (YYYY-MM-DD или YYYY-MM-DD HH:MM:SS[.ffffff]).
+
+    Args:
+        value(str): строка с датой.
+
+    Returns:
+        дата или None, если значение пустое.
+
+    Raises:
+        ValueError: Если формат даты неверный.
+    """
+    if not value:
+        return None
+    return datetime.fromisoformat(str(value).strip())
+
+def make_transaction(record: dict):
+    """
+    Создает Expense или Income из словаря с полями type, description, amount, category, source, date
+    и необязательным currency (по умолчанию - базовая валюта).
+    Проверка значений выполняется конструкторами моделей.
+
+    Args:
+        record(dict): строка файла.
+
+    Returns:
+        transaction: Expense или Income.
+
+    Raises:
+        ValueError: Если тип транзакции неизвестен или значения не прошли проверку.
+    """
+    kind = (record.get('type') or '').strip()
+    amount = record.get('amount')
+    if isinstance(amount, str):
+        amount = parse_amount(amount)
+    date = parse_date(record.get('date'))
+    currency = record.get('currency')
+    if kind in EXPENSE_TYPES:
+        return Expense(description=record.get('description'), amount=amount, category=record.get('category'), date=date,
+                       currency=currency)
+    if kind in INCOME_TYPES:
+        return Income(description=record.get('description'), amount=amount, source=record.get('source'), date=date,
+                      currency=currency)
+    raise ValueError(f"Неизвестный тип транзакции: {kind!r}")
+
+def _read_records(path: str, file_format: str, encoding: str, delimiter: str):
+    """
+    Построчно читает записи из файла.
+
+    Yields:
+        (line_no, record): номер строки и словарь с полями, либо (line_no, ValueError) для нечитаемой строки.
+    """
+    # Модуль импортируется командами CLI при запуске, а csv и json нужны только при чтении файла
+    import csv
+    import json
+    with open(path, encoding=encoding, newline='') as f:
+        if file_format == 'jsonl':
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_no, ValueError(f"некорректный JSON: {e}")
+                    continue
+                if not isinstance(record, dict):
+                    yield line_no, ValueError("строка должна быть JSON-объектом")
+                    continue
+                yield line_no, record
+        else:
+            reader = csv.DictReader(f, delimiter=delimiter)
+            for record in reader:
+                yield reader.line_num, record
+
+def read_transactions(path: str, file_format: str = None, encoding: str = 'cp1251', delimiter: str = ';', on_error=None):
+    """
+    Потоково читает транзакции из CSV или JSONL файла, не загружая его целиком в память.
+    Строки с ошибками пропускаются и передаются в on_error.
+
+    Args:
+        path(str): путь к файлу.
+        file_format(str): 'csv' или 'jsonl' (по умолчанию - по расширению файла).
+        encoding(str): кодировка файла.
+        delimiter(str): разделитель колонок CSV.
+        on_error: функция on_error(номер строки, текст ошибки), вызываемая для каждой пропущенной строки.
+
+    Yields:
+        transaction: Expense или Income.
+    """
+    file_format = file_format or detect_format(path)
+    for line_no, record in _read_records(path, file_format, encoding, delimiter):
+        try:
+            if isinstance(record, ValueError):
+                raise record
+            transaction = make_transaction(record)
+        except (ValueError, TypeError) as e:
+            if on_error is not None:
+                on_error(line_no, str(e))
+            continue
+        yield transaction
+
+def make_rate(record: dict) -> tuple:
+    """
+    Создает курс валюты из словаря с полями currency, date (YYYY-MM-DD) и rate (сколько единиц базовой валюты
+    стоит единица валюты; допускается запятая в качестве разделителя).
+
+    Args:
+        record(dict): строка файла.
+
+    Returns:
+        (currency, date, rate): код валюты, дата и курс (Decimal).
+
+    Raises:
+        ValueError: Если значения не прошли проверку (в том числе курс базовой валюты).
+    """
+    rate = record.get('rate')
+    rate = parse_amount(rate) if isinstance(rate, str) else rate
+    if rate is None or isinstance(rate, bool) or not rate > 0:
+        raise ValueError(f"Курс должен быть положительным числом: {record.get('rate')!r}")
+    date = parse_date(record.get('date'))
+    if date is None:
+        raise ValueError("Не указана дата курса.")
+    if not record.get('currency'):
+        raise ValueError("Не указан код валюты.")
+    currency = normalize_currency(record.get('currency'))
+    if currency == BASE_CURRENCY:
+        raise ValueError(f"Курс базовой валюты {BASE_CURRENCY} не задается.")
+    return currency, date, rate
+
+def read_rates(path: str, file_format: str = None, encoding: str = 'cp1251', delimiter: str = ';', on_error=None):
+    """
+    Потоково читает курсы валют из CSV или JSONL файла с полями currency, date, rate.
+    Строки с ошибками пропускаются и передаются в on_error.
+
+    Args:
+        path(str): путь к файлу.
+        file_format(str): 'csv' или 'jsonl' (по умолчанию - по расширению файла).
+        encoding(str): кодировка файла.
+        delimiter(str): разделитель колонок CSV.
+        on_error: функция on_error(номер строки, текст ошибки), вызываемая для каждой пропущенной строки.
+
+    Yields:
+        (currency, date, rate): см. make_rate.
+    """
+    file_format = file_format or detect_format(path)
+    for line_no, record in _read_records(path, file_format, encoding, delimiter):
+        try:
+            if isinstance(record, ValueError):
+                raise record
+            rate = make_rate(record)
+        except (ValueError, TypeError) as e:
+            if on_error is not None:
+                on_error(line_no, str(e))
+            continue
+        yield rate
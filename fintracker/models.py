@@ -1,73 +1,402 @@
 from datetime import datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 
 """
 Модуль models - определяет классы Transaction, Expense, Income и их аргументы.
 """
+MINOR_UNITS = 100  # копеек в рубле (и центов в единице других валют: суммы всех валют хранятся в сотых долях)
+BASE_CURRENCY = 'RUB'  # базовая валюта: в ней ведутся отчеты, транзакции без указания валюты - в ней
+
+def normalize_currency(currency: str = None) -> str:
+    """
+    Приводит код валюты к виду ISO 4217 (три латинские буквы в верхнем регистре).
+
+    Args:
+        currency(str): код валюты (None или пустая строка - базовая валюта).
+
+    Returns:
+        код валюты.
+
+    Raises:
+        ValueError: Если код валюты не состоит из трех латинских букв.
+    """
+    if currency is None or currency == '':
+        return BASE_CURRENCY
+    code = str(currency).strip().upper()
+    if len(code) != 3 or not ('A' <= code[0] <= 'Z' and 'A' <= code[1] <= 'Z' and 'A' <= code[2] <= 'Z'):
+        raise ValueError(f"Код валюты должен состоять из трех латинских букв (ISO 4217): {currency!r}")
+    return code
+
+def to_minor(amount) -> int:
+    """
+    Переводит сумму в рублях в целое число копеек без потери точности (округление до копейки - половина вверх).
+
+    Args:
+        amount(int | float | Decimal | str): сумма в рублях.
+
+    Returns:
+        сумма в копейках.
+
+    Raises:
+        ValueError: Если значение не является числом.
+    """
+    if isinstance(amount, bool):
+        raise ValueError("Сумма должна быть числом.")
+    try:
+        value = amount if isinstance(amount, Decimal) else Decimal(str(amount))
+        return int((value * MINOR_UNITS).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    except (InvalidOperation, ValueError) as e:
+        raise ValueError("Сумма должна быть числом.") from e
+
+def parse_amount(value: str) -> Decimal:
+    """
+    Разбирает сумму в рублях из строки без перевода в float (допускается запятая в качестве разделителя).
+
+    Args:
+        value(str): строка с суммой.
+
+    Returns:
+        сумма в рублях.
+
+    Raises:
+        ValueError: Если строка не является числом.
+    """
+    try:
+        amount = Decimal(str(value).strip().replace(',', '.'))
+    except InvalidOperation as e:
+        raise ValueError(f"Некорректная сумма: {value!r}") from e
+    if not amount.is_finite():
+        raise ValueError(f"Некорректная сумма: {value!r}")
+    return amount
+
+def from_minor(amount_minor: int) -> Decimal:
+    """
+    Переводит сумму в копейках в рубли.
+
+    Args:
+        amount_minor(int): сумма в копейках.
+
+    Returns:
+        сумма в рублях (Decimal с двумя знаками после запятой).
+    """
+    return Decimal(int(amount_minor)).scaleb(-2)
+
 class Transaction:
-    """Базовый класс для транзакций (доход/расход)."""
-    def __init__(self, description: str, amount: float, date: datetime = None):
+    """Базовый класс для транзакций (доход/расход). Сумма хранится в целых копейках (сотых долях валюты транзакции)."""
+    __slots__ = ('description', 'amount_minor', 'date', 'currency')
+
+    def __init__(self, description: str, amount, date: datetime = None, currency: str = None):
         """Инициализирует новый объект Transaction.
 
         Args:
             description(str): Описание транзакции.
-            amount(float): Сумма транзакции.
+            amount(int | float | Decimal): Сумма транзакции в рублях (в валюте транзакции).
             date(datetime): Дата соверешения транзакции.
+            currency(str): Код валюты (по умолчанию - BASE_CURRENCY).
 
         Raises:
-            ValueError: Если ввести пустую строку или отрицательное число.
+            ValueError: Если ввести пустую строку, отрицательное число или неверный код валюты.
         """
         if not isinstance(description, str) or not description:
             raise ValueError("Описание должно быть непустой строкой.")
-        if not isinstance(amount, (int, float)) or amount <= 0:
+        if not isinstance(amount, (int, float, Decimal)) or isinstance(amount, bool) or to_minor(amount) <= 0:
             raise ValueError("Сумма должна быть положительным числом.")
 
         self.description = description
-        self.amount = amount
+        self.amount_minor = to_minor(amount)
         self.date = date if date else datetime.now()
+        self.currency = normalize_currency(currency)
+
+    @property
+    def amount(self) -> Decimal:
+        """Сумма транзакции в рублях (в валюте транзакции)."""
+        return from_minor(self.amount_minor)
+
+    def _amount_text(self) -> str:
+        """Сумма для вывода: код валюты указывается, только если она не базовая."""
+        return f"{self.amount:.2f}" if self.currency == BASE_CURRENCY else f"{self.amount:.2f} {self.currency}"
 
     def __repr__(self):
-        return f"<{self.__class__.__name__}: {self.description}, {self.amount:.2f}, {self.date.strftime('%Y-%m-%d %H:%M:%S')}>"
+        return f"<{self.__class__.__name__}: {self.description}, {self._amount_text()}, {self.date.strftime('%Y-%m-%d %H:%M:%S')}>"
 
 class Expense(Transaction):
     """Представляет собой расход. Наследован от базового класса Transaction"""
-    def __init__(self, description: str, amount: float, category: str, date: datetime = None):
+    __slots__ = ('category',)
+
+    def __init__(self, description: str, amount, category: str, date: datetime = None, currency: str = None):
         """Инициализирует новый объект Expense.
 
         Args:
             description(str): Описание транзакции.
-            amount(float): Сумма транзакции.
+            amount(int | float | Decimal): Сумма транзакции в рублях (в валюте транзакции).
             date(datetime): Дата соверешения транзакции.
             category(str): Категория расхода.
+            currency(str): Код валюты (по умолчанию - BASE_CURRENCY).
 
         Raises:
             ValueError: Если ввести пустую строку.
         """
-        super().__init__(description, amount, date)
+        super().__init__(description, amount, date, currency)
         if not isinstance(category, str) or not category:
             raise ValueError("Категория должна быть непустой строкой.")
         self.category = category
 
     def __repr__(self):
-        return f"<Expense: {self.description}, {self.amount:.2f}, Category: {self.category}, Date: {self.date.strftime('%Y-%m-%d')}>"
+        return f"<Expense: {self.description}, {self._amount_text()}, Category: {self.category}, Date: {self.date.strftime('%Y-%m-%d')}>"
 
 class Income(Transaction):
     """Представляет собой доход. Наследован от базового класса Transaction"""
-    def __init__(self, description: str, amount: float, source: str, date: datetime = None):
+    __slots__ = ('source',)
+
+    def __init__(self, description: str, amount, source: str, date: datetime = None, currency: str = None):
         """Инициализирует новый объект Expense.
 
         Args:
             description(str): Описание транзакции.
-            amount(float): Сумма транзакции.
+            amount(int | float | Decimal): Сумма транзакции в рублях (в валюте транзакции).
             date(datetime): Дата соверешения транзакции.
             source(str): Источник дохода.
+            currency(str): Код валюты (по умолчанию - BASE_CURRENCY).
 
         Raises:
             ValueError: Если ввести пустую строку.
         """
-        super().__init__(description, amount, date)
+        super().__init__(description, amount, date, currency)
         if not isinstance(source, str) or not source:
             raise ValueError("Источник должно быть непустой строкой.")
         self.source = source
 
     def __repr__(self):
-        return f"<Income: {self.description}, {self.amount:.2f}, Source: {self.source}, Date: {self.date.strftime('%Y-%m-%d')}>"
+        return f"<Income: {self.description}, {self._amount_text()}, Source: {self.source}, Date: {self.date.strftime('%Y-%m-%d')}>"
+
+EXPENSE = 0
+INCOME = 1
+
+class TransactionBatch:
+    """
+    Колоночный контейнер для пачки транзакций: вместо объекта на каждую транзакцию хранит массивы numpy.
+    Суммы - int64 в копейках, даты - int64 (микросекунды от 1970-01-01), категории и источники - коды int32
+    в общем словаре labels (-1 - нет значения), описания - список строк. Валюты - коды int32 в том же словаре
+    (-1 - базовая валюта). numpy импортируется при создании пачки.
+    """
+    __slots__ = ('kinds', 'descriptions', 'amounts', 'dates', 'category_codes', 'source_codes', 'labels', 'currency_codes')
+
+    def __init__(self, kinds, descriptions: list, amounts, dates, category_codes, source_codes, labels: list, validate: bool = True,
+                 currency_codes=None):
+        """Инициализирует новый объект TransactionBatch из готовых колонок.
+
+        Args:
+            kinds: массив типов (EXPENSE или INCOME).
+            descriptions(list): описания транзакций.
+            amounts: массив сумм в копейках.
+            dates: массив дат в микросекундах от 1970-01-01.
+            category_codes: коды категорий в labels (-1 для доходов).
+            source_codes: коды источников в labels (-1 для расходов).
+            labels(list): словарь категорий, источников и валют.
+            validate(bool): проверить пачку (см. validate).
+            currency_codes: коды валют в labels (-1 - базовая валюта; по умолчанию - все транзакции в базовой валюте).
+
+        Raises:
+            ValueError: Если колонки разной длины или пачка не прошла проверку.
+        """
+        import numpy as np
+
+        self.kinds = np.asarray(kinds, dtype=np.int8)
+        self.descriptions = list(descriptions)
+        self.amounts = np.asarray(amounts, dtype=np.int64)
+        self.dates = np.asarray(dates, dtype=np.int64)
+        self.category_codes = np.asarray(category_codes, dtype=np.int32)
+        self.source_codes = np.asarray(source_codes, dtype=np.int32)
+        self.labels = list(labels)
+        if currency_codes is None:
+            self.currency_codes = np.full(len(self.kinds), -1, dtype=np.int32)
+        else:
+            self.currency_codes = np.asarray(currency_codes, dtype=np.int32)
+        lengths = {len(self.kinds), len(self.descriptions), len(self.amounts), len(self.dates),
+                   len(self.category_codes), len(self.source_codes), len(self.currency_codes)}
+        if len(lengths) > 1:
+            raise ValueError("Колонки пачки транзакций должны быть одной длины.")
+        if validate:
+            self.validate()
+
+    @classmethod
+    def from_columns(cls, kinds, descriptions, amounts, dates, categories, sources, minor_units: bool = False,
+                     currencies=None) -> 'TransactionBatch':
+        """
+        Создает пачку из колонок с обычными значениями, кодируя категории и источники.
+
+        Args:
+            kinds: типы (EXPENSE/INCOME).
+            descriptions: описания.
+            amounts: суммы в рублях (или в копейках, если minor_units).
+            dates: даты (datetime, строки YYYY-MM-DD[ HH:MM:SS[.ffffff]] или numpy.datetime64).
+            categories: категории (None для доходов).
+            sources: источники (None для расходов).
+            minor_units(bool): суммы уже заданы в копейках.
+            currencies: коды валют (None или базовая валюта - базовая; по умолчанию - все в базовой валюте).
+
+        Returns:
+            batch: проверенная пачка транзакций.
+
+        Raises:
+            ValueError: Если пачка не прошла проверку или код валюты неверный.
+        """
+        import numpy as np
+
+        codes = {}
+        labels = []
+
+        def encode(values):
+            result = []
+            for value in values:
+                if value is None or value == '':
+                    result.append(-1)
+                    continue
+                code = codes.get(value)
+                if code is None:
+                    code = codes[value] = len(labels)
+                    labels.append(value)
+                result.append(code)
+            return result
+
+        dates = np.asarray(dates, dtype='datetime64[us]').astype(np.int64)
+        if not minor_units:
+            amounts = np.asarray(amounts, dtype=np.float64)
+            if not np.isfinite(amounts).all():
+                raise ValueError("Суммы должны быть конечными числами.")
+            scaled = amounts * MINOR_UNITS
+            # Округление половины вверх, как в to_minor. Произведение float может лечь по другую сторону половины
+            # копейки (2.675 * 100 = 267.4999...), поэтому суммы рядом с половиной и слишком большие для точного
+            # float переводятся через to_minor
+            rounded = np.floor(np.abs(scaled) + 0.5) * np.sign(scaled)
+            near_half = (np.abs(np.abs(scaled) % 1 - 0.5) < 1e-3) | (np.abs(scaled) >= 2 ** 42)
+            for i in np.flatnonzero(near_half):
+                rounded[i] = to_minor(float(amounts[i]))
+            amounts = rounded
+        currency_codes = None
+        if currencies is not None:
+            # Базовая валюта не попадает в словарь: ее код -1, как у пачки без валют
+            currency_codes = encode([None if code == BASE_CURRENCY else code for code in map(normalize_currency, currencies)])
+        return cls(kinds, descriptions, amounts, dates, encode(categories), encode(sources), labels, currency_codes=currency_codes)
+
+    @classmethod
+    def from_transactions(cls, transactions) -> 'TransactionBatch':
+        """
+        Создает пачку из объектов Expense/Income.
+
+        Args:
+            transactions: итерируемый объект с Expense/Income.
+
+        Returns:
+            batch: пачка транзакций.
+
+        Raises:
+            ValueError: Если встретилась транзакция неподдерживаемого типа.
+        """
+        kinds, descriptions, amounts, dates, categories, sources, currencies = [], [], [], [], [], [], []
+        for transaction in transactions:
+            if isinstance(transaction, Expense):
+                kinds.append(EXPENSE)
+                categories.append(transaction.category)
+                sources.append(None)
+            elif isinstance(transaction, Income):
+                kinds.append(INCOME)
+                categories.append(None)
+                sources.append(transaction.source)
+            else:
+                raise ValueError("Неподдерживаемый тип транзакции.")
+            descriptions.append(transaction.description)
+            amounts.append(transaction.amount_minor)
+            dates.append(transaction.date)
+            currencies.append(transaction.currency)
+        return cls.from_columns(kinds, descriptions, amounts, dates, categories, sources, minor_units=True, currencies=currencies)
+
+    def invalid_rows(self):
+        """
+        Проверяет всю пачку одним векторным проходом.
+
+        Returns:
+            массив номеров строк, не прошедших проверку (пустое описание, неположительная сумма,
+            неизвестный тип, нет категории у расхода или источника у дохода).
+        """
+        import numpy as np
+
+        invalid = self.amounts <= 0
+        invalid |= (self.kinds != EXPENSE) & (self.kinds != INCOME)
+        invalid |= (self.kinds == EXPENSE) & (self.category_codes < 0)
+        invalid |= (self.kinds == INCOME) & (self.source_codes < 0)
+        invalid |= np.fromiter((not isinstance(d, str) or not d for d in self.descriptions), dtype=bool, count=len(self))
+        return np.flatnonzero(invalid)
+
+    def validate(self):
+        """
+        Проверяет всю пачку (см. invalid_rows).
+
+        Raises:
+            ValueError: Если есть строки, не прошедшие проверку.
+        """
+        invalid = self.invalid_rows()
+        if len(invalid):
+            shown = ', '.join(str(i) for i in invalid[:10])
+            raise ValueError(f"Пачка содержит некорректные транзакции ({len(invalid)} шт.), строки: {shown}.")
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __repr__(self):
+        return f"<TransactionBatch: {len(self)} транзакций>"
+
+    def date_strings(self) -> list:
+        """
+        Returns:
+            даты в виде строк YYYY-MM-DD HH:MM:SS[.ffffff] (как str(datetime)).
+        """
+        import numpy as np
+
+        values = np.datetime_as_string(self.dates.astype('datetime64[us]'), unit='us')
+        return [value[:10] + ' ' + (value[11:19] if value.endswith('.000000') else value[11:]) for value in values]
+
+    def currencies(self) -> list:
+        """
+        Returns:
+            коды валют транзакций.
+        """
+        labels = self.labels + [BASE_CURRENCY]  # код -1 указывает на последний элемент - базовую валюту
+        return [labels[code] for code in self.currency_codes.tolist()]
+
+    def totals_by(self, column: str, kind: int) -> dict:
+        """
+        Точно суммирует транзакции типа kind по категориям или источникам в целых копейках (numpy.add.at).
+        Суммы не пересчитываются в базовую валюту (см. storage.convert_totals).
+
+        Args:
+            column(str): 'category' или 'source'.
+            kind(int): EXPENSE или INCOME.
+
+        Returns:
+            словарь {категория или источник: сумма в копейках}.
+        """
+        import numpy as np
+
+        codes = self.category_codes if column == 'category' else self.source_codes
+        mask = (self.kinds == kind) & (codes >= 0)
+        totals = np.zeros(len(self.labels), dtype=np.int64)
+        np.add.at(totals, codes[mask], self.amounts[mask])
+        present = np.bincount(codes[mask], minlength=len(self.labels)) > 0
+        return {self.labels[code]: int(totals[code]) for code in np.flatnonzero(present)}
+
+    def transactions(self):
+        """
+        Создает объекты Expense/Income по одному (для совместимости с кодом, работающим с моделями).
+
+        Yields:
+            transaction: Expense или Income.
+        """
+        currencies = self.currencies()
+        for i, date in enumerate(self.date_strings()):
+            when = datetime.fromisoformat(date)
+            amount = from_minor(self.amounts[i])
+            if self.kinds[i] == EXPENSE:
+                yield Expense(self.descriptions[i], amount, self.labels[self.category_codes[i]], when, currencies[i])
+            else:
+                yield Income(self.descriptions[i], amount, self.labels[self.source_codes[i]], when, currencies[i])
@@ -0,0 +1,263 @@
+import calendar
+import sqlite3
+from datetime import datetime, time, timedelta
+from fintracker import storage
+from fintracker.models import Expense, Income, BASE_CURRENCY, from_minor
+
+"""
+Модуль recurring - правила повторяющихся транзакций (зарплата, аренда, подписки) и их материализация.
+
+Правило задает шаблон транзакции и расписание: каждые N дней, недель, месяцев (в заданный день месяца)
+или лет, начиная с даты начала и, возможно, до даты окончания. materialize создает все наступившие транзакции
+одной пакетной вставкой и запоминает дату последней созданной транзакции каждого правила в той же SQL-транзакции,
+поэтому повторный запуск не создает дубликатов. project рассчитывает будущий баланс по правилам в базовой валюте,
+ничего не записывая.
+"""
+
+FREQUENCIES = ('daily', 'weekly', 'monthly', 'yearly')
+
+_RULES_SQL = ('SELECT r.id, r.type, r.description, r.amount, c.name, s.name, r.currency, r.freq, r.every, r.day, '
+              'r.start_date, r.end_date, r.last_date FROM recurring r LEFT JOIN categories c ON c.id = r.category_id '
+              'LEFT JOIN sources s ON s.id = r.source_id ORDER BY r.id')
+
+def _parse_date(value: str) -> datetime:
+    """Преобразует дату из БД в datetime (None остается None)."""
+    return datetime.fromisoformat(value) if value else None
+
+class RecurringRule:
+    """
+    Правило повторяющейся транзакции: шаблон (расход или доход) и расписание.
+    Все даты по правилу приходятся на начало дня.
+    """
+    __slots__ = ('id', 'transaction', 'freq', 'every', 'day', 'start', 'end', 'last')
+
+    def __init__(self, transaction, freq: str, start: datetime = None, every: int = 1, day: int = None,
+                 end: datetime = None, last: datetime = None, rule_id: int = None):
+        """Инициализирует новый объект RecurringRule.
+
+        Args:
+            transaction(Expense | Income): шаблон транзакции (описание, сумма, категория или источник).
+            freq(str): периодичность из FREQUENCIES.
+            start(datetime): дата первой транзакции (по умолчанию - сегодня).
+            every(int): интервал - каждые every дней, недель, месяцев или лет.
+            day(int): день месяца для monthly (по умолчанию - день даты начала); в коротких месяцах - последний день.
+            end(datetime): дата, после которой транзакции не создаются (по умолчанию - без окончания).
+            last(datetime): дата последней созданной по правилу транзакции.
+            rule_id(int): номер правила в БД.
+
+        Raises:
+            ValueError: Если периодичность неизвестна, интервал меньше 1, день месяца вне 1..31
+                или дата окончания раньше даты начала.
+        """
+        if not isinstance(transaction, (Expense, Income)):
+            raise ValueError("Шаблон правила должен быть расходом или доходом.")
+        if freq not in FREQUENCIES:
+            raise ValueError(f"Неизвестная периодичность: {freq!r}. Допустимые значения: daily, weekly, monthly, yearly.")
+        if every < 1:
+            raise ValueError("Интервал должен быть положительным числом.")
+        start = datetime.combine((start or datetime.now()).date(), time.min)
+        if day is not None and not 1 <= day <= 31:
+            raise ValueError("День месяца должен быть от 1 до 31.")
+        if end is not None:
+            end = datetime.combine(end.date(), time.min)
+            if end < start:
+                raise ValueError("Дата окончания не может быть раньше даты начала.")
+        self.id = rule_id
+        self.transaction = transaction
+        self.freq = freq
+        self.every = every
+        self.day = day if day is not None else start.day
+        self.start = start
+        self.end = end
+        self.last = last
+
+    def __repr__(self):
+        return (f"<RecurringRule {self.id}: {self.transaction.description}, {self.transaction.amount:.2f}, "
+                f"{self.freq} x{self.every}, с {self.start.strftime('%Y-%m-%d')}>")
+
+    def occurrence(self, number: int) -> datetime:
+        """
+        Возвращает дату транзакции с заданным номером по расписанию (без учета даты начала и окончания).
+
+        Args:
+            number(int): номер повторения, начиная с 0.
+
+        Returns:
+            дата транзакции.
+        """
+        if self.freq == 'daily':
+            return self.start + timedelta(days=self.every * number)
+        if self.freq == 'weekly':
+            return self.start + timedelta(weeks=self.every * number)
+        if self.freq == 'monthly':
+            year, month = divmod(self.start.year * 12 + self.start.month - 1 + self.every * number, 12)
+            month += 1
+            day = self.day
+        else:
+            year, month, day = self.start.year + self.every * number, self.start.month, self.start.day
+        return datetime(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+    def _number_after(self, date: datetime) -> int:
+        """Возвращает номер повторения, с которого можно начинать поиск дат после date (не больше первого такого номера)."""
+        if self.freq in ('daily', 'weekly'):
+            step = self.every * (7 if self.freq == 'weekly' else 1)
+            return max(0, (date - self.start).days // step)
+        months = (date.year - self.start.year) * 12 + date.month - self.start.month
+        if self.freq == 'yearly':
+            months //= 12
+        return max(0, months // self.every - 1)
+
+    def occurrences(self, until: datetime) -> list:
+        """
+        Возвращает даты транзакций после last (или с даты начала) по until включительно.
+
+        Args:
+            until(datetime): последняя дата.
+
+        Returns:
+            список дат по возрастанию.
+        """
+        limit = min(until, self.end) if self.end else until
+        dates = []
+        number = self._number_after(self.last) if self.last else 0
+        while True:
+            date = self.occurrence(number)
+            if date > limit:
+                return dates
+            if date >= self.start and (self.last is None or date > self.last):
+                dates.append(date)
+            number += 1
+
+    def make(self, date: datetime):
+        """
+        Создает транзакцию по шаблону на заданную дату.
+
+        Args:
+            date(datetime): дата транзакции.
+
+        Returns:
+            Expense или Income.
+        """
+        template = self.transaction
+        if isinstance(template, Expense):
+            return Expense(template.description, template.amount, template.category, date, template.currency)
+        return Income(template.description, template.amount, template.source, date, template.currency)
+
+def _load_rules(conn: sqlite3.Connection) -> list:
+    """Читает все правила из БД."""
+    rules = []
+    for rule_id, kind, description, amount, category, source, currency, freq, every, day, start, end, last in conn.execute(_RULES_SQL):
+        if kind == storage.EXPENSE_TYPE:
+            template = Expense(description, from_minor(amount), category, currency=currency)
+        else:
+            template = Income(description, from_minor(amount), source, currency=currency)
+        rules.append(RecurringRule(template, freq, _parse_date(start), every, day, _parse_date(end), _parse_date(last), rule_id))
+    return rules
+
+def add_rule(rule: RecurringRule) -> int:
+    """
+    Сохраняет правило в БД.
+
+    Args:
+        rule(RecurringRule): правило.
+
+    Returns:
+        номер правила.
+    """
+    engine = storage.get_engine()
+    with engine.write() as conn:
+        kind, description, amount, category_id, source_id, _, currency = engine.resolve_row(conn, storage._transaction_row(rule.transaction))
+        rule.id = conn.execute(
+            'INSERT INTO recurring (type, description, amount, category_id, source_id, currency, freq, every, day, start_date, '
+            'end_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (kind, description, amount, category_id, source_id, currency, rule.freq, rule.every, rule.day,
+             storage._to_db_date(rule.start), storage._to_db_date(rule.end) if rule.end else None)
+        ).lastrowid
+    return rule.id
+
+def get_rules() -> list:
+    """
+    Возвращает все правила.
+
+    Returns:
+        список RecurringRule по номерам.
+    """
+    return _load_rules(storage.get_engine().reader())
+
+def delete_rule(rule_id: int) -> bool:
+    """
+    Удаляет правило. Уже созданные по нему транзакции остаются.
+
+    Args:
+        rule_id(int): номер правила.
+
+    Returns:
+        True, если правило удалено, False - если его не было.
+    """
+    with storage.get_engine().write() as conn:
+        return conn.execute('DELETE FROM recurring WHERE id = ?', (rule_id,)).rowcount > 0
+
+def materialize(until: datetime = None) -> int:
+    """
+    Создает все транзакции по правилам с даты, следующей за последней созданной, по until включительно.
+    Транзакции всех правил записываются одной пакетной вставкой вместе с новыми датами последних транзакций,
+    поэтому повторный запуск с той же датой ничего не создает.
+
+    Args:
+        until(datetime): последняя дата (по умолчанию - сегодня).
+
+    Returns:
+        count: количество созданных транзакций.
+    """
+    until = until or datetime.now()
+    engine = storage.get_engine()
+    with engine.write() as conn:
+        rows, marks = [], []
+        for rule in _load_rules(conn):
+            dates = rule.occurrences(until)
+            if dates:
+                # Строки отличаются только датой, поэтому транзакции по шаблону не создаются
+                kind, description, amount, category, source, _, currency = storage._transaction_row(rule.transaction)
+                rows.extend((kind, description, amount, category, source, storage._to_db_date(date), currency) for date in dates)
+                marks.append((storage._to_db_date(dates[-1]), rule.id))
+        count = storage._write_rows(engine, conn, rows)
+        conn.executemany('UPDATE recurring SET last_date = ? WHERE id = ?', marks)
+        if count:
+            storage._bump_version(conn)
+    return count
+
+def project(until: datetime) -> tuple:
+    """
+    Рассчитывает будущие транзакции по правилам и баланс после каждой из них, ничего не записывая в БД.
+    Учитываются и наступившие, но еще не созданные транзакции. Суммы в других валютах пересчитываются
+    в базовую по последнему известному на дату транзакции курсу (storage.convert_totals).
+
+    Args:
+        until(datetime): последняя дата.
+
+    Returns:
+        (opening, rows): текущий баланс всех транзакций и список (date, description, amount, balance),
+        где amount - сумма со знаком (расход - отрицательная); суммы в копейках базовой валюты.
+
+    Raises:
+        ValueError: Если для валюты правила нет курса.
+    """
+    _, income, expense = storage.get_summary()
+    balance = opening = income - expense
+    events = []
+    for rule in get_rules():
+        sign = -1 if isinstance(rule.transaction, Expense) else 1
+        events.extend((date, rule.id, rule.transaction.description, sign * rule.transaction.amount_minor, rule.transaction.currency)
+                      for date in rule.occurrences(until))
+    events.sort()
+    amounts = [event[3] for event in events]
+    if any(event[4] != BASE_CURRENCY for event in events):
+        import pandas as pd
+        frame = pd.DataFrame({'currency': [event[4] for event in events], 'day': [event[0] for event in events],
+                              'total': amounts})
+        amounts = storage.convert_totals(frame)['total'].tolist()
+    rows = []
+    for (date, _, description, _, _), amount in zip(events, amounts):
+        balance += amount
+        rows.append((date, description, amount, balance))
+    return opening, rows
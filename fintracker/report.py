@@ -1,10 +1,94 @@
+import os
+import sys
 import pandas as pd
-from datetime import datetime, date
-from fintracker.storage import get_transactions
+from datetime import datetime, date, timedelta
+from fintracker.storage import get_totals_by, get_summary, get_all_totals, get_daily_totals, cached_query, cached_queries, EXPENSE_TYPE, INCOME_TYPE
+from fintracker.models import from_minor, MINOR_UNITS
 """
 Модуль report - генерирует отчеты по заданным условиям.
+Суммирование выполняется в SQLite (или в pyarrow для колоночного архива), в pandas попадает только агрегированный результат.
+Суммы считаются в целых копейках и переводятся в рубли (Decimal) только при формировании отчета.
+Данные отчетов по БД кэшируются по периоду и версии данных (см. storage.cached_query).
+Отчет по периодам (generate_timeseries) строится по суммам за дни из SQLite векторными операциями pandas.
 """
-def generate_expenses(start_date: datetime = None, end_date: datetime = None, output_file: str = None) -> pd.DataFrame:
+
+# Имена файлов отчетов по умолчанию.
+REPORT_FILES = {
+    'categories': 'expenses_by_category_report.csv',
+    'sources': 'incomings_by_category_report.csv',
+    'summary': 'summary_report.csv',
+    'timeseries': 'timeseries_report.csv',
+}
+
+# Частоты отчета по периодам: правило resample и формат подписи периода (неделя - с понедельника, подпись - понедельник).
+TIMESERIES_FREQS = {
+    'D': ('D', '%Y-%m-%d'),
+    'W': ('W-MON', '%Y-%m-%d'),
+    'M': ('MS', '%Y-%m'),
+}
+
+# Имена данных отчетов в кэше запросов (общие для отдельных отчетов и generate_all).
+_CACHE_NAMES = ('report.categories', 'report.sources', 'report.summary')
+
+def _totals_by(archive: str, column: str, transaction_type: str, start_date: datetime, end_date: datetime) -> list:
+    """Возвращает суммы по колонке из архива, если он указан, иначе из БД (через кэш)."""
+    if archive:
+        from fintracker.archive import archive_totals_by
+        return archive_totals_by(archive, column, transaction_type, start_date, end_date)
+    name = _CACHE_NAMES[0] if column == 'category' else _CACHE_NAMES[1]
+    return cached_query(name, start_date, end_date, lambda: get_totals_by(column, transaction_type, start_date, end_date))
+
+def _save(report: pd.DataFrame, output_file: str, message: str, index: bool):
+    """Сохраняет отчет в CSV файл, если он указан ('-' - вывод CSV в консоль)."""
+    if output_file == '-':
+        report.to_csv(sys.stdout, index=index, sep=';', float_format='%.2f')
+        return
+    if output_file:
+        try:
+            report.to_csv(output_file, index=index, encoding='cp1251', sep=';', float_format='%.2f')
+            print(f"{message} {output_file}")
+        except Exception as e:
+            print(f"Ошибка при сохранении отчета в файл {output_file}: {e}")
+
+def _expenses_report(rows: list, output_file: str) -> pd.DataFrame:
+    """Формирует отчет по расходам из сумм по категориям в копейках."""
+    if not rows:
+        print("Нет данных о расходах для формирования отчета.")
+        return pd.DataFrame()
+    report = pd.DataFrame([(key, from_minor(total)) for key, total in rows], columns=['category', 'total_amount'])
+    _save(report, output_file, "Отчет о расходах по категориям сохранен в", index=False)
+    return report
+
+def _incomings_report(rows: list, output_file: str) -> pd.DataFrame:
+    """Формирует отчет по доходам из сумм по источникам в копейках."""
+    if not rows:
+        print("Нет данных о доходах для формирования отчета.")
+        return pd.DataFrame()
+    report = pd.DataFrame([(key, from_minor(total)) for key, total in rows], columns=['source', 'total_amount'])
+    _save(report, output_file, "Отчет о доходах по категориям сохранен в", index=False)
+    return report
+
+def _summary_report(summary: tuple, start_date: datetime, end_date: datetime, output_file: str) -> pd.DataFrame:
+    """Формирует сводный отчет из кортежа (count, income, expense) с суммами в копейках."""
+    count, sum_in, sum_ex = summary
+    sum_in, sum_ex = from_minor(sum_in), from_minor(sum_ex)
+    if not count:
+        print("Нет данных для формирования сводного отчета.")
+        return pd.DataFrame()
+    balance = sum_in - sum_ex
+
+    report = pd.DataFrame({
+        'Сводный отчет': '',
+        'Период c': [start_date.strftime('%Y-%m-%d') if start_date else date.today()],
+        'Период по': [end_date.strftime('%Y-%m-%d') if end_date else date.today()],
+        'Общий доход': sum_in,
+        'Общий расход': sum_ex,
+        'Баланс': balance}).transpose()
+
+    _save(report, output_file, "Отчет о доходах по категориям сохранен в", index=True)
+    return report
+
+def generate_expenses(start_date: datetime = None, end_date: datetime = None, output_file: str = None, archive: str = None) -> pd.DataFrame:
     """
     Генерирует отчет по расходам по заданным условиям и сохраняет его в файл.
 
@@ -12,31 +96,14 @@ def generate_expenses(start_date: datetime = None, end_date: datetime = None, ou
         start_date(datetime): начальная дата фильтрации.
         end_date(datetime): конечная дата фильтрации.
         output_file(str): название файла для сохранения отчета (по умолчанию - expenses_by_category_report.csv).
+        archive(str): каталог колоночного архива (см. fintracker.archive); если указан, отчет строится по нему, а не по БД.
 
     Returns:
         report - датафрейм с отчетом.
     """
-    df = get_transactions(start_date, end_date)
-    exp_df = df[df['type'] == 'Расход']
-
-    if exp_df.empty:
-        print("Нет данных о расходах для формирования отчета.")
-        return pd.DataFrame()
-
-    report = exp_df.groupby('category')['amount'].sum().reset_index()
-    report.rename(columns={'amount': 'total_amount'}, inplace=True)
-    report = report.sort_values(by='total_amount', ascending=False)
-
-    if output_file:
-        try:
-            report.to_csv(output_file, index=False, encoding='cp1251', sep=';')
-            print(f"Отчет о расходах по категориям сохранен в {output_file}")
-        except Exception as e:
-            print(f"Ошибка при сохранении отчета в файл {output_file}: {e}")
+    return _expenses_report(_totals_by(archive, 'category', EXPENSE_TYPE, start_date, end_date), output_file)
 
-    return report
-
-def generate_incomings(start_date: datetime = None, end_date: datetime = None, output_file: str = None) -> pd.DataFrame:
+def generate_incomings(start_date: datetime = None, end_date: datetime = None, output_file: str = None, archive: str = None) -> pd.DataFrame:
     """
     Генерирует отчет по доходам по заданным условиям и сохраняет его в файл.
 
@@ -44,31 +111,14 @@ def generate_incomings(start_date: datetime = None, end_date: datetime = None, o
         start_date(datetime): начальная дата фильтрации.
         end_date(datetime): конечная дата фильтрации.
         output_file(str): название файла для сохранения отчета (по умолчанию - incomings_by_category_report.csv).
+        archive(str): каталог колоночного архива (см. fintracker.archive); если указан, отчет строится по нему, а не по БД.
 
     Returns:
         report - датафрейм с отчетом.
     """
-    df = get_transactions(start_date, end_date)
-    inc_df = df[df['type'] == 'Доход']
-
-    if inc_df.empty:
-        print("Нет данных о доходах для формирования отчета.")
-        return pd.DataFrame()
-
-    report = inc_df.groupby('source')['amount'].sum().reset_index()
-    report.rename(columns={'amount': 'total_amount'}, inplace=True)
-    report = report.sort_values(by='total_amount', ascending=False)
+    return _incomings_report(_totals_by(archive, 'source', INCOME_TYPE, start_date, end_date), output_file)
 
-    if output_file:
-        try:
-            report.to_csv(output_file, index=False, encoding='cp1251', sep=';')
-            print(f"Отчет о доходах по категориям сохранен в {output_file}")
-        except Exception as e:
-            print(f"Ошибка при сохранении отчета в файл {output_file}: {e}")
-
-    return report
-
-def gen_sum(start_date: datetime = None, end_date: datetime = None, output_file: str = None):
+def gen_sum(start_date: datetime = None, end_date: datetime = None, output_file: str = None, archive: str = None):
     """
     Генерирует общий отчет по заданным условиям и сохраняет его в файл.
 
@@ -76,35 +126,96 @@ def gen_sum(start_date: datetime = None, end_date: datetime = None, output_file:
         start_date(datetime): начальная дата фильтрации.
         end_date(datetime): конечная дата фильтрации.
         output_file(str): название файла для сохранения отчета (по умолчанию - summary_report.csv).
+        archive(str): каталог колоночного архива (см. fintracker.archive); если указан, отчет строится по нему, а не по БД.
 
     Returns:
         report - датафрейм с отчетом.
         """
-    df = get_transactions(start_date, end_date)
-    if df.empty:
-        print("Нет данных для формирования сводного отчета.")
-        return
-    sum_in = df[df['type'] == 'Доход']['amount'].sum()
-    sum_ex = df[df['type'] == 'Расход']['amount'].sum()
-    balance = sum_in - sum_ex
-
-    report = pd.DataFrame({
-        'Сводный отчет': '',
-        'Период c': [start_date.strftime('%Y-%m-%d') if start_date else date.today()],
-        'Период по': [end_date.strftime('%Y-%m-%d') if end_date else date.today()],
-        'Общий доход': sum_in,
-        'Общий расход': sum_ex,
-        'Баланс': balance}).transpose()
-
-    if output_file:
-        try:
-            report.to_csv(output_file, encoding='cp1251', sep=';')
-            print(f"Отчет о доходах по категориям сохранен в {output_file}")
-        except Exception as e:
-            print(f"Ошибка при сохранении отчета в файл {output_file}: {e}")
+    if archive:
+        from fintracker.archive import archive_summary
+        summary = archive_summary(archive, start_date, end_date)
+    else:
+        summary = cached_query(_CACHE_NAMES[2], start_date, end_date, lambda: get_summary(start_date, end_date))
+    return _summary_report(summary, start_date, end_date, output_file)
+
+def generate_all(start_date: datetime = None, end_date: datetime = None, output_dir: str = None, archive: str = None) -> dict:
+    """
+    Генерирует все отчеты (расходы по категориям, доходы по источникам, сводный) за один проход:
+    суммы для всех отчетов считаются одним запросом к БД (или одним чтением архива).
 
-    return report
+    Args:
+        start_date(datetime): начальная дата фильтрации.
+        end_date(datetime): конечная дата фильтрации.
+        output_dir(str): каталог для сохранения отчетов под именами из REPORT_FILES (если не указан, отчеты не сохраняются).
+        archive(str): каталог колоночного архива (см. fintracker.archive); если указан, отчеты строятся по нему, а не по БД.
 
+    Returns:
+        словарь {'categories', 'sources', 'summary'} с датафреймами отчетов.
+    """
+    if archive:
+        from fintracker.archive import archive_all_totals
+        categories, sources, summary = archive_all_totals(archive, start_date, end_date)
+    else:
+        results = cached_queries(_CACHE_NAMES, start_date, end_date,
+                                 lambda: dict(zip(_CACHE_NAMES, get_all_totals(start_date, end_date))))
+        categories, sources, summary = (results[name] for name in _CACHE_NAMES)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    files = {name: os.path.join(output_dir, file_name) if output_dir else None for name, file_name in REPORT_FILES.items()}
+    return {
+        'categories': _expenses_report(categories, files['categories']),
+        'sources': _incomings_report(sources, files['sources']),
+        'summary': _summary_report(summary, start_date, end_date, files['summary']),
+    }
+
+def _timeseries_data(start_date: datetime, end_date: datetime) -> tuple:
+    """Возвращает (баланс до начала периода, суммы по дням) в копейках (через кэш)."""
+    def compute():
+        opening = 0
+        if start_date:
+            _, income, expense = get_summary(None, start_date - timedelta(microseconds=1))
+            opening = income - expense
+        return opening, get_daily_totals(start_date, end_date)
+    return cached_query('report.timeseries', start_date, end_date, compute)
+
+def generate_timeseries(start_date: datetime = None, end_date: datetime = None, freq: str = 'D', output_file: str = None) -> pd.DataFrame:
+    """
+    Генерирует отчет по периодам (дням, неделям или месяцам): доходы, расходы, баланс периода и нарастающий баланс.
+    Суммы по дням считаются в SQLite по таблице daily_totals, недели и месяцы получаются векторной агрегацией (resample),
+    нарастающий баланс - накопленной суммой (cumsum), начиная с баланса всех транзакций до начала периода.
 
+    Args:
+        start_date(datetime): начальная дата фильтрации.
+        end_date(datetime): конечная дата фильтрации.
+        freq(str): 'D' - дни, 'W' - недели, 'M' - месяцы.
+        output_file(str): название файла для сохранения отчета ('-' - вывод CSV в консоль).
 
+    Returns:
+        report - датафрейм с колонками income, expense, balance, running_balance (в рублях), индекс - период.
 
+    Raises:
+        ValueError: Если частота не поддерживается.
+    """
+    if freq not in TIMESERIES_FREQS:
+        raise ValueError(f"Неизвестная частота отчета: {freq!r}. Допустимые значения: D, W, M.")
+    opening, rows = _timeseries_data(start_date, end_date)
+    if not rows:
+        print("Нет данных для формирования отчета по периодам.")
+        return pd.DataFrame()
+    days, income, expense = zip(*rows)
+    daily = pd.DataFrame({'income': income, 'expense': expense}, index=pd.DatetimeIndex(days), dtype='int64')
+    # Дни без транзакций (в том числе на краях заданного периода) входят в отчет с нулевыми суммами
+    first = pd.Timestamp(start_date.date()) if start_date else daily.index[0]
+    last = pd.Timestamp(end_date.date()) if end_date else daily.index[-1]
+    daily = daily.reindex(pd.date_range(first, last, freq='D'), fill_value=0)
+
+    rule, label = TIMESERIES_FREQS[freq]
+    series = daily if freq == 'D' else daily.resample(rule, closed='left', label='left').sum()
+    series['balance'] = series['income'] - series['expense']
+    series['running_balance'] = series['balance'].cumsum() + opening
+    report = series / MINOR_UNITS
+    report.index = report.index.strftime(label)
+    report.index.name = 'period'
+
+    _save(report, output_file, "Отчет по периодам сохранен в", index=True)
+    return report
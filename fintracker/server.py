@@ -0,0 +1,249 @@
+import asyncio
+import ipaddress
+import json
+import os
+import signal
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout, redirect_stderr
+from fintracker import storage
+from fintracker.config import parse_tcp_address, canonical_db_path, MEMORY
+from fintracker.client import REMOTE_COMMANDS, encode, ping
+
+"""
+Модуль server - долгоживущий процесс (команда serve), который держит открытыми соединения с БД,
+кэш запросов и загруженный pandas, и выполняет команды add, view, search, report, delete по локальному сокету.
+
+Протокол: клиент (см. fintracker.client) отправляет одну строку JSON {"argv", "db", "cwd", "cache"} - аргументы командной
+строки, путь к БД клиента, его рабочий каталог и режим кэша запросов. Сервер разбирает argv тем же парсером argparse, что и CLI, выполняет
+обработчик команды и потоково возвращает его вывод строками JSON {"stream": "stdout"|"stderr", "data"},
+завершая ответ строкой {"done": true}. Если команда не может быть выполнена сервером (другая БД или режим кэша,
+неподдерживаемая команда, файл вывода вне разрешенного каталога), возвращается {"refused": причина} и клиент выполняет
+команду сам.
+Сервер не проверяет подлинность клиентов, поэтому слушает только Unix-сокет, созданный с правами 0600, или TCP-порт
+на loopback-адресе, а файлы (report --output, --archive) записывает только внутри своего рабочего каталога.
+Команды выполняются по очереди в одном рабочем потоке: вывод обработчиков перехватывается через sys.stdout.
+"""
+
+# Аргументы с путями к файлам, которые разрешаются относительно рабочего каталога клиента.
+_PATH_ARGUMENTS = ('output', 'archive')
+
+def _inside(path: str, root: str) -> bool:
+    """Проверяет, что путь после разрешения символических ссылок находится внутри каталога root."""
+    path = os.path.realpath(path)
+    return os.path.commonpath([path, root]) == root
+
+class _StreamWriter:
+    """
+    Файлоподобный объект, пересылающий вывод обработчика клиенту частями по мере накопления.
+    Вызывается из рабочего потока, запись в сокет выполняется в потоке цикла событий.
+    """
+    def __init__(self, loop, writer, stream: str, buffer_size: int = 64 * 1024):
+        """Инициализирует новый объект _StreamWriter.
+
+        Args:
+            loop: цикл событий сервера.
+            writer(asyncio.StreamWriter): поток записи соединения с клиентом.
+            stream(str): 'stdout' или 'stderr'.
+            buffer_size(int): размер накапливаемой части в символах.
+        """
+        self.loop = loop
+        self.writer = writer
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self._parts = []
+        self._size = 0
+
+    def write(self, data: str) -> int:
+        self._parts.append(data)
+        self._size += len(data)
+        if self._size >= self.buffer_size:
+            self.flush()
+        return len(data)
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        if not self._parts:
+            return
+        message = encode({'stream': self.stream, 'data': ''.join(self._parts)})
+        self._parts, self._size = [], 0
+        self.loop.call_soon_threadsafe(self.writer.write, message)
+
+def execute(parser, request: dict, stdout, stderr, root: str):
+    """
+    Выполняет команду клиента, направляя ее вывод в stdout и stderr.
+
+    Args:
+        parser(argparse.ArgumentParser): парсер командной строки CLI.
+        request(dict): запрос клиента с ключами argv, db, cwd, cache.
+        stdout: поток для вывода команды.
+        stderr: поток для сообщений об ошибках.
+        root(str): канонический путь каталога, внутри которого сервер записывает файлы.
+
+    Returns:
+        None, если команда выполнена, иначе причина отказа.
+    """
+    db = request.get('db')
+    if not db or db == MEMORY or storage.DATA_FILE == MEMORY:
+        return "БД в памяти процесса не разделяется между клиентом и сервером."
+    # Относительные пути сравниваются после разрешения от рабочих каталогов клиента и сервера
+    if canonical_db_path(db, request.get('cwd')) != canonical_db_path(storage.DATA_FILE):
+        return f"Сервер работает с другой БД: {storage.DATA_FILE}"
+    if request.get('cache') and request['cache'] != storage.CACHE_MODE:
+        return f"Сервер работает с другим режимом кэша: {storage.CACHE_MODE}"
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        try:
+            args = parser.parse_args(request.get('argv', []))
+        except SystemExit:
+            return None
+        if args.command not in REMOTE_COMMANDS:
+            return f"Команда {args.command} не выполняется сервером."
+        for name in _PATH_ARGUMENTS:
+            value = getattr(args, name, None)
+            if value and value != '-':
+                path = os.path.join(request.get('cwd', ''), os.path.expanduser(value))
+                # Файлы пишутся от имени процесса сервера, поэтому только в его каталоге; остальные пишет сам клиент
+                if not _inside(path, root):
+                    return f"Сервер записывает файлы только в каталоге {root}."
+                setattr(args, name, path)
+        try:
+            args.func(args)
+        except Exception as e:
+            print(f"Произошла ошибка при выполнении команды: {e}")
+    return None
+
+async def _handle(parser, executor, root, reader, writer):
+    """Обслуживает соединение клиента: выполняет запросы по одному, пока клиент не закроет соединение."""
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                request = json.loads(line)
+            except ValueError:
+                writer.write(encode({'refused': 'Некорректный запрос.'}))
+                break
+            stdout = _StreamWriter(loop, writer, 'stdout')
+            stderr = _StreamWriter(loop, writer, 'stderr')
+            refused = await loop.run_in_executor(executor, execute, parser, request, stdout, stderr, root)
+            if refused:
+                writer.write(encode({'refused': refused}))
+            else:
+                stdout.flush()
+                stderr.flush()
+                # Части вывода ставятся в очередь цикла событий, поэтому завершающее сообщение - после них
+                await asyncio.sleep(0)
+                writer.write(encode({'done': True}))
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+def _check_loopback(host: str):
+    """
+    Проверяет, что TCP-адрес сервера доступен только с этого компьютера.
+
+    Args:
+        host(str): имя хоста или IP-адрес.
+
+    Raises:
+        ValueError: Если хост не разрешается или хотя бы один его адрес не loopback.
+    """
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, None)}
+    except OSError as e:
+        raise ValueError(f"Не удалось определить адрес {host}: {e}")
+    if not all(ipaddress.ip_address(address.split('%')[0]).is_loopback for address in addresses):
+        raise ValueError(f"Сервер без аутентификации принимает подключения только на localhost, а не на {host}.")
+
+def _warm_up():
+    """Открывает соединения с БД и загружает модули отчетов заранее, чтобы первый запрос не платил за них."""
+    engine = storage.get_engine()
+    engine.writer()
+    engine.reader()
+    import fintracker.report  # noqa: F401 - загружает pandas
+
+async def start_server(parser, address: str, executor: ThreadPoolExecutor, root: str = None):
+    """
+    Запускает сервер на Unix-сокете или на TCP-порту localhost.
+
+    Args:
+        parser(argparse.ArgumentParser): парсер командной строки CLI.
+        address(str): путь к Unix-сокету или 'tcp://хост:порт'.
+        executor(ThreadPoolExecutor): рабочий поток для выполнения команд.
+        root(str): каталог, внутри которого сервер записывает файлы команд (по умолчанию - текущий).
+
+    Returns:
+        asyncio.Server.
+
+    Raises:
+        RuntimeError: Если по этому адресу уже работает сервер.
+        ValueError: Если TCP-адрес не на localhost.
+    """
+    root = os.path.realpath(root or os.getcwd())
+    handler = lambda reader, writer: _handle(parser, executor, root, reader, writer)
+    tcp = parse_tcp_address(address)
+    if tcp:
+        _check_loopback(tcp[0])
+        return await asyncio.start_server(handler, *tcp)
+    if os.path.exists(address):
+        if ping(address):
+            raise RuntimeError(f"Сервер уже запущен: {address}")
+        os.remove(address)
+    directory = os.path.dirname(address)
+    if directory:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+    # Сокет сразу создается с правами 0600: между bind и chmod к нему мог бы подключиться другой пользователь
+    umask = os.umask(0o077)
+    try:
+        server = await asyncio.start_unix_server(handler, address)
+    finally:
+        os.umask(umask)
+    os.chmod(address, 0o600)
+    return server
+
+def serve(parser, address: str):
+    """
+    Запускает сервер и обслуживает клиентов до прерывания (Ctrl+C или SIGTERM).
+
+    Args:
+        parser(argparse.ArgumentParser): парсер командной строки CLI.
+        address(str): путь к Unix-сокету или 'tcp://хост:порт'.
+
+    Raises:
+        RuntimeError: Если по этому адресу уже работает сервер.
+    """
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='fintr-serve')
+
+    async def run():
+        server = await start_server(parser, address, executor)
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, server.close)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows: остается KeyboardInterrupt
+        print(f"Сервер запущен: {address} (БД {storage.DATA_FILE}). Остановка - Ctrl+C.", flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            if not parse_tcp_address(address) and os.path.exists(address):
+                os.remove(address)
+
+    try:
+        executor.submit(_warm_up).result()
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        executor.shutdown()
+        storage.close_engine()
@@ -1,99 +1,1415 @@
-import pandas as pd
-from fintracker.models import Expense, Income
-from datetime import datetime
+from fintracker.models import Expense, Income, TransactionBatch, EXPENSE, INCOME, MINOR_UNITS, BASE_CURRENCY, from_minor, to_minor, normalize_currency
+from fintracker.config import resolve_db_path, resolve_backup_path, resolve_backup_dir, resolve_cache_mode, expand_db_path, MEMORY
+from fintracker.cache import QueryCache, make_key, copy_value, load_persisted, touch_persisted, store_persisted
+from datetime import datetime, time, timedelta
 import sqlite3
+import os
+import threading
+from time import monotonic
+from contextlib import contextmanager
 
 """
 Модуль storage - добавление, удаление транзакций.
 """
 
-DATA_FILE = 'C:/Users/user/fintr/fintr.db'
-BACKUP_FILE = 'C:/Users/user/fintr/transactions_backup.csv'
+# Настройки модуля (путь к БД, файл и каталог резервных копий, режим кэша) определяются при первом обращении,
+# а не при импорте: ошибка в переменных окружения или файле настроек не мешает импорту и выводу справки CLI.
+_SETTINGS = {'DATA_FILE': resolve_db_path, 'BACKUP_FILE': resolve_backup_path, 'BACKUP_DIR': resolve_backup_dir,
+             'CACHE_MODE': resolve_cache_mode}
 
-def _load_transactions() -> pd.DataFrame:
+def __getattr__(name: str):
+    """
+    Определяет настройку модуля при первом обращении (storage.DATA_FILE и т.п.) и запоминает ее.
+
+    Raises:
+        AttributeError: Если атрибута нет.
+        ValueError: Если значение в переменной окружения или файле настроек неверное.
+    """
+    resolve = _SETTINGS.get(name)
+    if resolve is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = globals()[name] = resolve()
+    return value
+
+def _setting(name: str):
+    """Возвращает настройку модуля, определяя ее при первом обращении."""
+    return globals()[name] if name in globals() else __getattr__(name)
+
+EXPENSE_TYPE = 'Расход'
+INCOME_TYPE = 'Доход'
+
+_COLUMNS = ['id', 'type', 'description', 'amount', 'category', 'source', 'date', 'currency']
+_INSERT_SQL = ('INSERT INTO transactions (type, description, amount, category_id, source_id, date, currency) '
+               'VALUES (?, ?, ?, ?, ?, ?, ?)')
+
+_engine = None
+
+# Колонки транзакций, зависящие от версии схемы: тип amount - REAL (рубли) до миграции 4 и INTEGER (копейки) после нее,
+# категория и источник - строки до миграции 5 и ссылки на справочники categories и sources после нее.
+_TRANSACTIONS_TABLE_SQL = (
+    'CREATE TABLE transactions ('
+    'id INTEGER PRIMARY KEY AUTOINCREMENT, type TEXT, description TEXT, amount {amount_type}, '
+    '{lookup_columns}, date DATETIME)'
+)
+_TEXT_LOOKUP_COLUMNS = 'category TEXT, source TEXT'
+_ID_LOOKUP_COLUMNS = 'category_id INTEGER REFERENCES categories(id), source_id INTEGER REFERENCES sources(id)'
+
+# Справочники: колонка транзакции -> таблица справочника.
+_LOOKUP_TABLES = {'category': 'categories', 'source': 'sources'}
+
+# Представление с названиями категорий и источников вместо их id, через него читаются транзакции.
+# Колонка валюты есть в транзакциях с миграции 11.
+_ROWS_VIEW_SQL = (
+    'CREATE VIEW transaction_rows AS '
+    'SELECT t.id AS id, t.type AS type, t.description AS description, t.amount AS amount, '
+    'c.name AS category, s.name AS source, t.date AS date, t.category_id AS category_id, t.source_id AS source_id{currency} '
+    'FROM transactions t '
+    'LEFT JOIN categories c ON c.id = t.category_id LEFT JOIN sources s ON s.id = t.source_id'
+)
+
+def _migrate_add_id(conn: sqlite3.Connection):
+    """
+    Миграция 1: создает таблицу транзакций со стабильным первичным ключом id и индекс по дате.
+    Таблица старого формата (без id) пересоздается, строкам присваиваются id в порядке дат.
+
+    Args:
+        conn(sqlite3.Connection): соединение с БД.
+    """
+    table_sql = _TRANSACTIONS_TABLE_SQL.format(amount_type='REAL', lookup_columns=_TEXT_LOOKUP_COLUMNS)
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(transactions)')]
+    if not columns:
+        conn.execute(table_sql)
+    elif 'id' not in columns:
+        conn.execute('DROP INDEX IF EXISTS idx_transactions_date')
+        conn.execute('ALTER TABLE transactions RENAME TO transactions_old')
+        conn.execute(table_sql)
+        conn.execute(
+            'INSERT INTO transactions (type, description, amount, category, source, date) '
+            'SELECT type, description, amount, category, source, date FROM transactions_old ORDER BY date, rowid'
+        )
+        conn.execute('DROP TABLE transactions_old')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(date)')
+
+# Таблицы сводных сумм: имя таблицы -> длина префикса даты, задающего период (YYYY-MM-DD или YYYY-MM).
+_ROLLUP_TABLES = {'daily_totals': 10, 'monthly_totals': 7}
+
+# Ключи сводных сумм: колонки категории и источника, значение, заменяющее NULL, и колонка валюты.
+# До миграции 5 это названия (пустая строка - нет значения), после нее - id из справочников (0 - нет значения).
+# С миграции 11 суммы разделены по валютам (до нее колонки валюты нет - None).
+_TEXT_ROLLUP_KEYS = {'category': 'category', 'source': 'source', 'empty': "''", 'currency': None}
+_ID_ROLLUP_KEYS = {'category': 'category_id', 'source': 'source_id', 'empty': '0', 'currency': None}
+_CURRENCY_ROLLUP_KEYS = {'category': 'category_id', 'source': 'source_id', 'empty': '0', 'currency': 'currency'}
+
+def _create_rollup_tables(conn: sqlite3.Connection, total_type: str, category: str, source: str, empty: str,
+                          currency: str = 'currency'):
+    """
+    Создает таблицы сводных сумм.
+
+    Args:
+        conn(sqlite3.Connection): соединение с БД.
+        total_type(str): тип колонки сумм.
+        category(str): колонка категории.
+        source(str): колонка источника.
+        empty(str): значение ключа, заменяющее NULL (определяет тип колонок ключа).
+        currency(str): колонка валюты (None - суммы не разделяются по валютам).
+    """
+    key_type = 'INTEGER' if empty == '0' else 'TEXT'
+    currency_column = f", {currency} TEXT NOT NULL" if currency else ''
+    currency_key = f", {currency}" if currency else ''
+    for table in _ROLLUP_TABLES:
+        conn.execute(
+            f"CREATE TABLE {table} (period TEXT NOT NULL, type TEXT NOT NULL, {category} {key_type} NOT NULL, "
+            f"{source} {key_type} NOT NULL{currency_column}, total {total_type} NOT NULL, count INTEGER NOT NULL, "
+            f"PRIMARY KEY (period, type, {category}, {source}{currency_key})) WITHOUT ROWID"
+        )
+
+def _rollup_triggers_sql(category: str = 'category_id', source: str = 'source_id', empty: str = '0',
+                         currency: str = 'currency') -> list:
+    """
+    Формирует триггеры, которые поддерживают таблицы сводных сумм при вставке, удалении и изменении транзакций.
+
+    Args:
+        category(str): колонка категории.
+        source(str): колонка источника.
+        empty(str): значение ключа, заменяющее NULL.
+        currency(str): колонка валюты (None - суммы не разделяются по валютам).
+
+    Returns:
+        список SQL-запросов CREATE TRIGGER.
+    """
+    currency_key = f", {currency}" if currency else ''
+    currency_value = f", NEW.{currency}" if currency else ''
+    currency_match = f" AND {currency} = OLD.{currency}" if currency else ''
+    add, remove = [], []
+    for table, width in _ROLLUP_TABLES.items():
+        add.append(
+            f"INSERT INTO {table} (period, type, {category}, {source}{currency_key}, total, count) "
+            f"VALUES (substr(NEW.date, 1, {width}), NEW.type, COALESCE(NEW.{category}, {empty}), "
+            f"COALESCE(NEW.{source}, {empty}){currency_value}, NEW.amount, 1) "
+            f"ON CONFLICT (period, type, {category}, {source}{currency_key}) "
+            f"DO UPDATE SET total = total + excluded.total, count = count + 1;"
+        )
+        key = (f"period = substr(OLD.date, 1, {width}) AND type = OLD.type "
+               f"AND {category} = COALESCE(OLD.{category}, {empty}) AND {source} = COALESCE(OLD.{source}, {empty}){currency_match}")
+        remove.append(f"UPDATE {table} SET total = total - OLD.amount, count = count - 1 WHERE {key};")
+        remove.append(f"DELETE FROM {table} WHERE {key} AND count <= 0;")
+    add, remove = ' '.join(add), ' '.join(remove)
+    return [
+        f'CREATE TRIGGER trg_rollup_insert AFTER INSERT ON transactions BEGIN {add} END',
+        f'CREATE TRIGGER trg_rollup_delete AFTER DELETE ON transactions BEGIN {remove} END',
+        f'CREATE TRIGGER trg_rollup_update AFTER UPDATE ON transactions BEGIN {remove} {add} END',
+    ]
+
+def _fill_rollups(conn: sqlite3.Connection, category: str = 'category_id', source: str = 'source_id', empty: str = '0',
+                  currency: str = 'currency'):
+    """
+    Пересчитывает таблицы сводных сумм по всем транзакциям.
+
+    Args:
+        conn(sqlite3.Connection): соединение с БД.
+        category(str): колонка категории.
+        source(str): колонка источника.
+        empty(str): значение ключа, заменяющее NULL.
+        currency(str): колонка валюты (None - суммы не разделяются по валютам).
+    """
+    currency_key = f", {currency}" if currency else ''
+    currency_group = ', 5' if currency else ''
+    conn.execute('DELETE FROM daily_totals')
+    conn.execute('DELETE FROM monthly_totals')
+    conn.execute(
+        f"INSERT INTO daily_totals (period, type, {category}, {source}{currency_key}, total, count) "
+        f"SELECT substr(date, 1, 10), type, COALESCE({category}, {empty}), COALESCE({source}, {empty}){currency_key}, "
+        f"SUM(amount), COUNT(*) FROM transactions GROUP BY 1, 2, 3, 4{currency_group}"
+    )
+    conn.execute(
+        f"INSERT INTO monthly_totals (period, type, {category}, {source}{currency_key}, total, count) "
+        f"SELECT substr(period, 1, 7), type, {category}, {source}{currency_key}, SUM(total), SUM(count) "
+        f"FROM daily_totals GROUP BY 1, 2, 3, 4{currency_group}"
+    )
+
+def _migrate_add_rollups(conn: sqlite3.Connection):
+    """
+    Миграция 2: создает таблицы сумм по дням и месяцам (daily_totals, monthly_totals) и триггеры,
+    обновляющие их при каждой вставке и удалении транзакции.
+
+    Args:
+        conn(sqlite3.Connection): соединение с БД.
+    """
+    _create_rollup_tables(conn, 'REAL', **_TEXT_ROLLUP_KEYS)
+    for trigger in _rollup_triggers_sql(**_TEXT_ROLLUP_KEYS):
+        conn.execute(trigger)
+    _fill_rollups(conn, **_TEXT_ROLLUP_KEYS)
+
+def _migrate_add_backup_state(conn: sqlite3.Connection):
+    """
+    Миграция 3: создает таблицу удаленных транзакций (заполняется триггером) и таблицу состояния
+    резервного копирования, нужные для инкрементальных копий (см. fintracker.backup).
+
+    Args:
+        conn(sqlite3.Connection): соединение с БД.
+    """
+    conn.execute('CREATE TABLE deleted_transactions (seq INTEGER PRIMARY KEY AUTOINCREMENT, id INTEGER NOT NULL)')
+    conn.execute('CREATE TABLE backup_state (key TEXT PRIMARY KEY, value TEXT)')
+    conn.execute(
+        'CREATE TRIGGER trg_deleted_transactions AFTER DELETE ON transactions '
+        'BEGIN INSERT INTO deleted_transactions (id) VALUES (OLD.id); END'
+    )
+
+def _rebuild_transactions(conn: sqlite3.Connection, table_sql: str, copy_sql: str):
+    """
+    Пересоздает таблицу транзакций с новой структурой, сохраняя id, счетчик AUTOINCREMENT, индекс по дате
+    и триггер удаленных транзакций. Триггеры и таблицы сводных сумм удаляются - их создает вызывающая миграция.
+
+    Args:
+        conn(sqlite3.Connection): соединение с БД.
+        table_sql(str): запрос CREATE TABLE transactions.
+        copy_sql(str): запрос, копирующий строки из transactions_old в transactions.
+    """
+    sequence = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'transactions'").fetchone()
+    for trigger in ('trg_rollup_insert', 'trg_rollup_delete', 'trg_rollup_update', 'trg_deleted_transactions'):
+        conn.execute(f'DROP TRIGGER {trigger}')
+    for table in _ROLLUP_TABLES:
+        conn.execute(f'DROP TABLE {table}')
+    conn.execute('DROP INDEX idx_transactions_date')
+    conn.execute('ALTER TABLE transactions RENAME TO transactions_old')
+    conn.execute(table_sql)
+    conn.execute(copy_sql)
+    conn.execute('DROP TABLE transactions_old')
+    if sequence:
+        conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'transactions'", sequence)
+    conn.execute("DELETE FROM sqlite_sequence WHERE name = 'transactions_old'")
+    conn.execute('CREATE INDEX idx_transactions_date ON transactions(date)')
+    conn.execute(
+        'CREATE TRIGGER trg_deleted_transactions AFTER DELETE ON transactions '
+        'BEGIN INSERT INTO deleted_transactions (id) VALUES (OLD.id); END'
+    )
+
+def _migrate_amount_minor(conn: sqlite3.Connection):
+    """
+    Миграция 4: переводит суммы из рублей (REAL) в целые копейки (INTEGER) в транзакциях и таблицах сводных сумм,
+    чтобы суммирование было точным. Таблица транзакций пересоздается с сохранением id и счетчика AUTOINCREMENT.
+
+    Args:
+        conn(sqlite3.Connection): соединение с БД.
+    """
+    _rebuild_transactions(
+        conn,
+        _TRANSACTIONS_TABLE_SQL.format(amount_type='INTEGER', lookup_columns=_TEXT_LOOKUP_COLUMNS),
+        'INSERT INTO transactions (id, type, description, amount, category, source, date) '
+        f'SELECT id, type, description, CAST(ROUND(amount * {MINOR_UNITS}) AS INTEGER), category, source, date '
+        'FROM transactions_old'
+    )
+    _create_rollup_tables(conn, 'INTEGER', **_TEXT_ROLLUP_KEYS)
+    for trigger in _rollup_triggers_sql(**_TEXT_ROLLUP_KEYS):
+        conn.execute(trigger)
+    _fill_rollups(conn, **_TEXT_ROLLUP_KEYS)
+
+def _migrate_add_lookups(conn: sqlite3.Connection):
+    """
+    Миграция 5: выносит названия категорий и источников в справочники categories и sources.
+    Транзакции и таблицы сводных сумм хранят целочисленные id, группировка в отчетах идет по ним.
+    Для чтения транзакций с названиями создается представление transaction_rows.
+
+    Args:
+        conn(sqlite3.Connection): соединение с БД.
+    """
+    for column, table in _LOOKUP_TABLES.items():
+        conn.execute(f'CREATE TABLE {table} (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)')
+        conn.execute(f'INSERT INTO {table} (name) SELECT DISTINCT {column} FROM transactions '
+                     f'WHERE {column} IS NOT NULL ORDER BY {column}')
+    _rebuild_transactions(
+        conn,
+        _TRANSACTIONS_TABLE_SQL.format(amount_type='INTEGER', lookup_columns=_ID_LOOKUP_COLUMNS),
+        'INSERT INTO transactions (id, type, description, amount, category_id, source_id, date) '
+        'SELECT t.id, t.type, t.description, t.amount, c.id, s.id, t.date FROM transactions_old t '
+        'LEFT JOIN categories c ON c.name = t.category LEFT JOIN sources s ON s.name = t.source'
+    )
+    conn.execute('CREATE INDEX idx_transactions_category ON transactions(category_id, date)')
+    conn.execute('CREATE INDEX idx_transactions_source ON transactions(source_id, date)')
+    conn.execute(_ROWS_VIEW_SQL.format(currency=''))
+    _create_rollup_tables(conn, 'INTEGER', **_ID_ROLLUP_KEYS)
+    for trigger in _rollup_triggers_sql(**_ID_ROLLUP_KEYS):
+        conn.execute(trigger)
+    _fill_rollups(conn, **_ID_ROLLUP_KEYS)
+
+def _migrate_add_query_cache(conn: sqlite3.Connection):
+    """
+    Миграция 6: создает счетчик версии данных (cache_state) и таблицу сохраненных результатов запросов (query_cache),
+    см. fintracker.cache.
+
+    Args:
+        conn(sqlite3.Connection): соединение с БД.
+    """
+    conn.execute('CREATE TABLE cache_state (key TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+    conn.execute("INSERT INTO cache_state (key, value) VALUES ('data_version', 0)")
+    conn.execute('CREATE TABLE query_cache (key TEXT PRIMARY KEY, version INTEGER NOT NULL, value BLOB NOT NULL, '
+                 'used INTEGER NOT NULL, hits INTEGER NOT NULL)')
+
+def _migrate_add_ingest_state(conn: sqlite3.Connection):
+    """
+    Миграция 7: создает таблицу номеров последних записанных строк журналов BufferedWriter,
+    чтобы восстановление после сбоя не записывало строки повторно.
+
+    Args:
+        conn(sqlite3.Connection): соединение с БД.
+    """
+    conn.execute('CREATE TABLE ingest_state (log TEXT PRIMARY KEY, seq INTEGER NOT NULL)')
+
+def _fts5_available(conn: sqlite3.Connection) -> bool:
+    """Проверяет, собран ли SQLite с модулем полнотекстового поиска FTS5."""
+    try:
+        conn.execute('CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)')
+        conn.execute('DROP TABLE temp.fts5_probe')
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+# Текст, попадающий в полнотекстовый индекс: токенизатор unicode61 не приравнивает ё к е, поэтому замена выполняется заранее.
+_FTS_TEXT_SQL = "replace(replace({}, 'ё', 'е'), 'Ё', 'Е')"
+
+def _migrate_add_search(conn: sqlite3.Connection):
+    """
+    Миграция 8: создает полнотекстовый индекс FTS5 по описаниям транзакций (transactions_fts) и триггеры,
+    поддерживающие его при добавлении, изменении и удалении транзакций. Индекс хранит только токены (contentless),
+    сами описания читаются из transactions. Если SQLite собран без FTS5, индекс не создается
+    и search работает полным просмотром.
+
+    Args:
+        conn(sqlite3.Connection): соединение с БД.
+    """
+    if not _fts5_available(conn):
+        return
+    new_text, old_text = _FTS_TEXT_SQL.format('NEW.description'), _FTS_TEXT_SQL.format('OLD.description')
+    conn.execute("CREATE VIRTUAL TABLE transactions_fts USING fts5(description, content='', tokenize='unicode61 remove_diacritics 2')")
+    conn.execute(
+        'CREATE TRIGGER trg_fts_insert AFTER INSERT ON transactions BEGIN '
+        f'INSERT INTO transactions_fts (rowid, description) VALUES (NEW.id, {new_text}); END'
+    )
+    conn.execute(
+        'CREATE TRIGGER trg_fts_delete AFTER DELETE ON transactions BEGIN '
+        f"INSERT INTO transactions_fts (transactions_fts, rowid, description) VALUES ('delete', OLD.id, {old_text}); END"
+    )
+    conn.execute(
+        'CREATE TRIGGER trg_fts_update AFTER UPDATE OF description ON transactions BEGIN '
+        f"INSERT INTO transactions_fts (transactions_fts, rowid, description) VALUES ('delete', OLD.id, {old_text}); "
+        f'INSERT INTO transactions_fts (rowid, description) VALUES (NEW.id, {new_text}); END'
+    )
+    conn.execute(f"INSERT INTO transactions_fts (rowid, description) SELECT id, {_FTS_TEXT_SQL.format('description')} "
+                 "FROM transactions WHERE description IS NOT NULL")
+
+def _migrate_add_budgets(conn: sqlite3.Connection):
+    """
+    Миграция 9: создает таблицу месячных лимитов расходов по категориям (суммы в копейках).
+    Расходы категории за месяц берутся из monthly_totals, которую поддерживают триггеры.
+
+    Args:
+        conn(sqlite3.Connection): соединение с БД.
+    """
+    conn.execute('CREATE TABLE budgets (category_id INTEGER PRIMARY KEY REFERENCES categories(id), amount INTEGER NOT NULL)')
+
+def _migrate_add_recurring(conn: sqlite3.Connection):
+    """
+    Миграция 10: создает таблицу правил повторяющихся транзакций (см. fintracker.recurring).
+    last_date - дата последней созданной по правилу транзакции: следующая материализация начинается после нее.
+
+    Args:
+        conn(sqlite3.Connection): соединение с БД.
+    """
+    conn.execute(
+        'CREATE TABLE recurring (id INTEGER PRIMARY KEY AUTOINCREMENT, type TEXT NOT NULL, description TEXT NOT NULL, '
+        'amount INTEGER NOT NULL, category_id INTEGER REFERENCES categories(id), source_id INTEGER REFERENCES sources(id), '
+        'freq TEXT NOT NULL, every INTEGER NOT NULL, day INTEGER, start_date TEXT NOT NULL, end_date TEXT, last_date TEXT)'
+    )
+
+def _migrate_add_currency(conn: sqlite3.Connection):
+    """
+    Миграция 11: добавляет валюту транзакций и правил (существующие строки - в базовой валюте), разделяет
+    сводные суммы по валютам и создает таблицу курсов rates (сколько единиц базовой валюты стоит единица валюты
+    с указанной даты). Версия курсов (rates_version в cache_state) позволяет держать курсы в памяти процесса.
+
+    Args:
+        conn(sqlite3.Connection): соединение с БД.
+    """
+    conn.execute(f"ALTER TABLE transactions ADD COLUMN currency TEXT NOT NULL DEFAULT '{BASE_CURRENCY}'")
+    conn.execute(f"ALTER TABLE recurring ADD COLUMN currency TEXT NOT NULL DEFAULT '{BASE_CURRENCY}'")
+    conn.execute('DROP VIEW transaction_rows')
+    conn.execute(_ROWS_VIEW_SQL.format(currency=', t.currency AS currency'))
+    for trigger in ('trg_rollup_insert', 'trg_rollup_delete', 'trg_rollup_update'):
+        conn.execute(f'DROP TRIGGER {trigger}')
+    for table in _ROLLUP_TABLES:
+        conn.execute(f'DROP TABLE {table}')
+    _create_rollup_tables(conn, 'INTEGER', **_CURRENCY_ROLLUP_KEYS)
+    for trigger in _rollup_triggers_sql(**_CURRENCY_ROLLUP_KEYS):
+        conn.execute(trigger)
+    _fill_rollups(conn, **_CURRENCY_ROLLUP_KEYS)
+    conn.execute('CREATE TABLE rates (currency TEXT NOT NULL, date TEXT NOT NULL, rate REAL NOT NULL, '
+                 'PRIMARY KEY (currency, date)) WITHOUT ROWID')
+    conn.execute("INSERT INTO cache_state (key, value) VALUES ('rates_version', 0)")
+
+_MIGRATIONS = [_migrate_add_id, _migrate_add_rollups, _migrate_add_backup_state, _migrate_amount_minor,
+               _migrate_add_lookups, _migrate_add_query_cache, _migrate_add_ingest_state, _migrate_add_search,
+               _migrate_add_budgets, _migrate_add_recurring, _migrate_add_currency]
+
+def _init_schema(conn: sqlite3.Connection):
+    """
+    Приводит схему БД к актуальной версии, выполняя недостающие миграции из _MIGRATIONS.
+    Номер версии схемы хранится в PRAGMA user_version.
+
+    Args:
+        conn(sqlite3.Connection): соединение с БД.
+    """
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for number, migration in enumerate(_MIGRATIONS, start=1):
+        if version >= number:
+            continue
+        conn.execute('BEGIN')
+        try:
+            migration(conn)
+            conn.execute(f'PRAGMA user_version = {number}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+def _lookup_id(conn: sqlite3.Connection, column: str, name: str, create: bool = True) -> int:
+    """
+    Находит id названия в справочнике категорий или источников.
+
+    Args:
+        conn(sqlite3.Connection): соединение с БД.
+        column(str): 'category' или 'source'.
+        name(str): название.
+        create(bool): добавить название в справочник, если его там нет.
+
+    Returns:
+        id названия или None, если его нет в справочнике.
+    """
+    table = _LOOKUP_TABLES[column]
+    if create:
+        conn.execute(f'INSERT INTO {table} (name) VALUES (?) ON CONFLICT (name) DO NOTHING', (name,))
+    row = conn.execute(f'SELECT id FROM {table} WHERE name = ?', (name,)).fetchone()
+    return row[0] if row else None
+
+class StorageEngine:
+    """
+    Хранилище транзакций: владеет долгоживущими соединениями с БД.
+    Запись идет через одно соединение под блокировкой, чтение - через отдельные соединения каждого потока.
+    БД работает в режиме WAL, поэтому отчеты, читающие данные, не блокируют добавление транзакций.
+    """
+    def __init__(self, path: str, mmap_size: int = 256 * 1024 * 1024, cache_size_kib: int = 64 * 1024, busy_timeout: float = 5.0):
+        """Инициализирует новый объект StorageEngine. Соединения открываются при первом обращении.
+
+        Args:
+            path(str): путь к файлу БД.
+            mmap_size(int): размер области memory-mapped I/O в байтах (PRAGMA mmap_size).
+            cache_size_kib(int): размер кэша страниц в КиБ (PRAGMA cache_size).
+            busy_timeout(float): время ожидания блокировки БД в секундах.
+        """
+        self.path = path
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+        self.busy_timeout = busy_timeout
+        self._lock = threading.RLock()
+        self._connections_lock = threading.Lock()
+        self._local = threading.local()
+        self._writer = None
+        self._connections = []
+        self._lookup_ids = {column: {} for column in _LOOKUP_TABLES}
+        self.cache = QueryCache()
+        self.rates = None  # (версия курсов, датафрейм курсов), см. _rate_frame
+
+    def _open(self) -> sqlite3.Connection:
+        """
+        Открывает новое соединение и настраивает его PRAGMA.
+
+        Returns:
+            conn: соединение с БД.
+        """
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute(f'PRAGMA mmap_size = {int(self.mmap_size)}')
+        conn.execute(f'PRAGMA cache_size = {-int(self.cache_size_kib)}')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
+    def writer(self) -> sqlite3.Connection:
+        """
+        Возвращает соединение для записи, при первом обращении создает или обновляет схему (см. _init_schema).
+
+        Returns:
+            conn: соединение с БД.
+        """
+        with self._lock:
+            if self._writer is None:
+                directory = os.path.dirname(self.path)
+                if self.path != MEMORY and directory:
+                    os.makedirs(directory, exist_ok=True)
+                conn = self._open()
+                _init_schema(conn)
+                self._writer = conn
+            return self._writer
+
+    def reader(self) -> sqlite3.Connection:
+        """
+        Возвращает соединение для чтения, принадлежащее текущему потоку.
+        БД в памяти (':memory:') существует только внутри одного соединения, поэтому для нее возвращается соединение для записи.
+
+        Returns:
+            conn: соединение с БД.
+        """
+        if self.path == MEMORY:
+            return self.writer()
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self._writer is None:
+                self.writer()
+            conn = self._local.conn = self._open()
+        return conn
+
+    @contextmanager
+    def write(self):
+        """
+        Контекстный менеджер записи: выдает соединение для записи под блокировкой
+        и фиксирует изменения (или откатывает их при ошибке) на выходе.
+
+        Yields:
+            conn: соединение для записи.
+        """
+        with self._lock:
+            conn = self.writer()
+            try:
+                with conn:
+                    yield conn
+            except BaseException:
+                # id, выданные справочниками в откаченной транзакции, больше не существуют
+                for ids in self._lookup_ids.values():
+                    ids.clear()
+                raise
+
+    def lookup_id(self, conn: sqlite3.Connection, column: str, name: str) -> int:
+        """
+        Возвращает id названия категории или источника, добавляя его в справочник при необходимости.
+        Соответствие названий и id кэшируется, поэтому обращение к справочнику нужно только для новых названий.
+
+        Args:
+            conn(sqlite3.Connection): соединение для записи (внутри write()).
+            column(str): 'category' или 'source'.
+            name(str): название.
+
+        Returns:
+            id названия или None, если название не задано.
+        """
+        if name is None:
+            return None
+        ids = self._lookup_ids[column]
+        lookup_id = ids.get(name)
+        if lookup_id is None:
+            lookup_id = ids[name] = _lookup_id(conn, column, name)
+        return lookup_id
+
+    def find_id(self, column: str, name: str) -> int:
+        """
+        Возвращает id названия категории или источника, не изменяя справочник.
+
+        Args:
+            column(str): 'category' или 'source'.
+            name(str): название.
+
+        Returns:
+            id названия или None, если такого названия нет.
+        """
+        ids = self._lookup_ids[column]
+        lookup_id = ids.get(name)
+        if lookup_id is None:
+            lookup_id = _lookup_id(self.reader(), column, name, create=False)
+            if lookup_id is not None:
+                ids[name] = lookup_id
+        return lookup_id
+
+    def resolve_row(self, conn: sqlite3.Connection, row: tuple) -> tuple:
+        """
+        Заменяет в строке названия категории и источника на их id для _INSERT_SQL.
+
+        Args:
+            conn(sqlite3.Connection): соединение для записи (внутри write()).
+            row(tuple): (type, description, amount, category, source, date, currency); строки без валюты
+                (журналы BufferedWriter, записанные до миграции 11) - в базовой валюте.
+
+        Returns:
+            row: (type, description, amount, category_id, source_id, date, currency).
+        """
+        kind, description, amount, category, source, date = row[:6]
+        return (kind, description, amount, self.lookup_id(conn, 'category', category),
+                self.lookup_id(conn, 'source', source), date, row[6] if len(row) > 6 else BASE_CURRENCY)
+
+    def close(self):
+        """Закрывает все открытые соединения."""
+        with self._lock, self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+            self._writer = None
+            self._local = threading.local()
+            self._lookup_ids = {column: {} for column in _LOOKUP_TABLES}
+            self.cache.clear()
+
+def get_engine() -> StorageEngine:
+    """
+    Возвращает общее для модуля хранилище, создавая его при первом обращении.
+    Если DATA_FILE изменился, старое хранилище закрывается и создается новое.
+
+    Returns:
+        engine: хранилище для DATA_FILE.
+    """
+    global _engine
+    data_file = _setting('DATA_FILE')
+    if _engine is None or _engine.path != data_file:
+        if _engine is not None:
+            _engine.close()
+        _engine = StorageEngine(data_file)
+    return _engine
+
+def close_engine():
+    """Закрывает общее хранилище, если оно открыто."""
+    global _engine
+    if _engine is not None:
+        _engine.close()
+    _engine = None
+
+def configure(data_file: str = None, backup_file: str = None, backup_dir: str = None, cache: str = None):
+    """
+    Переключает модуль на другую БД и/или файл и каталог резервных копий, режим кэша запросов.
+
+    Args:
+        data_file(str): путь к БД (поддерживаются ':memory:', 'tmpfs', 'tmpfs:имя.db', см. fintracker.config).
+        backup_file(str): путь к CSV файлу резервной копии.
+        backup_dir(str): каталог снимков и инкрементальных сегментов.
+        cache(str): режим кэша - 'off', 'memory' или 'persist' (см. fintracker.config.resolve_cache_mode).
+    """
+    global DATA_FILE, BACKUP_FILE, BACKUP_DIR, CACHE_MODE
+    if cache:
+        CACHE_MODE = resolve_cache_mode(cache)
+    if data_file:
+        close_engine()
+        DATA_FILE = expand_db_path(data_file)
+    if backup_file:
+        BACKUP_FILE = os.path.expanduser(backup_file)
+    if backup_dir:
+        BACKUP_DIR = os.path.expanduser(backup_dir)
+
+def _bump_version(conn: sqlite3.Connection):
+    """
+    Увеличивает версию данных, делая недействительными все закэшированные результаты.
+    Вызывается внутри транзакции каждой функции, изменяющей транзакции.
+
+    Args:
+        conn(sqlite3.Connection): соединение для записи.
+    """
+    conn.execute("UPDATE cache_state SET value = value + 1 WHERE key = 'data_version'")
+
+def data_version() -> int:
+    """
+    Возвращает текущую версию данных (растет при каждом изменении транзакций, в том числе из других процессов).
+
+    Returns:
+        номер версии.
+    """
+    return get_engine().reader().execute("SELECT value FROM cache_state WHERE key = 'data_version'").fetchone()[0]
+
+def cached_queries(names: list, start_date: datetime, end_date: datetime, compute) -> dict:
+    """
+    Возвращает результаты нескольких запросов за период из кэша. Если хотя бы одного нет,
+    вызывает compute() один раз и кэширует все его результаты.
+    Ключ кэша - (имя запроса, начальная дата, конечная дата), результат действителен, пока не изменилась версия данных.
+
+    Args:
+        names(list): имена запросов.
+        start_date(datetime): начальная дата периода.
+        end_date(datetime): конечная дата периода.
+        compute: функция без аргументов, возвращающая словарь {имя запроса: результат}.
+
+    Returns:
+        словарь {имя запроса: результат} (копии закэшированных значений).
+    """
+    if _setting('CACHE_MODE') == 'off':
+        return compute()
+    engine = get_engine()
+    version = data_version()
+    start = _to_db_date(start_date) if start_date else None
+    end = _to_db_date(end_date) if end_date else None
+    keys = {name: make_key(name, start, end) for name in names}
+    results = {}
+    for name, key in keys.items():
+        found, value = engine.cache.get(key, version)
+        if not found and _setting('CACHE_MODE') == 'persist':
+            found, value = load_persisted(engine.reader(), key, version)
+            if found:
+                engine.cache.persistent_hits += 1
+                engine.cache.put(key, version, value)
+                with engine.write() as conn:
+                    touch_persisted(conn, key)
+        if not found:
+            break
+        results[name] = copy_value(value)
+    else:
+        return results
+
+    engine.cache.misses += 1
+    results = compute()
+    for name, key in keys.items():
+        engine.cache.put(key, version, results[name])
+    if _setting('CACHE_MODE') == 'persist':
+        with engine.write() as conn:
+            for name, key in keys.items():
+                store_persisted(conn, key, version, results[name])
+    return {name: copy_value(value) for name, value in results.items()}
+
+def cached_query(name: str, start_date: datetime, end_date: datetime, compute):
+    """
+    Возвращает результат запроса за период из кэша или вычисляет и кэширует его (см. cached_queries).
+
+    Args:
+        name(str): имя запроса.
+        start_date(datetime): начальная дата периода.
+        end_date(datetime): конечная дата периода.
+        compute: функция без аргументов, вычисляющая результат.
+
+    Returns:
+        результат запроса.
+    """
+    return cached_queries([name], start_date, end_date, lambda: {name: compute()})[name]
+
+def cache_stats() -> dict:
+    """
+    Возвращает счетчики кэша запросов текущего процесса и сведения о таблице query_cache.
+
+    Returns:
+        словарь с ключами mode, hits, misses, persistent_hits, entries, persistent_entries, persistent_total_hits, data_version.
+    """
+    engine = get_engine()
+    entries, total_hits = engine.reader().execute('SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM query_cache').fetchone()
+    return {'mode': _setting('CACHE_MODE'), **engine.cache.stats(), 'persistent_entries': entries,
+            'persistent_total_hits': total_hits, 'data_version': data_version()}
+
+def clear_cache():
+    """Очищает кэш запросов в памяти и таблицу query_cache."""
+    engine = get_engine()
+    engine.cache.clear()
+    with engine.write() as conn:
+        conn.execute('DELETE FROM query_cache')
+
+def _to_db_date(value: datetime) -> str:
+    """
+    Приводит дату к строковому виду, в котором она хранится в БД (YYYY-MM-DD HH:MM:SS[.ffffff]).
+
+    Args:
+        value(datetime): дата.
+
+    Returns:
+        строка с датой, сравнимая с колонкой date.
+    """
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    return f"{value.isoformat()} 00:00:00"
+
+def _date_filter(start_date: datetime = None, end_date: datetime = None, conditions: list = None, params: list = None,
+                 column: str = 'date') -> tuple:
+    """
+    Формирует условие WHERE по диапазону дат.
+
+    Args:
+        start_date(datetime): начальная дата фильтрации.
+        end_date(datetime): конечная дата фильтрации.
+        conditions(list): дополнительные условия, объединяемые через AND.
+        params(list): параметры дополнительных условий.
+        column(str): колонка даты (с псевдонимом таблицы, если нужно).
+
+    Returns:
+        (where, params): текст условия (пустая строка, если условий нет) и параметры запроса.
+    """
+    conditions = list(conditions or [])
+    params = list(params or [])
+    if start_date and end_date:
+        conditions.insert(0, f'{column} BETWEEN ? AND ?')
+        params[:0] = [_to_db_date(start_date), _to_db_date(end_date)]
+    elif start_date:
+        conditions.insert(0, f'{column} >= ?')
+        params.insert(0, _to_db_date(start_date))
+    elif end_date:
+        conditions.insert(0, f'{column} <= ?')
+        params.insert(0, _to_db_date(end_date))
+    if not conditions:
+        return '', []
+    return ' WHERE ' + ' AND '.join(conditions), params
+
+def _rollup_segments(start_date: datetime = None, end_date: datetime = None) -> list:
+    """
+    Разбивает период на части: целые месяцы берутся из monthly_totals, целые дни - из daily_totals,
+    а неполные крайние дни - из самих транзакций.
+
+    Args:
+        start_date(datetime): начальная дата (включительно).
+        end_date(datetime): конечная дата (включительно).
+
+    Returns:
+        segments: список (источник, нижняя граница, верхняя граница, верхняя граница включительно),
+        где источник - 'transactions', 'daily_totals' или 'monthly_totals', а None означает отсутствие границы.
+    """
+    if start_date is not None and not isinstance(start_date, datetime):
+        start_date = datetime.combine(start_date, time.min)
+    if end_date is not None and not isinstance(end_date, datetime):
+        end_date = datetime.combine(end_date, time.max)
+    segments = []
+
+    first_day = None
+    if start_date:
+        first_day = start_date.date() if start_date.time() == time.min else start_date.date() + timedelta(days=1)
+    last_day = None  # первый день после последнего полностью входящего в период
+    if end_date:
+        last_day = end_date.date() + timedelta(days=1) if end_date.time() == time.max else end_date.date()
+
+    if first_day and last_day and first_day >= last_day:
+        return [('transactions', _to_db_date(start_date), _to_db_date(end_date), True)]
+    if start_date and start_date.time() != time.min:
+        segments.append(('transactions', _to_db_date(start_date), _to_db_date(first_day), False))
+    if end_date and end_date.time() != time.max:
+        segments.append(('transactions', _to_db_date(last_day), _to_db_date(end_date), True))
+
+    first_month = None
+    if first_day:
+        first_month = first_day if first_day.day == 1 else (first_day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    last_month = last_day.replace(day=1) if last_day else None
+
+    def day_key(value):
+        return value.isoformat() if value else None
+
+    def month_key(value):
+        return value.isoformat()[:7] if value else None
+
+    if first_month is None or last_month is None or first_month < last_month:
+        segments.append(('monthly_totals', month_key(first_month), month_key(last_month), False))
+        if first_day and first_day < first_month:
+            segments.append(('daily_totals', day_key(first_day), day_key(first_month), False))
+        if last_day and last_month < last_day:
+            segments.append(('daily_totals', day_key(last_month), day_key(last_day), False))
+    else:
+        segments.append(('daily_totals', day_key(first_day), day_key(last_day), False))
+    return segments
+
+def _rollup_source(start_date: datetime = None, end_date: datetime = None, by_day: bool = False,
+                   currency_match: str = None) -> tuple:
+    """
+    Формирует подзапрос с суммами за период на основе _rollup_segments (суммы - в валютах транзакций).
+
+    Args:
+        start_date(datetime): начальная дата (включительно).
+        end_date(datetime): конечная дата (включительно).
+        by_day(bool): добавить колонку day (YYYY-MM-DD); целые месяцы тогда берутся из daily_totals, а не из monthly_totals.
+        currency_match(str): '=' - только суммы в базовой валюте, '!=' - только в других валютах, None - все.
+
+    Returns:
+        (sql, params): подзапрос с колонками type, category_id, source_id, currency, total, count (и day при by_day)
+        и его параметры (0 - нет категории или источника).
+    """
+    parts, params = [], []
+    for table, low, high, inclusive in _rollup_segments(start_date, end_date):
+        if table == 'transactions':
+            column = 'date'
+            select = ("SELECT type, COALESCE(category_id, 0) AS category_id, COALESCE(source_id, 0) AS source_id, currency, "
+                      "amount AS total, 1 AS count" + (", substr(date, 1, 10) AS day" if by_day else "") + " FROM transactions")
+        else:
+            # Границы месяцев (YYYY-MM) сравниваются с днями (YYYY-MM-DD) как строки: '2026-03-05' >= '2026-03' и < '2026-04'
+            table = 'daily_totals' if by_day else table
+            column = 'period'
+            select = ("SELECT type, category_id, source_id, currency, total, count" + (", period AS day" if by_day else "")
+                      + f" FROM {table}")
+        conditions = []
+        if currency_match:
+            conditions.append(f'currency {currency_match} ?')
+            params.append(BASE_CURRENCY)
+        if low is not None:
+            conditions.append(f'{column} >= ?')
+            params.append(low)
+        if high is not None:
+            conditions.append(f'{column} <= ?' if inclusive else f'{column} < ?')
+            params.append(high)
+        parts.append(select + (' WHERE ' + ' AND '.join(conditions) if conditions else ''))
+    return '(' + ' UNION ALL '.join(parts) + ')', params
+
+def _has_foreign_currency(conn: sqlite3.Connection, start_date: datetime = None, end_date: datetime = None) -> bool:
+    """
+    Проверяет по monthly_totals, есть ли за месяцы периода транзакции не в базовой валюте.
+
+    Args:
+        conn(sqlite3.Connection): соединение с БД.
+        start_date(datetime): начальная дата.
+        end_date(datetime): конечная дата.
+
+    Returns:
+        True, если такие транзакции есть (возможно, за пределами периода, но в его крайних месяцах).
+    """
+    conditions, params = ['currency != ?'], [BASE_CURRENCY]
+    if start_date:
+        conditions.append('period >= ?')
+        params.append(start_date.strftime('%Y-%m'))
+    if end_date:
+        conditions.append('period <= ?')
+        params.append(end_date.strftime('%Y-%m'))
+    query = f"SELECT 1 FROM monthly_totals WHERE {' AND '.join(conditions)} LIMIT 1"
+    return conn.execute(query, params).fetchone() is not None
+
+def _rate_frame() -> 'pd.DataFrame':
+    """
+    Возвращает курсы валют из таблицы rates, отсортированные по дате. Курсы загружаются один раз и хранятся
+    в памяти процесса до изменения версии курсов (rates_version), в том числе другим процессом.
+
+    Returns:
+        датафрейм с колонками currency, date (datetime64), rate.
+    """
+    import pandas as pd
+
+    engine = get_engine()
+    conn = engine.reader()
+    version = conn.execute("SELECT value FROM cache_state WHERE key = 'rates_version'").fetchone()[0]
+    cached = engine.rates
+    if cached is None or cached[0] != version:
+        frame = pd.read_sql('SELECT currency, date, rate FROM rates ORDER BY date, currency', conn)
+        frame['date'] = pd.to_datetime(frame['date'], format='%Y-%m-%d').astype('datetime64[ns]')
+        # Ключи merge_asof должны иметь одинаковый тип с обеих сторон (у пустого результата read_sql - object)
+        frame['currency'] = frame['currency'].astype('string')
+        engine.rates = cached = (version, frame)
+    return cached[1]
+
+def convert_totals(frame: 'pd.DataFrame') -> 'pd.DataFrame':
+    """
+    Пересчитывает суммы в базовую валюту одним векторным соединением с курсами (pandas.merge_asof по дате
+    с группировкой по валюте): для каждой строки берется последний курс ее валюты на ее день или раньше.
+    Суммы округляются до копейки; строки в базовой валюте не меняются.
+
+    Args:
+        frame(pd.DataFrame): колонки currency, day (YYYY-MM-DD или datetime64), total (в сотых долях валюты).
+
+    Returns:
+        копия frame, где total - в копейках базовой валюты, а currency - BASE_CURRENCY.
+
+    Raises:
+        ValueError: Если для валюты нет курса на день суммы или раньше.
+    """
+    import numpy as np
+    import pandas as pd
+
+    foreign = (frame['currency'] != BASE_CURRENCY).to_numpy()
+    if not foreign.any():
+        return frame
+    keys = pd.DataFrame({'currency': pd.array(frame['currency'].to_numpy(dtype=object)[foreign], dtype='string'),
+                         'day': pd.to_datetime(frame['day'].to_numpy()[foreign]).astype('datetime64[ns]'),
+                         'row': np.flatnonzero(foreign)}).sort_values('day', kind='stable')
+    rate_frame = _rate_frame()
+    unknown = ~keys['currency'].isin(rate_frame['currency']).to_numpy()
+    if unknown.any():
+        currency, day = keys.loc[unknown, ['currency', 'day']].iloc[0]
+        raise ValueError(f"Нет курса {currency} на {day.strftime('%Y-%m-%d')} или раньше (загрузите курсы командой rates load).")
+    rates = pd.merge_asof(keys, rate_frame, left_on='day', right_on='date', by='currency', direction='backward')
+    missing = rates['rate'].isna().to_numpy()
+    if missing.any():
+        currency, day = rates.loc[missing, ['currency', 'day']].iloc[0]
+        raise ValueError(f"Нет курса {currency} на {day.strftime('%Y-%m-%d')} или раньше (загрузите курсы командой rates load).")
+    rows = rates['row'].to_numpy()
+    totals = frame['total'].to_numpy(dtype=np.int64).copy()
+    totals[rows] = np.rint(totals[rows] * rates['rate'].to_numpy())
+    result = frame.copy()
+    result['total'] = totals
+    result['currency'] = BASE_CURRENCY
+    return result
+
+def _converted_totals(conn: sqlite3.Connection, start_date: datetime = None, end_date: datetime = None) -> 'pd.DataFrame':
+    """
+    Суммирует транзакции не в базовой валюте по дням (SQLite) и пересчитывает суммы в базовую валюту (convert_totals).
+
+    Args:
+        conn(sqlite3.Connection): соединение с БД.
+        start_date(datetime): начальная дата (включительно).
+        end_date(datetime): конечная дата (включительно).
+
+    Returns:
+        датафрейм с колонками type, category_id, source_id, total, count, day; суммы - в копейках базовой валюты.
+    """
+    import pandas as pd
+
+    source, params = _rollup_source(start_date, end_date, by_day=True, currency_match='!=')
+    query = (f"SELECT type, category_id, source_id, currency, SUM(total) AS total, SUM(count) AS count, day FROM {source} "
+             "GROUP BY day, currency, type, category_id, source_id")
+    frame = convert_totals(pd.read_sql(query, conn, params=params))
+    return frame[['type', 'category_id', 'source_id', 'total', 'count', 'day']]
+
+def _totals_source(start_date: datetime = None, end_date: datetime = None, by_day: bool = False) -> tuple:
+    """
+    Формирует подзапрос с суммами за период в базовой валюте. Если за период есть только транзакции в базовой валюте,
+    это запрос к сводным суммам (см. _rollup_source). Иначе суммы в других валютах пересчитываются по дням
+    (см. _converted_totals) и передаются в SQLite одним параметром JSON, так что запросы отчетов не меняются.
+
+    Args:
+        start_date(datetime): начальная дата (включительно).
+        end_date(datetime): конечная дата (включительно).
+        by_day(bool): добавить колонку day (YYYY-MM-DD); целые месяцы тогда берутся из daily_totals, а не из monthly_totals.
+
+    Returns:
+        (sql, params): подзапрос с колонками type, category_id, source_id, currency, total, count (и day при by_day)
+        и его параметры (0 - нет категории или источника).
+
+    Raises:
+        ValueError: Если для суммы не в базовой валюте нет курса.
+    """
+    conn = get_engine().reader()
+    if not _has_foreign_currency(conn, start_date, end_date):
+        return _rollup_source(start_date, end_date, by_day)
+    source, params = _rollup_source(start_date, end_date, by_day, currency_match='=')
+    converted = ("SELECT json_extract(value, '$[0]') AS type, json_extract(value, '$[1]') AS category_id, "
+                 "json_extract(value, '$[2]') AS source_id, ? AS currency, json_extract(value, '$[3]') AS total, "
+                 "json_extract(value, '$[4]') AS count" + (", json_extract(value, '$[5]') AS day" if by_day else "")
+                 + " FROM json_each(?)")
+    rows = _converted_totals(conn, start_date, end_date).to_json(orient='values', force_ascii=False)
+    return f'(SELECT * FROM {source} UNION ALL {converted})', params + [BASE_CURRENCY, rows]
+
+def _load_transactions(start_date: datetime = None, end_date: datetime = None) -> 'pd.DataFrame':
     """
     Загружает транзакции из базы данных и преобразует их в DataFrame.
+    Фильтрация по датам выполняется на стороне SQLite по индексу idx_transactions_date.
+
+    Args:
+        start_date(datetime): начальная дата фильтрации.
+        end_date(datetime): конечная дата фильтрации.
+
     Returns:
-        df: Датафрейм с транзакциями.
+        df: Датафрейм с транзакциями, индекс - id транзакции, суммы - в рублях.
     Raises:
         Exceprion: Если произошла ошибка при чтении БД.
     """
+    import pandas as pd
+
     try:
-        conn = sqlite3.connect(DATA_FILE)
-        query = 'SELECT * From transactions ORDER BY date ASC'
-        df = pd.read_sql(query, conn)
-        df['date'] = pd.to_datetime(df['date'])
-        conn.close()
+        where, params = _date_filter(start_date, end_date)
+        query = f'SELECT {", ".join(_COLUMNS)} FROM transaction_rows{where} ORDER BY date ASC, id ASC'
+        df = pd.read_sql(query, get_engine().reader(), params=params, index_col='id')
+        df['amount'] = df['amount'] / MINOR_UNITS
+        df['date'] = pd.to_datetime(df['date'], format='ISO8601')
         return df
     except Exception as e:
         print(f"Ошибка при чтении БД: {e}")
-        return pd.DataFrame(columns=['type', 'description', 'amount', 'category', 'source', 'date'])
+        return pd.DataFrame(columns=_COLUMNS).set_index('id')
 
-def _save_transactions(df: pd.DataFrame):
+def _transaction_row(transaction) -> tuple:
     """
-    Сохраняет транзакции в БД
+    Преобразует транзакцию в кортеж значений для _INSERT_SQL.
 
-       Args:
-           df(pd.DataFrame): Датафрейм с транзакциями
+    Args:
+        transaction(Expense | Income): транзакция.
 
-       Raises:
-            Exceprion: Если произошла ошибка при чтении файла.
+    Returns:
+        row: кортеж (type, description, amount, category, source, date, currency) с суммой в копейках
+        или None для неподдерживаемого типа.
+    """
+    if isinstance(transaction, Expense):
+        return (EXPENSE_TYPE, transaction.description, transaction.amount_minor, transaction.category, None,
+                _to_db_date(transaction.date), transaction.currency)
+    if isinstance(transaction, Income):
+        return (INCOME_TYPE, transaction.description, transaction.amount_minor, None, transaction.source,
+                _to_db_date(transaction.date), transaction.currency)
+    return None
+
+def _batch_rows(batch: TransactionBatch):
     """
+    Преобразует пачку TransactionBatch в кортежи значений для _INSERT_SQL, не создавая объектов моделей.
+
+    Args:
+        batch(TransactionBatch): пачка транзакций.
+
+    Yields:
+        row: кортеж (type, description, amount, category, source, date, currency).
+    """
+    labels = batch.labels + [None]  # код -1 указывает на последний элемент - None
+    kinds = [EXPENSE_TYPE if kind == EXPENSE else INCOME_TYPE for kind in batch.kinds.tolist()]
+    return zip(kinds, batch.descriptions, batch.amounts.tolist(),
+               [labels[code] for code in batch.category_codes.tolist()],
+               [labels[code] for code in batch.source_codes.tolist()],
+               batch.date_strings(), batch.currencies())
+
+def add_expense(transaction):
+    """
+    Записывает транзакцию (расход или доход) в БД одним подготовленным INSERT без чтения существующих строк.
+
+    Args:
+        transaction(Expense | Income): транзакция для записи.
+
+    Raises:
+        Exceprion: Если произошла ошибка при записи в БД.
+    """
+    row = _transaction_row(transaction)
+    if row is None:
+        print("Неподдерживаемый тип транзакции.")
+        return
     try:
-        conn = sqlite3.connect(DATA_FILE)
-        df.to_sql('transactions', conn, if_exists='append', index=False)
-        print(f"Данные успешно записаны в базу данных")
-        conn.close()
+        engine = get_engine()
+        with engine.write() as conn:
+            conn.execute(_INSERT_SQL, engine.resolve_row(conn, row))
+            _bump_version(conn)
     except Exception as e:
         print(f"Ошибка при записи данных в БД: {e}")
-def add_expense(transaction):
+
+def _transaction_rows(transactions):
     """
-    Подготавливает данные для записи в файл
+    Преобразует транзакции в кортежи значений для _INSERT_SQL (см. _transaction_row и _batch_rows).
+
+    Args:
+        transactions: итерируемый объект с Expense/Income или TransactionBatch.
 
     Returns:
-        new_row: подготовленный датафрейм для записи в таблицу.
+        итератор кортежей (type, description, amount, category, source, date, currency); для неподдерживаемых типов - None.
     """
-    df = _load_transactions()
-    if isinstance(transaction, Expense):
-        new_row = pd.DataFrame([{
-            'type': 'Расход',
-            'description': transaction.description,
-            'amount': transaction.amount,
-            'category': transaction.category,
-            'source': None,
-            'date': transaction.date
-        }])
-    elif isinstance(transaction, Income):
-        new_row = pd.DataFrame([{
-            'type': 'Доход',
-            'description': transaction.description,
-            'amount': transaction.amount,
-            'category': None,
-            'source': transaction.source,
-            'date': transaction.date
-        }])
-    else:
-        print("Неподдерживаемый тип транзакции.")
-        return
+    if isinstance(transactions, TransactionBatch):
+        return _batch_rows(transactions)
+    return (_transaction_row(transaction) for transaction in transactions)
+
+def _write_rows(engine: StorageEngine, conn: sqlite3.Connection, rows, batch_size: int = 1000) -> int:
+    """
+    Записывает строки пачками через executemany, заменяя названия категорий и источников на id.
+    Вызывается внутри engine.write(), версия данных не меняется.
+
+    Args:
+        engine(StorageEngine): хранилище.
+        conn(sqlite3.Connection): соединение для записи.
+        rows: итерируемый объект с кортежами (type, description, amount, category, source, date, currency); None пропускаются.
+        batch_size(int): размер пачки для executemany.
+
+    Returns:
+        count: количество записанных строк.
+    """
+    count = 0
+    batch = []
+    for row in rows:
+        if row is None:
+            continue
+        batch.append(engine.resolve_row(conn, row))
+        if len(batch) >= batch_size:
+            conn.executemany(_INSERT_SQL, batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        conn.executemany(_INSERT_SQL, batch)
+        count += len(batch)
+    return count
 
-    _save_transactions(new_row)
+def bulk_insert(transactions, batch_size: int = 1000) -> int:
+    """
+    Записывает поток транзакций в БД пачками через executemany в рамках одной SQL-транзакции.
+    Названия категорий и источников заменяются на id по кэшу справочников. Транзакции неподдерживаемого типа пропускаются.
+
+    Args:
+        transactions: итерируемый объект с Expense/Income (может быть генератором) или TransactionBatch.
+        batch_size(int): размер пачки для executemany.
+
+    Returns:
+        count: количество записанных транзакций.
+
+    Raises:
+        ValueError: Если batch_size меньше 1.
+        sqlite3.Error: Если произошла ошибка при записи (все изменения откатываются).
+    """
+    if batch_size < 1:
+        raise ValueError("Размер пачки должен быть положительным числом.")
+    engine = get_engine()
+    with engine.write() as conn:
+        count = _write_rows(engine, conn, _transaction_rows(transactions), batch_size)
+        if count:
+            _bump_version(conn)
+    return count
+
+# Режимы надежности BufferedWriter: memory - строки только в памяти (теряются при сбое процесса),
+# log - строки дописываются в журнал (переживают сбой процесса), fsync - журнал сбрасывается на диск при каждом add
+# (переживает отключение питания).
+DURABILITY_MODES = ('memory', 'log', 'fsync')
+
+class BufferedWriter:
+    """
+    Буфер записи транзакций с групповой фиксацией: add только запоминает транзакцию (и дописывает ее в журнал),
+    а в БД накопленные транзакции записываются одной SQL-транзакцией - при накоплении max_rows строк,
+    через max_delay секунд после первой незаписанной строки, при flush() или close().
+
+    Журнал - текстовый файл, по строке JSON [номер, type, description, amount, category, source, date] на транзакцию.
+    Номер последней записанной строки сохраняется в таблице ingest_state в той же SQL-транзакции, что и сами строки,
+    поэтому после сбоя новый BufferedWriter при создании дописывает в БД только незаписанные строки журнала.
+    """
+    def __init__(self, log_path: str = None, durability: str = 'log', max_rows: int = 1000, max_delay: float = 1.0):
+        """Инициализирует новый объект BufferedWriter и восстанавливает строки журнала, оставшиеся после сбоя.
+
+        Args:
+            log_path(str): путь к журналу (по умолчанию - файл БД с суффиксом '-ingest.log'); не используется в режиме memory.
+            durability(str): режим надежности из DURABILITY_MODES.
+            max_rows(int): количество строк, при котором буфер записывается в БД.
+            max_delay(float): максимальное время в секундах, которое строка ждет записи в БД (0 - без фоновой записи).
+
+        Raises:
+            ValueError: Если режим надежности неизвестен, max_rows меньше 1 или для БД в памяти не указан журнал.
+        """
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Неизвестный режим надежности: {durability!r}. Допустимые значения: memory, log, fsync.")
+        if max_rows < 1:
+            raise ValueError("Размер буфера должен быть положительным числом.")
+        self.engine = get_engine()
+        if durability != 'memory' and log_path is None:
+            if self.engine.path == MEMORY:
+                raise ValueError("Для БД в памяти нужно указать путь к журналу или режим memory.")
+            log_path = self.engine.path + '-ingest.log'
+        self.log_path = os.path.abspath(log_path) if durability != 'memory' else None
+        self.durability = durability
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.commits = 0
+        self._rows = []
+        self._first_added = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._closed = False
+        self._log = None
+        self._seq = 0
+        if self.log_path:
+            self._recover()
+            self._log = open(self.log_path, 'a', encoding='utf-8')
+        self._timer = None
+        if max_delay > 0:
+            self._timer = threading.Thread(target=self._run_timer, name='fintr-buffered-writer', daemon=True)
+            self._timer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _applied_seq(self, conn: sqlite3.Connection) -> int:
+        """Возвращает номер последней строки журнала, записанной в БД."""
+        row = conn.execute('SELECT seq FROM ingest_state WHERE log = ?', (self.log_path,)).fetchone()
+        return row[0] if row else 0
+
+    def _recover(self) -> int:
+        """
+        Записывает в БД строки журнала, не попавшие в нее из-за сбоя, и очищает журнал. Вызывается из __init__
+        до начала буферизации; строки, уже находящиеся в буфере, сначала записываются, чтобы не попасть в БД дважды.
+
+        Returns:
+            count: количество восстановленных транзакций.
+        """
+        if not self.log_path:
+            return 0
+        import json
+        with self._lock:
+            self._flush()
+            entries = []
+            if os.path.exists(self.log_path):
+                with open(self.log_path, encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            entries.append(json.loads(line))
+                        except ValueError:
+                            break  # недописанная при сбое строка - последняя в журнале
+            with self.engine.write() as conn:
+                applied = self._applied_seq(conn)
+                rows = [tuple(entry[1:]) for entry in entries if entry[0] > applied]
+                self._seq = max([applied] + [entry[0] for entry in entries])
+                if rows:
+                    _write_rows(self.engine, conn, rows)
+                    self._save_seq(conn)
+                    _bump_version(conn)
+            if self._log is not None:
+                self._log.truncate(0)
+            elif os.path.exists(self.log_path):
+                os.truncate(self.log_path, 0)
+            return len(rows)
+
+    def _save_seq(self, conn: sqlite3.Connection):
+        """Сохраняет номер последней записанной строки журнала."""
+        conn.execute('INSERT OR REPLACE INTO ingest_state (log, seq) VALUES (?, ?)', (self.log_path, self._seq))
+
+    def add(self, transaction):
+        """
+        Добавляет транзакцию в буфер (и журнал). В БД она попадет при следующей групповой записи.
+
+        Args:
+            transaction(Expense | Income): транзакция.
+
+        Raises:
+            ValueError: Если тип транзакции не поддерживается или буфер закрыт.
+            sqlite3.Error: Если буфер заполнился и его запись в БД не удалась (строки остаются в буфере).
+        """
+        import json
+        row = _transaction_row(transaction)
+        if row is None:
+            raise ValueError("Неподдерживаемый тип транзакции.")
+        with self._lock:
+            if self._closed:
+                raise ValueError("Буфер записи закрыт.")
+            self._seq += 1
+            if self._log is not None:
+                self._log.write(json.dumps([self._seq, *row], ensure_ascii=False) + '\n')
+                self._log.flush()
+                if self.durability == 'fsync':
+                    os.fsync(self._log.fileno())
+            self._rows.append(row)
+            if self._first_added is None:
+                self._first_added = monotonic()
+                self._wakeup.notify()
+            if len(self._rows) >= self.max_rows:
+                self._flush()
+
+    def flush(self) -> int:
+        """
+        Записывает накопленные транзакции в БД одной SQL-транзакцией.
+
+        Returns:
+            count: количество записанных транзакций.
+
+        Raises:
+            sqlite3.Error: Если произошла ошибка при записи (строки остаются в буфере и журнале).
+        """
+        with self._lock:
+            return self._flush()
+
+    def _flush(self) -> int:
+        """Записывает буфер в БД (вызывается под блокировкой) и очищает журнал."""
+        if not self._rows:
+            return 0
+        with self.engine.write() as conn:
+            count = _write_rows(self.engine, conn, self._rows)
+            if self.log_path:
+                self._save_seq(conn)
+            _bump_version(conn)
+        self._rows = []
+        self._first_added = None
+        self.commits += 1
+        if self._log is not None:
+            self._log.truncate(0)
+        return count
+
+    def _run_timer(self):
+        """Фоновая запись: сбрасывает буфер, когда первая незаписанная строка ждет дольше max_delay."""
+        with self._lock:
+            while not self._closed:
+                if self._first_added is None:
+                    self._wakeup.wait()
+                    continue
+                remaining = self._first_added + self.max_delay - monotonic()
+                if remaining > 0:
+                    self._wakeup.wait(remaining)
+                    continue
+                try:
+                    self._flush()
+                except Exception as e:
+                    print(f"Ошибка при записи буфера транзакций в БД: {e}")
+                    self._first_added = monotonic()  # повторная попытка через max_delay
+
+    def close(self):
+        """Записывает оставшиеся транзакции в БД, останавливает фоновую запись и закрывает журнал."""
+        with self._lock:
+            if self._closed:
+                return
+            self._flush()
+            self._closed = True
+            self._wakeup.notify()
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+        if self._timer is not None:
+            self._timer.join()
 
 def save_backup():
     """
-    Сохраняет транзакции из Датафрейма (предварительно, сформировав его из БД) в CSV файл.
+    Сохраняет транзакции из БД в CSV файл, построчно читая их курсором (без pandas).
+    Формат файла совпадает с форматом команды import, суммы записываются в рублях.
 
     Raises:
         Exceprion: Если произошла ошибка при сохранении.
     """
+    columns = _COLUMNS[1:]
     try:
-        df = _load_transactions()
-        df.to_csv(BACKUP_FILE, index=False, encoding='cp1251', sep=';')
-        print(f"Копия транзакций сохранена в файле {BACKUP_FILE}")
+        cursor = get_engine().reader().execute(f'SELECT {", ".join(columns)} FROM transaction_rows ORDER BY date ASC, id ASC')
+        with open(_setting('BACKUP_FILE'), 'w', encoding='cp1251', newline='') as f:
+            import csv
+            writer = csv.writer(f, delimiter=';')
+            writer.writerow(columns)
+            writer.writerows((kind, description, from_minor(amount), category, source, date, currency)
+                             for kind, description, amount, category, source, date, currency in cursor)
+        print(f"Копия транзакций сохранена в файле {_setting('BACKUP_FILE')}")
     except Exception as e:
-        print(f"Ошибка при сохранении копии в файл {BACKUP_FILE}: {e}")
+        print(f"Ошибка при сохранении копии в файл {_setting('BACKUP_FILE')}: {e}")
 
-def get_transactions(start_date: datetime = None, end_date: datetime = None) -> pd.DataFrame:
-    """Фильтрует датафрейм по заданным условиям
+def get_transactions(start_date: datetime = None, end_date: datetime = None) -> 'pd.DataFrame':
+    """Возвращает транзакции за заданный период (результат кэшируется, см. cached_query).
     Args:
         start_date(datetime): начальная дата фильтррации
         end_date(datetime): конечная дата фильтрации
@@ -101,27 +1417,462 @@ def get_transactions(start_date: datetime = None, end_date: datetime = None) ->
     Returns:
         df: отфильтрованный датафрейм
     """
-    df = _load_transactions()
-    if not start_date and not end_date:
-        return df
-    if start_date:
-        df = df[df['date'] >= start_date]
-    if end_date:
-        df = df[df['date'] <= end_date]
+    return cached_query('get_transactions', start_date, end_date, lambda: _load_transactions(start_date, end_date))
+
+def iter_transactions(start_date: datetime = None, end_date: datetime = None, chunk_size: int = 1000,
+                      limit: int = None, offset: int = 0, after: tuple = None, category: str = None, source: str = None):
+    """
+    Построчно читает транзакции за период курсором SQLite, отдавая их пачками фиксированного размера.
+    Память не зависит от размера периода. Отбор по категории или источнику идет по их id
+    (индексы idx_transactions_category и idx_transactions_source).
+
+    Args:
+        start_date(datetime): начальная дата фильтрации.
+        end_date(datetime): конечная дата фильтрации.
+        chunk_size(int): количество строк в пачке (fetchmany).
+        limit(int): максимальное количество строк (по умолчанию - без ограничения).
+        offset(int): сколько строк пропустить.
+        after(tuple): ключ (date, id) последней строки предыдущей страницы для постраничного чтения по ключу.
+        category(str): название категории для отбора.
+        source(str): название источника для отбора.
 
-    return df
+    Yields:
+        chunk: список кортежей (id, type, description, amount, category, source, date, currency), сумма - в копейках
+        (в валюте транзакции).
+    """
+    engine = get_engine()
+    conditions, params = [], []
+    for column, name in (('category', category), ('source', source)):
+        if name is None:
+            continue
+        lookup_id = engine.find_id(column, name)
+        if lookup_id is None:
+            return
+        conditions.append(f'{column}_id = ?')
+        params.append(lookup_id)
+    if after:
+        after_date, after_id = after
+        conditions.append('(date, id) > (?, ?)')
+        params += [after_date if isinstance(after_date, str) else _to_db_date(after_date), int(after_id)]
+    where, params = _date_filter(start_date, end_date, conditions, params)
+    query = f'SELECT {", ".join(_COLUMNS)} FROM transaction_rows{where} ORDER BY date ASC, id ASC LIMIT ? OFFSET ?'
+    cursor = engine.reader().execute(query, params + [-1 if limit is None else limit, offset])
+    try:
+        while True:
+            chunk = cursor.fetchmany(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        cursor.close()
+
+def _search_terms(text: str) -> list:
+    """
+    Разбивает строку поиска на слова.
+
+    Args:
+        text(str): строка поиска.
+
+    Returns:
+        список слов.
+
+    Raises:
+        ValueError: Если строка поиска пустая.
+    """
+    terms = text.replace('ё', 'е').replace('Ё', 'Е').split() if text else []
+    if not terms:
+        raise ValueError("Строка поиска не должна быть пустой.")
+    return terms
+
+def search(text: str, start_date: datetime = None, end_date: datetime = None, limit: int = None) -> list:
+    """
+    Ищет транзакции по словам в описании через полнотекстовый индекс transactions_fts.
+    Каждое слово ищется как начало слова описания без учета регистра и диакритики (ё = е), нужны все слова.
+    Результаты упорядочены по релевантности (bm25), затем по дате. Время поиска зависит от количества
+    найденных строк, а не от размера таблицы. Без FTS5 выполняется полный просмотр (LIKE).
+
+    Args:
+        text(str): строка поиска (например, название магазина).
+        start_date(datetime): начальная дата фильтрации.
+        end_date(datetime): конечная дата фильтрации.
+        limit(int): максимальное количество результатов (по умолчанию - без ограничения).
+
+    Returns:
+        rows: список кортежей (id, type, description, amount, category, source, date, currency), сумма - в копейках
+        (в валюте транзакции).
+
+    Raises:
+        ValueError: Если строка поиска пустая.
+    """
+    terms = _search_terms(text)
+    conn = get_engine().reader()
+    columns = ', '.join(f'r.{column}' for column in _COLUMNS)
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'transactions_fts'").fetchone():
+        # Слова берутся в кавычки, чтобы символы синтаксиса FTS5 в строке поиска не нарушали запрос
+        match = ' '.join('"' + term.replace('"', '""') + '"*' for term in terms)
+        where, params = _date_filter(start_date, end_date, ['transactions_fts MATCH ?'], [match], column='r.date')
+        query = (f'SELECT {columns} FROM transactions_fts JOIN transaction_rows r ON r.id = transactions_fts.rowid'
+                 f'{where} ORDER BY bm25(transactions_fts), r.date ASC, r.id ASC LIMIT ?')
+    else:
+        conditions = [_FTS_TEXT_SQL.format('r.description') + " LIKE ? ESCAPE '\\'"] * len(terms)
+        params = ['%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%' for term in terms]
+        where, params = _date_filter(start_date, end_date, conditions, params, column='r.date')
+        query = f'SELECT {columns} FROM transaction_rows r{where} ORDER BY r.date ASC, r.id ASC LIMIT ?'
+    return conn.execute(query, params + [-1 if limit is None else limit]).fetchall()
+
+def get_batch(start_date: datetime = None, end_date: datetime = None) -> TransactionBatch:
+    """
+    Загружает транзакции за период в колоночную пачку TransactionBatch без создания объектов моделей.
+
+    Args:
+        start_date(datetime): начальная дата фильтрации.
+        end_date(datetime): конечная дата фильтрации.
+
+    Returns:
+        batch: пачка транзакций в порядке дат.
+    """
+    where, params = _date_filter(start_date, end_date)
+    query = (f'SELECT type, description, amount, category, source, date, currency FROM transaction_rows{where} '
+             'ORDER BY date ASC, id ASC')
+    rows = get_engine().reader().execute(query, params).fetchall()
+    kinds, descriptions, amounts, categories, sources, dates, currencies = zip(*rows) if rows else ([],) * 7
+    kinds = [EXPENSE if kind == EXPENSE_TYPE else INCOME for kind in kinds]
+    return TransactionBatch.from_columns(kinds, descriptions, amounts, dates, categories, sources, minor_units=True,
+                                         currencies=currencies)
+
+def get_totals_by(column: str, transaction_type: str, start_date: datetime = None, end_date: datetime = None) -> list:
+    """
+    Суммирует транзакции заданного типа по категориям или источникам на стороне SQLite (GROUP BY по целочисленным id
+    справочников, названия подставляются уже к итоговым суммам).
+    Целые месяцы и дни периода берутся из таблиц сводных сумм, неполные дни - из транзакций.
+
+    Args:
+        column(str): колонка группировки - 'category' или 'source'.
+        transaction_type(str): тип транзакции (EXPENSE_TYPE или INCOME_TYPE).
+        start_date(datetime): начальная дата фильтрации.
+        end_date(datetime): конечная дата фильтрации.
+
+    Returns:
+        rows: список пар (значение колонки, сумма в копейках), отсортированный по убыванию суммы.
+
+    Raises:
+        ValueError: Если указана неподдерживаемая колонка группировки.
+    """
+    if column not in _LOOKUP_TABLES:
+        raise ValueError(f"Группировка по колонке {column} не поддерживается.")
+    source, params = _totals_source(start_date, end_date)
+    query = (f"SELECT l.name, t.total_amount FROM (SELECT {column}_id AS key, SUM(total) AS total_amount FROM {source} "
+             f"WHERE type = ? AND {column}_id != 0 GROUP BY {column}_id) t JOIN {_LOOKUP_TABLES[column]} l ON l.id = t.key "
+             f"ORDER BY t.total_amount DESC")
+    return get_engine().reader().execute(query, params + [transaction_type]).fetchall()
+
+def get_summary(start_date: datetime = None, end_date: datetime = None) -> tuple:
+    """
+    Считает количество транзакций и общие суммы доходов и расходов за период одним запросом.
+
+    Args:
+        start_date(datetime): начальная дата фильтрации.
+        end_date(datetime): конечная дата фильтрации.
+
+    Returns:
+        (count, income, expense): количество транзакций, сумма доходов и сумма расходов в копейках.
+    """
+    source, params = _totals_source(start_date, end_date)
+    query = ('SELECT COALESCE(SUM(count), 0), '
+             'COALESCE(SUM(CASE WHEN type = ? THEN total END), 0), '
+             f'COALESCE(SUM(CASE WHEN type = ? THEN total END), 0) FROM {source}')
+    return get_engine().reader().execute(query, [INCOME_TYPE, EXPENSE_TYPE] + params).fetchone()
+
+def get_daily_totals(start_date: datetime = None, end_date: datetime = None) -> list:
+    """
+    Суммирует доходы и расходы по дням на стороне SQLite: целые дни берутся из daily_totals,
+    неполные крайние дни - из транзакций (группировка по substr(date, 1, 10)).
+
+    Args:
+        start_date(datetime): начальная дата фильтрации.
+        end_date(datetime): конечная дата фильтрации.
+
+    Returns:
+        rows: список (day, income, expense) в порядке дней (только дни с транзакциями), day - строка YYYY-MM-DD,
+        суммы - в копейках.
+    """
+    source, params = _totals_source(start_date, end_date, by_day=True)
+    query = (f"SELECT day, COALESCE(SUM(CASE WHEN type = ? THEN total END), 0), "
+             f"COALESCE(SUM(CASE WHEN type = ? THEN total END), 0) FROM {source} GROUP BY day ORDER BY day")
+    return get_engine().reader().execute(query, [INCOME_TYPE, EXPENSE_TYPE] + params).fetchall()
+
+def _split_totals(rows) -> tuple:
+    """
+    Раскладывает суммы, сгруппированные по типу, категории и источнику, на данные трех отчетов.
+
+    Args:
+        rows: строки (type, category, source, total, count).
+
+    Returns:
+        (categories, sources, summary): суммы расходов по категориям и доходов по источникам (списки пар, отсортированные
+        по убыванию суммы) и кортеж (count, income, expense) как у get_summary.
+    """
+    categories, sources = {}, {}
+    count, income, expense = 0, 0, 0
+    for kind, category, source, total, rows_count in rows:
+        count += rows_count
+        if kind == EXPENSE_TYPE:
+            expense += total
+            if category is not None:
+                categories[category] = categories.get(category, 0) + total
+        elif kind == INCOME_TYPE:
+            income += total
+            if source is not None:
+                sources[source] = sources.get(source, 0) + total
+    categories = sorted(categories.items(), key=lambda row: row[1], reverse=True)
+    sources = sorted(sources.items(), key=lambda row: row[1], reverse=True)
+    return categories, sources, (count, income, expense)
+
+def get_all_totals(start_date: datetime = None, end_date: datetime = None) -> tuple:
+    """
+    Считает данные всех отчетов (расходы по категориям, доходы по источникам, сводный) одним запросом:
+    суммы группируются по типу, категории и источнику, дальше раскладываются по отчетам без обращения к БД.
+
+    Args:
+        start_date(datetime): начальная дата фильтрации.
+        end_date(datetime): конечная дата фильтрации.
+
+    Returns:
+        (categories, sources, summary): см. _split_totals, суммы - в копейках.
+    """
+    source, params = _totals_source(start_date, end_date)
+    query = ("SELECT t.type, c.name, s.name, t.total, t.count FROM "
+             f"(SELECT type, category_id, source_id, SUM(total) AS total, SUM(count) AS count FROM {source} "
+             "GROUP BY type, category_id, source_id) t "
+             "LEFT JOIN categories c ON c.id = t.category_id LEFT JOIN sources s ON s.id = t.source_id")
+    return _split_totals(get_engine().reader().execute(query, params))
+
+def rebuild_rollups():
+    """
+    Пересчитывает таблицы сводных сумм daily_totals и monthly_totals по всем транзакциям.
+    Нужна только для обслуживания: в обычной работе суммы обновляются триггерами.
+    """
+    with get_engine().write() as conn:
+        _fill_rollups(conn)
+        _bump_version(conn)
 
 def delete_transaction(transaction_id: int):
     """
-    Удаляет транзакцию под заданным номером
+    Удаляет транзакцию под заданным номером (id из вывода команды view).
 
     Args:
         transaction_id(int): номер транзакции, который требуется удалить
     """
-    df = _load_transactions()
-    if 0 <= transaction_id < len(df):
-        df = df.drop(transaction_id).reset_index(drop=True)
-        _save_transactions(df)
+    with get_engine().write() as conn:
+        deleted = conn.execute('DELETE FROM transactions WHERE id = ?', (transaction_id,)).rowcount
+        if deleted:
+            _bump_version(conn)
+    if deleted:
         print(f"Транзакция под номером {transaction_id} удалена.")
     else:
         print(f"Ошибка: Транзакция под номером {transaction_id} не найдена.")
+
+def delete_transactions(transaction_ids) -> int:
+    """
+    Удаляет несколько транзакций одним запросом DELETE.
+
+    Args:
+        transaction_ids: номера (id) транзакций.
+
+    Returns:
+        count: количество удаленных транзакций.
+    """
+    import json
+    ids = json.dumps([int(transaction_id) for transaction_id in transaction_ids])
+    with get_engine().write() as conn:
+        count = conn.execute('DELETE FROM transactions WHERE id IN (SELECT value FROM json_each(?))', (ids,)).rowcount
+        if count:
+            _bump_version(conn)
+    return count
+
+def delete_range(start_date: datetime = None, end_date: datetime = None) -> int:
+    """
+    Удаляет все транзакции за период одним запросом DELETE.
+
+    Args:
+        start_date(datetime): начальная дата.
+        end_date(datetime): конечная дата.
+
+    Returns:
+        count: количество удаленных транзакций.
+
+    Raises:
+        ValueError: Если не указана ни одна из дат.
+    """
+    if not start_date and not end_date:
+        raise ValueError("Необходимо указать хотя бы одну границу периода.")
+    where, params = _date_filter(start_date, end_date)
+    with get_engine().write() as conn:
+        count = conn.execute(f'DELETE FROM transactions{where}', params).rowcount
+        if count:
+            _bump_version(conn)
+    return count
+
+def _month_key(value) -> str:
+    """Возвращает месяц в формате периода monthly_totals (YYYY-MM); value - дата или строка YYYY-MM (по умолчанию - текущий месяц)."""
+    if value is None:
+        value = datetime.now()
+    if isinstance(value, str):
+        datetime.strptime(value, '%Y-%m')  # ValueError при неверном формате
+        return value
+    return value.strftime('%Y-%m')
+
+def _month_range(month: str) -> tuple:
+    """Возвращает начало и конец месяца YYYY-MM."""
+    start_date = datetime.strptime(month, '%Y-%m')
+    return start_date, (start_date + timedelta(days=32)).replace(day=1) - timedelta(microseconds=1)
+
+def _converted_spending(month: str) -> dict:
+    """
+    Возвращает расходы по категориям за месяц в базовой валюте, если в этом месяце есть транзакции в других валютах.
+
+    Returns:
+        словарь {category_id: сумма в копейках} или None, если все транзакции месяца в базовой валюте
+        (тогда расходы берутся из monthly_totals).
+    """
+    start_date, end_date = _month_range(month)
+    conn = get_engine().reader()
+    if not _has_foreign_currency(conn, start_date, end_date):
+        return None
+    source, params = _totals_source(start_date, end_date)
+    query = f'SELECT category_id, SUM(total) FROM {source} WHERE type = ? AND category_id != 0 GROUP BY category_id'
+    return dict(conn.execute(query, params + [EXPENSE_TYPE]).fetchall())
+
+def set_budget(category: str, amount) -> bool:
+    """
+    Устанавливает месячный лимит расходов категории.
+
+    Args:
+        category(str): название категории (добавляется в справочник, если его еще нет).
+        amount: лимит в рублях (int, float, Decimal или строка); 0 - удалить лимит.
+
+    Returns:
+        True, если лимит установлен, False - если удален.
+
+    Raises:
+        ValueError: Если категория не указана или лимит отрицательный.
+    """
+    if not category:
+        raise ValueError("Необходимо указать категорию.")
+    amount = to_minor(amount)
+    if amount < 0:
+        raise ValueError("Лимит не может быть отрицательным.")
+    engine = get_engine()
+    with engine.write() as conn:
+        category_id = engine.lookup_id(conn, 'category', category)
+        if amount == 0:
+            conn.execute('DELETE FROM budgets WHERE category_id = ?', (category_id,))
+            return False
+        conn.execute('INSERT OR REPLACE INTO budgets (category_id, amount) VALUES (?, ?)', (category_id, amount))
+    return True
+
+def get_budgets(month=None) -> list:
+    """
+    Возвращает лимиты и расходы по категориям за месяц.
+
+    Args:
+        month: месяц - дата или строка YYYY-MM (по умолчанию - текущий месяц).
+
+    Returns:
+        rows: список (category, limit, spent) с суммами в копейках базовой валюты, по названию категории.
+
+    Raises:
+        ValueError: Если месяц указан в неверном формате или для расходов в другой валюте нет курса.
+    """
+    month = _month_key(month)
+    query = ('SELECT c.name, b.amount, COALESCE(m.total, 0), b.category_id FROM budgets b JOIN categories c ON c.id = b.category_id '
+             'LEFT JOIN monthly_totals m ON m.period = ? AND m.type = ? AND m.category_id = b.category_id AND m.source_id = 0 '
+             'AND m.currency = ? ORDER BY c.name')
+    rows = get_engine().reader().execute(query, (month, EXPENSE_TYPE, BASE_CURRENCY)).fetchall()
+    converted = _converted_spending(month)
+    if converted is None:
+        return [(name, limit, spent) for name, limit, spent, _ in rows]
+    return [(name, limit, converted.get(category_id, 0)) for name, limit, _, category_id in rows]
+
+def budget_status(category: str, month=None) -> tuple:
+    """
+    Возвращает лимит и расходы категории за месяц: два поиска по первичному ключу (budgets и monthly_totals),
+    без суммирования транзакций. Если в месяце есть транзакции в других валютах, расходы пересчитываются по курсам.
+
+    Args:
+        category(str): название категории.
+        month: месяц - дата или строка YYYY-MM (по умолчанию - текущий месяц).
+
+    Returns:
+        (limit, spent) в копейках базовой валюты или None, если для категории лимит не установлен.
+
+    Raises:
+        ValueError: Если для расходов в другой валюте нет курса.
+    """
+    if not category:
+        return None
+    category_id = get_engine().find_id('category', category)
+    if category_id is None:
+        return None
+    month = _month_key(month)
+    query = ('SELECT b.amount, COALESCE((SELECT total FROM monthly_totals WHERE period = ? AND type = ? '
+             'AND category_id = b.category_id AND source_id = 0 AND currency = ?), 0) FROM budgets b WHERE b.category_id = ?')
+    status = get_engine().reader().execute(query, (month, EXPENSE_TYPE, BASE_CURRENCY, category_id)).fetchone()
+    if status is None:
+        return None
+    converted = _converted_spending(month)
+    return status if converted is None else (status[0], converted.get(category_id, 0))
+
+def _day_key(value) -> str:
+    """Возвращает дату в формате YYYY-MM-DD; value - дата или строка YYYY-MM-DD."""
+    if isinstance(value, str):
+        return datetime.strptime(value.strip(), '%Y-%m-%d').strftime('%Y-%m-%d')  # ValueError при неверном формате
+    return value.strftime('%Y-%m-%d')
+
+def set_rates(rates) -> int:
+    """
+    Записывает курсы валют одной SQL-транзакцией, заменяя курсы тех же валют на те же даты.
+    Курс действует с указанной даты до даты следующего курса этой валюты. Кэшированные отчеты становятся недействительными.
+
+    Args:
+        rates: итерируемый объект с кортежами (currency, date, rate), где rate - сколько единиц базовой валюты
+            стоит единица валюты, date - дата или строка YYYY-MM-DD.
+
+    Returns:
+        count: количество записанных курсов.
+
+    Raises:
+        ValueError: Если код валюты или дата неверные, курс не положительный или задан курс базовой валюты.
+    """
+    rows = []
+    for currency, day, rate in rates:
+        currency = normalize_currency(currency)
+        if currency == BASE_CURRENCY:
+            raise ValueError(f"Курс базовой валюты {BASE_CURRENCY} не задается.")
+        rate = float(rate)
+        if not rate > 0 or rate == float('inf'):
+            raise ValueError(f"Курс {currency} должен быть положительным числом.")
+        rows.append((currency, _day_key(day), rate))
+    with get_engine().write() as conn:
+        conn.executemany('INSERT OR REPLACE INTO rates (currency, date, rate) VALUES (?, ?, ?)', rows)
+        conn.execute("UPDATE cache_state SET value = value + 1 WHERE key = 'rates_version'")
+        _bump_version(conn)
+    return len(rows)
+
+def get_rates(currency: str = None) -> list:
+    """
+    Возвращает курсы валют.
+
+    Args:
+        currency(str): код валюты (по умолчанию - все валюты).
+
+    Returns:
+        rows: список (currency, date, rate) по валюте и дате.
+
+    Raises:
+        ValueError: Если код валюты неверный.
+    """
+    if currency is None:
+        return get_engine().reader().execute('SELECT currency, date, rate FROM rates ORDER BY currency, date').fetchall()
+    query = 'SELECT currency, date, rate FROM rates WHERE currency = ? ORDER BY date'
+    return get_engine().reader().execute(query, (normalize_currency(currency),)).fetchall()
@@ -1,18 +1,28 @@
 import argparse
-from fintracker import commands
+import sys
+from fintracker import commands, storage
+from fintracker.client import REMOTE_COMMANDS, request
+from fintracker.models import parse_amount
+from fintracker.config import CACHE_MODES, resolve_server_address
 """
 Главный модуль. Использует argparse для обработки аргументов.
+Если запущен сервер (команда serve), команды add, view, search, report и delete выполняются им, иначе - в этом процессе.
 """
-def main():
+def build_parser() -> argparse.ArgumentParser:
     """Добавление команд."""
     parser = argparse.ArgumentParser(description="CLI Финансовый трекер расходов и доходов.")
+    parser.add_argument('--db', help='Путь к БД: файл, ":memory:" или "tmpfs[:имя.db]". По умолчанию - из переменной FINTR_DB, файла fintr.ini или ~/fintr/fintr.db.')
+    parser.add_argument('--cache', choices=CACHE_MODES, help='Кэш результатов запросов: off, memory (в памяти процесса) или persist (еще и в БД для следующих запусков). По умолчанию - из переменной FINTR_CACHE, файла fintr.ini или memory.')
+    parser.add_argument('--server', help='Адрес сервера: путь к Unix-сокету или tcp://127.0.0.1:порт. По умолчанию - из переменной FINTR_SERVER, файла fintr.ini или ~/fintr/fintr.sock.')
+    parser.add_argument('--local', action='store_true', help='Выполнить команду в этом процессе, даже если запущен сервер.')
     subparsers = parser.add_subparsers(dest='command', help='Доступные команды')
 
     """Команда добавления транзакции --add"""
     parser_add = subparsers.add_parser('add', help='Добавить новую транзакцию (расход или доход)')
     parser_add.add_argument('--description', required=True, help='Описание транзакции')
-    parser_add.add_argument('--sum', type=float, required=True, help='Сумма транзакции')
+    parser_add.add_argument('--sum', type=parse_amount, required=True, help='Сумма транзакции в рублях (точность - до копейки)')
     parser_add.add_argument('--date', help='Дата транзакции в формате YYYY-MM-DD. По умолчанию - текущая дата.')
+    parser_add.add_argument('--currency', help='Код валюты (ISO 4217, например USD). По умолчанию - RUB.')
 
     add_group = parser_add.add_mutually_exclusive_group(required=True)
     add_group.add_argument('--expense', action='store_true', help='Указывает, что это расход.')
@@ -27,26 +37,151 @@ def main():
     parser_view.add_argument('--period', choices=['day', 'month', 'year'], help='Период просмотра (день, месяц, год)')
     parser_view.add_argument('--since', help='Просмотреть транзакции с указанной даты (YYYY-MM-DD)')
     parser_view.add_argument('--from-to', help='Просмотреть транзакции в диапазоне дат (YYYY-MM-DD,YYYY-MM-DD)')
+    parser_view.add_argument('--limit', type=int, help='Максимальное количество выводимых транзакций')
+    parser_view.add_argument('--offset', type=int, default=0, help='Сколько транзакций пропустить')
+    parser_view.add_argument('--after', help='Вывести транзакции после ключа "дата,id" (подсказка выводится в конце страницы при --limit)')
+    parser_view.add_argument('--format', choices=['table', 'csv', 'jsonl'], default='table', help='Формат вывода (по умолчанию table)')
+    parser_view.add_argument('--category', help='Показать только расходы указанной категории')
+    parser_view.add_argument('--source', help='Показать только доходы из указанного источника')
     parser_view.set_defaults(func=commands.view_command)
 
+    """Команда поиска транзакций --search"""
+    parser_search = subparsers.add_parser('search', help='Найти транзакции по словам в описании')
+    parser_search.add_argument('text', help='Слова для поиска (ищутся как начала слов описания, без учета регистра; нужны все слова)')
+    parser_search.add_argument('--from-to', help='Искать в диапазоне дат (YYYY-MM-DD,YYYY-MM-DD)')
+    parser_search.add_argument('--limit', type=int, default=50, help='Максимальное количество результатов (по умолчанию 50)')
+    parser_search.add_argument('--format', choices=['table', 'csv', 'jsonl'], default='table', help='Формат вывода (по умолчанию table)')
+    parser_search.set_defaults(func=commands.search_command)
+
     """Команда генерации отчетов --report"""
     parser_report = subparsers.add_parser('report', help='Сгенерировать отчет')
-    parser_report.add_argument('--report-type', choices=['categories', 'summary', 'sources'], required=True, help='Тип отчета: "categories" (расходы по категориям), "sources" (доходы) или "summary" (сводный отчет).')
+    parser_report.add_argument('--report-type', choices=['categories', 'summary', 'sources', 'all', 'timeseries'], required=True, help='Тип отчета: "categories" (расходы по категориям), "sources" (доходы), "summary" (сводный отчет), "all" (все три за один проход) или "timeseries" (доходы, расходы и нарастающий баланс по периодам).')
+    parser_report.add_argument('--freq', choices=['D', 'W', 'M'], default='D', help='Период отчета "timeseries": D - день, W - неделя, M - месяц (по умолчанию D).')
     parser_report.add_argument('--period', choices=['month'], help='Период для отчета "categories".')
     parser_report.add_argument('--from-to', help='Диапазон дат для отчета (YYYY-MM-DD,YYYY-MM-DD).')
-    parser_report.add_argument('--output', help='Имя файла для сохранения отчета (CSV). Если не указано, будет использовано имя по умолчанию.')
+    parser_report.add_argument('--output', help='Имя файла для сохранения отчета (CSV, "-" - вывод CSV в консоль), для "all" - каталог для всех отчетов. Если не указано, будет использовано имя по умолчанию.')
+    parser_report.add_argument('--archive', help='Строить отчет по колоночному архиву (каталог команды export) вместо БД.')
     parser_report.set_defaults(func=commands.report_command)
 
     """Команда удаления транзакции --delete"""
-    parser_delete = subparsers.add_parser('delete', help='Удалить транзакцию по номеру')
-    parser_delete.add_argument('--number', type=int, required=True, help='Номер транзакции для удаления (см. вывод команды view)')
+    parser_delete = subparsers.add_parser('delete', help='Удалить транзакции по номерам или за период')
+    delete_group = parser_delete.add_mutually_exclusive_group(required=True)
+    delete_group.add_argument('--number', type=int, nargs='+', help='Номера транзакций для удаления (см. вывод команды view)')
+    delete_group.add_argument('--from-to', help='Удалить все транзакции в диапазоне дат (YYYY-MM-DD,YYYY-MM-DD)')
     parser_delete.set_defaults(func=commands.delete_command)
 
     """Команда создании резервной копии транзакций --backup"""
     parser_backup = subparsers.add_parser('backup', help='Создать копию транзакций')
+    parser_backup.add_argument('--mode', choices=['incremental', 'snapshot', 'csv'], default='incremental', help='incremental - сжатый сегмент с изменениями после прошлой копии (по умолчанию), snapshot - полный снимок БД, csv - выгрузка всех транзакций в CSV файл.')
+    parser_backup.add_argument('--dir', help='Каталог снимков и сегментов. По умолчанию - из переменной FINTR_BACKUP_DIR, файла fintr.ini или ~/fintr/backups.')
+    parser_backup.add_argument('--keep', type=int, default=2, help='Сколько последних цепочек (снимок и его сегменты) хранить (по умолчанию 2).')
+    parser_backup.add_argument('--max-segments', type=int, default=30, help='После скольких сегментов начинать новую цепочку со снимка (по умолчанию 30).')
     parser_backup.set_defaults(func=commands.backup_command)
 
-    args = parser.parse_args()
+    """Команда восстановления из резервной копии --restore"""
+    parser_restore = subparsers.add_parser('restore', help='Восстановить БД из снимка и инкрементальных сегментов')
+    parser_restore.add_argument('--dir', help='Каталог снимков и сегментов.')
+    parser_restore.add_argument('--base', help='Имя снимка (по умолчанию - последний).')
+    parser_restore.set_defaults(func=commands.restore_command)
+
+    """Команда импорта транзакций из файла --import"""
+    parser_import = subparsers.add_parser('import', help='Импортировать транзакции из CSV или JSONL файла')
+    parser_import.add_argument('--file', required=True, help='Путь к файлу с транзакциями (колонки type, description, amount, category, source, date)')
+    parser_import.add_argument('--format', choices=['csv', 'jsonl'], help='Формат файла. По умолчанию определяется по расширению.')
+    parser_import.add_argument('--batch-size', type=int, default=1000, help='Количество строк в одной пачке вставки (по умолчанию 1000).')
+    parser_import.add_argument('--encoding', default='cp1251', help='Кодировка файла (по умолчанию cp1251).')
+    parser_import.add_argument('--delimiter', default=';', help='Разделитель колонок CSV (по умолчанию ";").')
+    parser_import.set_defaults(func=commands.import_command)
+
+    """Команда пересчета сводных сумм --rebuild-rollups"""
+    parser_rollups = subparsers.add_parser('rebuild-rollups', help='Пересчитать сводные суммы по дням и месяцам')
+    parser_rollups.set_defaults(func=commands.rebuild_rollups_command)
+
+    """Команда выгрузки в колоночный архив --export"""
+    parser_export = subparsers.add_parser('export', help='Выгрузить транзакции в архив Parquet/Arrow, разбитый по годам и месяцам')
+    parser_export.add_argument('--dir', required=True, help='Каталог архива')
+    parser_export.add_argument('--format', choices=['parquet', 'arrow'], default='parquet', help='Формат файлов (по умолчанию parquet)')
+    parser_export.add_argument('--from-to', help='Диапазон дат (YYYY-MM-DD,YYYY-MM-DD), расширяется до целых месяцев')
+    parser_export.add_argument('--row-group-size', type=int, default=100000, help='Количество строк в группе (по умолчанию 100000)')
+    parser_export.set_defaults(func=commands.export_command)
+
+    """Команда месячных лимитов расходов --budget"""
+    parser_budget = subparsers.add_parser('budget', help='Установить или показать месячные лимиты расходов по категориям')
+    budget_actions = parser_budget.add_subparsers(dest='budget_action', required=True)
+    parser_budget_set = budget_actions.add_parser('set', help='Установить месячный лимит категории')
+    parser_budget_set.add_argument('--category', required=True, help='Категория расхода')
+    parser_budget_set.add_argument('--limit', type=parse_amount, required=True, help='Лимит в рублях на месяц (0 - удалить лимит)')
+    parser_budget_show = budget_actions.add_parser('show', help='Показать лимиты и расходы за месяц')
+    parser_budget_show.add_argument('--month', help='Месяц в формате YYYY-MM (по умолчанию - текущий)')
+    parser_budget.set_defaults(func=commands.budget_command)
+
+    """Команда правил повторяющихся транзакций --recurring"""
+    parser_recurring = subparsers.add_parser('recurring', help='Добавить, показать или удалить правила повторяющихся транзакций')
+    recurring_actions = parser_recurring.add_subparsers(dest='recurring_action', required=True)
+    parser_recurring_add = recurring_actions.add_parser('add', help='Добавить правило (зарплата, аренда, подписка)')
+    parser_recurring_add.add_argument('--description', required=True, help='Описание транзакции')
+    parser_recurring_add.add_argument('--sum', type=parse_amount, required=True, help='Сумма транзакции в рублях (точность - до копейки)')
+    parser_recurring_add.add_argument('--currency', help='Код валюты (ISO 4217, например USD). По умолчанию - RUB.')
+    recurring_group = parser_recurring_add.add_mutually_exclusive_group(required=True)
+    recurring_group.add_argument('--expense', action='store_true', help='Указывает, что это расход.')
+    recurring_group.add_argument('--income', action='store_true', help='Указывает, что это доход.')
+    parser_recurring_add.add_argument('--category', help='Категория расхода (обязательно для --expense)')
+    parser_recurring_add.add_argument('--source', help='Источник дохода (обязательно для --income)')
+    parser_recurring_add.add_argument('--freq', choices=['daily', 'weekly', 'monthly', 'yearly'], default='monthly', help='Периодичность (по умолчанию monthly)')
+    parser_recurring_add.add_argument('--every', type=int, default=1, help='Интервал: каждые N дней, недель, месяцев или лет (по умолчанию 1)')
+    parser_recurring_add.add_argument('--day', type=int, help='День месяца для monthly (по умолчанию - день даты начала; в коротких месяцах - последний день)')
+    parser_recurring_add.add_argument('--start', help='Дата первой транзакции в формате YYYY-MM-DD. По умолчанию - текущая дата.')
+    parser_recurring_add.add_argument('--end', help='Дата окончания в формате YYYY-MM-DD. По умолчанию - без окончания.')
+    recurring_actions.add_parser('list', help='Показать правила')
+    parser_recurring_delete = recurring_actions.add_parser('delete', help='Удалить правило (созданные транзакции остаются)')
+    parser_recurring_delete.add_argument('id', type=int, help='Номер правила')
+    parser_recurring.set_defaults(func=commands.recurring_command)
+
+    """Команда создания транзакций по правилам --materialize"""
+    parser_materialize = subparsers.add_parser('materialize', help='Создать транзакции по правилам повторяющихся транзакций')
+    parser_materialize.add_argument('--until', help='Последняя дата в формате YYYY-MM-DD. По умолчанию - текущая дата.')
+    parser_materialize.add_argument('--project', action='store_true', help='Только показать прогноз баланса по правилам до --until, ничего не записывая.')
+    parser_materialize.set_defaults(func=commands.materialize_command)
+
+    """Команда курсов валют --rates"""
+    parser_rates = subparsers.add_parser('rates', help='Загрузить или показать курсы валют для пересчета отчетов в рубли')
+    rates_actions = parser_rates.add_subparsers(dest='rates_action', required=True)
+    parser_rates_load = rates_actions.add_parser('load', help='Загрузить курсы из CSV или JSONL файла (колонки currency, date, rate)')
+    parser_rates_load.add_argument('file', help='Путь к файлу; rate - сколько рублей стоит единица валюты с даты date (YYYY-MM-DD)')
+    parser_rates_load.add_argument('--format', choices=['csv', 'jsonl'], help='Формат файла (по умолчанию - по расширению)')
+    parser_rates_load.add_argument('--encoding', default='cp1251', help='Кодировка файла (по умолчанию cp1251)')
+    parser_rates_load.add_argument('--delimiter', default=';', help='Разделитель колонок CSV (по умолчанию ;)')
+    parser_rates_show = rates_actions.add_parser('show', help='Показать загруженные курсы')
+    parser_rates_show.add_argument('--currency', help='Показать курсы только этой валюты')
+    parser_rates.set_defaults(func=commands.rates_command)
+
+    """Команда управления кэшем запросов --cache"""
+    parser_cache = subparsers.add_parser('cache', help='Показать счетчики кэша запросов или очистить его')
+    parser_cache.add_argument('--clear', action='store_true', help='Очистить кэш (в том числе сохраненный в БД).')
+    parser_cache.set_defaults(func=commands.cache_command)
+
+    """Команда запуска сервера --serve"""
+    parser_serve = subparsers.add_parser('serve', help='Запустить сервер, который держит БД и кэш открытыми и выполняет команды add, view, search, report, delete')
+    parser_serve.set_defaults(func=commands.serve_command, parser=parser)
+
+    return parser
+
+def main(argv: list = None):
+    """Разбор аргументов и выполнение команды (на сервере, если он запущен)."""
+    argv = sys.argv[1:] if argv is None else argv
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    # Настройки из переменных окружения и файлов fintr.ini определяются здесь, ошибка в них - обычная ошибка CLI
+    try:
+        storage.configure(args.db, cache=args.cache)
+        data_file, cache_mode = storage.DATA_FILE, storage.CACHE_MODE
+        remote = args.command in REMOTE_COMMANDS and not args.local
+        address = resolve_server_address(args.server) if remote else None
+    except ValueError as e:
+        parser.error(f"неверные настройки: {e}")
+
+    if remote and request(address, argv, data_file, cache=cache_mode):
+        return
 
     if hasattr(args, 'func'):
         args.func(args)
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from fintracker import storage
+from fintracker.models import Expense, Income
+from fintracker.report import generate_expenses, gen_sum
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+@unittest.skipIf(pyarrow is None, 'pyarrow не установлен')
+class TestArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_file = storage.DATA_FILE
+        storage.configure(os.path.join(self.tmp.name, 'test.db'))
+        storage.bulk_insert([
+            Expense('Обед', 100, 'Еда', datetime(2025, 12, 31, 23)),
+            Expense('Такси', 300, 'Транспорт', datetime(2026, 1, 1)),
+            Expense('Ужин', 150, 'Еда', datetime(2026, 1, 15, 12, 30, 0, 5)),
+            Income('Зарплата', 1000, 'Работа', datetime(2026, 2, 1)),
+        ])
+
+    def tearDown(self):
+        storage.close_engine()
+        storage.DATA_FILE = self.data_file
+        self.tmp.cleanup()
+
+    def test_reports_match_database(self):
+        from fintracker.archive import export, archive_all_totals
+        for file_format in ('parquet', 'arrow'):
+            directory = os.path.join(self.tmp.name, file_format)
+            self.assertEqual(export(directory, file_format, row_group_size=2), 4)
+            period = (datetime(2026, 1, 1), datetime(2026, 1, 31, 23, 59, 59))
+            self.assertEqual(generate_expenses(*period, archive=directory).values.tolist(),
+                             generate_expenses(*period).values.tolist())
+            self.assertEqual(gen_sum(archive=directory).values.tolist(), gen_sum().values.tolist())
+            self.assertEqual(archive_all_totals(directory), storage.get_all_totals())
+
+    def test_export_replaces_partitions(self):
+        from fintracker.archive import export, archive_summary
+        directory = os.path.join(self.tmp.name, 'parquet')
+        self.assertEqual(export(directory), 4)
+        storage.delete_range(datetime(2026, 1, 1), datetime(2026, 1, 31, 23, 59, 59))
+        # Январь опустел и удаляется, декабрь и февраль вне периода остаются
+        self.assertEqual(export(directory, start_date=datetime(2026, 1, 10), end_date=datetime(2026, 1, 20)), 0)
+        self.assertFalse(os.path.exists(os.path.join(directory, 'year=2026', 'month=01')))
+        self.assertTrue(os.path.exists(os.path.join(directory, 'year=2025', 'month=12')))
+        self.assertTrue(os.path.exists(os.path.join(directory, 'year=2026', 'month=02')))
+        self.assertEqual(archive_summary(directory), storage.get_summary())
+        storage.delete_range(datetime(2025, 12, 1), datetime(2025, 12, 31, 23, 59, 59))
+        self.assertEqual(export(directory), 1)
+        self.assertFalse(os.path.exists(os.path.join(directory, 'year=2025')))
+        self.assertEqual(archive_summary(directory), storage.get_summary())
+        self.assertFalse([name for name in os.listdir(self.tmp.name) if '.export-' in name])
+
+    def test_currency_conversion(self):
+        from fintracker.archive import export, archive_all_totals
+        storage.add_expense(Expense('Кофе', 10, 'Еда', datetime(2026, 1, 20, 8), 'USD'))
+        storage.set_rates([('USD', '2026-01-01', 90), ('USD', '2026-01-20', 95)])
+        directory = os.path.join(self.tmp.name, 'parquet')
+        export(directory, 'parquet')
+        self.assertEqual(archive_all_totals(directory), storage.get_all_totals())
+        self.assertEqual(storage.get_all_totals()[0], [('Еда', 120000), ('Транспорт', 30000)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from fintracker import storage
+from fintracker.async_storage import AsyncStorage
+from fintracker.models import Expense, Income
+
+START = datetime(2026, 1, 1)
+
+class TestAsyncStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_file = storage.DATA_FILE
+        storage.configure(os.path.join(self.tmp.name, 'test.db'))
+
+    def tearDown(self):
+        storage.close_engine()
+        storage.DATA_FILE = self.data_file
+        self.tmp.cleanup()
+
+    def test_concurrent_adds_are_grouped(self):
+        async def run():
+            async with AsyncStorage() as db:
+                await asyncio.gather(*(db.add(Expense('Обед', 100, 'Еда', START + timedelta(minutes=i))) for i in range(200)))
+                return db.stats(), await db.get_summary()
+        stats, summary = asyncio.run(run())
+        self.assertEqual(stats['writes'], 200)
+        self.assertLess(stats['commits'], 200)
+        self.assertEqual(summary, (200, 0, 200 * 100 * 100))
+
+    def test_bulk_insert_and_reads(self):
+        async def run():
+            async with AsyncStorage(readers=2) as db:
+                count = await db.bulk_insert([Expense('Обед', 100, 'Еда', START), Income('Зарплата', 1000, 'Работа', START),
+                                              'не транзакция'])
+                df = await db.get_transactions()
+                return count, len(df), await db.get_totals_by('category', storage.EXPENSE_TYPE), await db.get_all_totals()
+        count, rows, totals, (categories, sources, summary) = asyncio.run(run())
+        self.assertEqual((count, rows), (2, 2))
+        self.assertEqual(totals, [('Еда', 10000)])
+        self.assertEqual(sources, [('Работа', 100000)])
+        self.assertEqual(summary, (2, 100000, 10000))
+
+    def test_errors(self):
+        async def run():
+            async with AsyncStorage() as db:
+                with self.assertRaises(ValueError):
+                    await db.add('не транзакция')
+                bad = Expense('Обед', 100, 'Еда', START)
+                bad.description = object()  # не сохраняется в SQLite
+                results = await asyncio.gather(db.add(bad), db.add(Expense('Ужин', 50, 'Еда', START)), return_exceptions=True)
+                return results, await db.get_summary()
+        results, summary = asyncio.run(run())
+        self.assertIsInstance(results[0], Exception)
+        self.assertIsNone(results[1])
+        self.assertEqual(summary[0], 1)
+
+    def test_failing_generator_in_group(self):
+        def broken():
+            yield Expense('Обед', 100, 'Еда', START)
+            raise RuntimeError('ошибка источника')
+
+        async def run():
+            async with AsyncStorage() as db:
+                # Оба запроса ставятся в очередь до переключения задач и попадают в одну группу
+                results = await asyncio.gather(db.bulk_insert(broken()), db.bulk_insert([Expense('Ужин', 50, 'Еда', START)]),
+                                               return_exceptions=True)
+                return results, await db.get_summary()
+        results, summary = asyncio.run(run())
+        self.assertIsInstance(results[0], RuntimeError)
+        self.assertEqual(results[1], 1)
+        self.assertEqual(summary, (1, 0, 5000))
+
+if __name__ == '__main__':
+    unittest.main()
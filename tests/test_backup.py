@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from fintracker import backup, storage
+from fintracker.models import Expense, Income
+
+class TestBackup(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_file = storage.DATA_FILE
+        self.backup_dir = storage.BACKUP_DIR
+        storage.configure(os.path.join(self.tmp.name, 'test.db'), backup_dir=os.path.join(self.tmp.name, 'backups'))
+
+    def tearDown(self):
+        storage.close_engine()
+        storage.DATA_FILE = self.data_file
+        storage.BACKUP_DIR = self.backup_dir
+        self.tmp.cleanup()
+
+    def rows(self):
+        return [row for chunk in storage.iter_transactions() for row in chunk]
+
+    def test_incremental_restore(self):
+        storage.set_rates([('USD', '2026-01-01', 2)])
+        storage.add_expense(Expense('a', 10, 'test', datetime(2026, 1, 1)))
+        storage.add_expense(Expense('b', 20, 'test', datetime(2026, 1, 2)))
+        self.assertTrue(backup.incremental().endswith('.db'))
+        storage.add_expense(Income('c', 30, 'test', datetime(2026, 1, 3)))
+        storage.delete_transaction(1)
+        self.assertTrue(backup.incremental().endswith('.seg000001.jsonl.gz'))
+        self.assertIsNone(backup.incremental())
+        storage.add_expense(Expense('d', 40, 'test', datetime(2026, 1, 4), 'USD'))
+        backup.incremental()
+        expected = self.rows()
+
+        storage.delete_range(datetime(2026, 1, 1), datetime(2026, 1, 31))
+        backup.restore()
+        self.assertEqual(self.rows(), expected)
+        self.assertEqual(self.rows()[-1][-1], 'USD')
+        self.assertEqual(storage.get_summary()[1:], (3000, 10000))
+
+    def test_rotate(self):
+        storage.add_expense(Expense('a', 10, 'test', datetime(2026, 1, 1)))
+        for _ in range(3):
+            backup.snapshot(keep=2)
+        self.assertEqual(len(backup.list_bases()), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from fintracker import backup, storage
+from fintracker.cache import QueryCache
+from fintracker.models import Expense, Income
+from fintracker.report import generate_expenses, gen_sum, generate_all
+
+class TestQueryCache(unittest.TestCase):
+    def test_lru(self):
+        cache = QueryCache(maxsize=2)
+        cache.put('a', 1, 'A')
+        cache.put('b', 1, 'B')
+        self.assertEqual(cache.get('a', 1), (True, 'A'))
+        cache.put('c', 1, 'C')
+        self.assertEqual(cache.get('b', 1), (False, None))
+        self.assertEqual(cache.get('a', 2), (False, None))
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(len(cache), 2)
+
+class TestCachedQueries(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_file = storage.DATA_FILE
+        self.backup_dir = storage.BACKUP_DIR
+        self.cache_mode = storage.CACHE_MODE
+        storage.configure(os.path.join(self.tmp.name, 'test.db'), backup_dir=os.path.join(self.tmp.name, 'backups'),
+                          cache='memory')
+        storage.add_expense(Expense('Обед', 100, 'Еда', datetime(2026, 1, 1)))
+        storage.add_expense(Income('Зарплата', 1000, 'Работа', datetime(2026, 1, 3)))
+
+    def tearDown(self):
+        storage.close_engine()
+        storage.DATA_FILE = self.data_file
+        storage.BACKUP_DIR = self.backup_dir
+        storage.CACHE_MODE = self.cache_mode
+        self.tmp.cleanup()
+
+    def test_hit_and_invalidation(self):
+        generate_expenses()
+        generate_expenses()
+        stats = storage.cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        storage.add_expense(Expense('Ужин', 50, 'Еда', datetime(2026, 1, 2)))
+        self.assertEqual(list(generate_expenses()['total_amount']), [150])
+        self.assertEqual(storage.cache_stats()['misses'], 2)
+        storage.delete_transaction(3)
+        self.assertEqual(list(generate_expenses()['total_amount']), [100])
+
+    def test_all_shares_entries(self):
+        generate_all()
+        gen_sum()
+        generate_expenses()
+        self.assertEqual(storage.cache_stats()['misses'], 1)
+
+    def test_transactions_copy(self):
+        df = storage.get_transactions()
+        df.drop(df.index, inplace=True)
+        self.assertEqual(len(storage.get_transactions()), 2)
+
+    def test_persist(self):
+        storage.configure(cache='persist')
+        first = gen_sum().values.tolist()
+        storage.close_engine()
+        self.assertEqual(gen_sum().values.tolist(), first)
+        stats = storage.cache_stats()
+        self.assertEqual((stats['persistent_hits'], stats['misses'], stats['persistent_total_hits']), (1, 0, 1))
+        storage.bulk_insert([Expense('Ужин', 50, 'Еда', datetime(2026, 1, 2))])
+        self.assertEqual(gen_sum().loc['Общий расход', 0], 150)
+        self.assertEqual(storage.cache_stats()['persistent_entries'], 1)
+        storage.clear_cache()
+        self.assertEqual(storage.cache_stats()['persistent_entries'], 0)
+
+    def test_restore_bumps_version(self):
+        backup.snapshot()
+        version = storage.data_version()
+        storage.add_expense(Expense('Ужин', 50, 'Еда', datetime(2026, 1, 2)))
+        backup.restore()
+        self.assertGreater(storage.data_version(), version + 1)
+
+    def test_noop_writes_keep_cache(self):
+        version = storage.data_version()
+        self.assertEqual(storage.bulk_insert([]), 0)
+        storage.delete_transaction(999)
+        self.assertEqual(storage.delete_transactions([998, 999]), 0)
+        self.assertEqual(storage.delete_range(datetime(2030, 1, 1)), 0)
+        self.assertEqual(storage.data_version(), version)
+        storage.delete_transaction(1)
+        self.assertEqual(storage.data_version(), version + 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import argparse
+import os
 import unittest
 from datetime import datetime, timedelta, date
 from fintracker.models import Expense, Income
@@ -195,4 +196,44 @@ class TestModels(unittest.TestCase):
     def test_idate(self):
         date = datetime(2026, 1, 9, 12, 00, 00)
         i = Income('test', 45, 'test', date)
-        self.assertEqual(i.date, date)
\ No newline at end of file
+        self.assertEqual(i.date, date)
+
+
+class TestStartup(unittest.TestCase):
+    def test_cli_does_not_import_pandas(self):
+        import subprocess
+        import sys
+        code = ("import sys; sys.argv = ['main.py']; import main; "
+                "print(sorted(set(sys.modules) & {'pandas', 'pickle', 'configparser', 'tempfile', 'csv', 'typing'}))")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=root)
+        self.assertEqual(result.stdout.strip(), '[]')
+
+class TestAddCommand(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        from fintracker import storage
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_file = storage.DATA_FILE
+        storage.configure(os.path.join(self.tmp.name, 'test.db'))
+
+    def tearDown(self):
+        from fintracker import storage
+        storage.close_engine()
+        storage.DATA_FILE = self.data_file
+        self.tmp.cleanup()
+
+    def test_budget_warning_without_rate(self):
+        import io
+        from contextlib import redirect_stdout
+        from fintracker import commands, storage
+        storage.set_budget('Еда', 100)
+        args = argparse.Namespace(date='2026-01-05', expense=True, income=False, description='Кофе', sum=10,
+                                  currency='USD', category='Еда', source=None)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            commands.add_command(args)
+        self.assertIn('Добавлен расход', output.getvalue())
+        self.assertIn('не удалось проверить бюджет категории Еда: Нет курса USD', output.getvalue())
+        self.assertNotIn('Ошибка ввода', output.getvalue())
+        self.assertEqual(storage.get_batch().currencies(), ['USD'])
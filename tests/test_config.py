@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from fintracker import config
+
+class TestConfig(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = mock.patch.dict(os.environ, {}, clear=False)
+        self.env.start()
+        for name in (config.ENV_DB, config.ENV_BACKUP, config.ENV_CONFIG, config.ENV_CACHE, config.ENV_SERVER):
+            os.environ.pop(name, None)
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def test_cli_flag_wins(self):
+        os.environ[config.ENV_DB] = '/env/fintr.db'
+        self.assertEqual(config.resolve_db_path('/cli/fintr.db'), '/cli/fintr.db')
+        self.assertEqual(config.resolve_db_path(), '/env/fintr.db')
+
+    def test_config_file(self):
+        path = os.path.join(self.tmp.name, 'fintr.ini')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('[fintr]\ndb = /from/file.db\nbackup = /from/backup.csv\n')
+        os.environ[config.ENV_CONFIG] = path
+        self.assertEqual(config.resolve_db_path(), '/from/file.db')
+        self.assertEqual(config.resolve_backup_path(), '/from/backup.csv')
+
+    def test_special_paths(self):
+        self.assertEqual(config.expand_db_path(':memory:'), ':memory:')
+        self.assertEqual(config.expand_db_path('tmpfs:bench.db'), os.path.join(config.tmpfs_dir(), 'bench.db'))
+
+    def test_cache_mode(self):
+        self.assertEqual(config.resolve_cache_mode(), 'memory')
+        os.environ[config.ENV_CACHE] = 'persist'
+        self.assertEqual(config.resolve_cache_mode(), 'persist')
+        self.assertEqual(config.resolve_cache_mode('off'), 'off')
+        with self.assertRaises(ValueError):
+            config.resolve_cache_mode('disk')
+
+    def test_server_address(self):
+        self.assertTrue(config.resolve_server_address().endswith('fintr.sock'))
+        os.environ[config.ENV_SERVER] = 'tcp://:8765'
+        self.assertEqual(config.parse_tcp_address(config.resolve_server_address()), ('127.0.0.1', 8765))
+        self.assertIsNone(config.parse_tcp_address('/tmp/fintr.sock'))
+
+    def test_bad_settings_do_not_break_import(self):
+        import subprocess
+        import sys
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, **{config.ENV_CACHE: 'bogus'})
+        code = "import fintracker.storage as s; print(s.DATA_FILE != ''); s.CACHE_MODE"
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=root, env=env)
+        self.assertEqual(result.stdout.strip(), 'True')
+        self.assertIn('ValueError', result.stderr)
+        result = subprocess.run([sys.executable, 'main.py', '--help'], capture_output=True, text=True, cwd=root, env=env)
+        self.assertEqual(result.returncode, 0)
+        result = subprocess.run([sys.executable, 'main.py', 'view'], capture_output=True, text=True, cwd=root, env=env)
+        self.assertEqual(result.returncode, 2)
+        self.assertIn('bogus', result.stderr)
+
+    def test_broken_config_file(self):
+        path = os.path.join(self.tmp.name, 'fintr.ini')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('db = /no/section.db\n')
+        os.environ[config.ENV_CONFIG] = path
+        with self.assertRaises(ValueError):
+            config.resolve_db_path()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from fintracker.importer import read_transactions, read_rates, detect_format
+from fintracker.models import Expense, Income
+
+class TestImporter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text, encoding='utf-8'):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w', encoding=encoding) as f:
+            f.write(text)
+        return path
+
+    def test_detect_format(self):
+        self.assertEqual(detect_format('bank.jsonl'), 'jsonl')
+        self.assertEqual(detect_format('bank.csv'), 'csv')
+
+    def test_csv(self):
+        path = self.write('bank.csv', 'type;description;amount;category;source;date\n'
+                                      'Расход;Обед;550,5;Еда;;2026-01-08 16:56:16\n'
+                                      'Доход;Зарплата;20000;;Работа;2026-01-09\n', encoding='cp1251')
+        rows = list(read_transactions(path))
+        self.assertIsInstance(rows[0], Expense)
+        self.assertEqual(rows[0].amount, 550.5)
+        self.assertIsInstance(rows[1], Income)
+        self.assertEqual(rows[1].date, datetime(2026, 1, 9))
+
+    def test_bad_rows_are_reported(self):
+        path = self.write('bank.jsonl', '{"type": "Расход", "description": "Обед", "amount": 10, "category": "Еда"}\n'
+                                        '{"type": "Расход", "description": "Обед", "amount": -1, "category": "Еда"}\n'
+                                        'not json\n'
+                                        '{"type": "income", "description": "Зарплата", "amount": 5, "source": "Работа"}\n')
+        errors = []
+        rows = list(read_transactions(path, encoding='utf-8', on_error=lambda line, msg: errors.append(line)))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(errors, [2, 3])
+
+    def test_rates(self):
+        path = self.write('rates.csv', 'currency;date;rate\nusd;2026-01-01;90,5\nEUR;2026-01-01;0\nEUR;;100\n'
+                                       'RUB;2026-01-01;1\n')
+        errors = []
+        rows = list(read_rates(path, encoding='utf-8', on_error=lambda line, msg: errors.append(line)))
+        self.assertEqual([(currency, date, float(rate)) for currency, date, rate in rows],
+                         [('USD', datetime(2026, 1, 1), 90.5)])
+        self.assertEqual(errors, [3, 4, 5])
+
+if __name__ == '__main__':
+    unittest.main()
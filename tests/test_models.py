@@ -92,5 +92,65 @@ class TestIncome(unittest.TestCase):
         f = Income('test', 45, 'test', date)
         self.assertEqual(repr(f), e)
 
+class TestTransactionBatch(unittest.TestCase):
+    def test_slots(self):
+        from fintracker.models import Expense as SlottedExpense
+        e = SlottedExpense('test', 45, 'test', datetime(2026, 1, 9))
+        self.assertFalse(hasattr(e, '__dict__'))
+
+    def test_roundtrip(self):
+        from fintracker.models import Expense, Income, TransactionBatch, EXPENSE
+        items = [Expense('a', 10, 'x', datetime(2026, 1, 9)), Income('b', 2.5, 'y', datetime(2026, 1, 9, 1, 2, 3, 4)),
+                 Expense('c', 5, 'x', datetime(2026, 1, 10))]
+        batch = TransactionBatch.from_transactions(items)
+        self.assertEqual(len(batch), 3)
+        self.assertEqual(batch.labels, ['x', 'y'])
+        self.assertEqual(batch.totals_by('category', EXPENSE), {'x': 1500})
+        self.assertEqual([repr(t) for t in batch.transactions()], [repr(t) for t in items])
+        self.assertEqual(batch.date_strings()[1], '2026-01-09 01:02:03.000004')
+
+    def test_vectorized_validation(self):
+        from fintracker.models import TransactionBatch, EXPENSE, INCOME
+        with self.assertRaises(ValueError):
+            TransactionBatch.from_columns([EXPENSE, INCOME, EXPENSE], ['a', 'b', ''], [1, 0, 3],
+                                          ['2026-01-01'] * 3, ['x', None, 'x'], [None, 'y', None])
+
+    def test_currencies(self):
+        from fintracker.models import Expense, Income, TransactionBatch, EXPENSE, INCOME, normalize_currency
+        items = [Expense('a', 10, 'x', datetime(2026, 1, 9), 'usd'), Income('b', 5, 'y', datetime(2026, 1, 9))]
+        batch = TransactionBatch.from_transactions(items)
+        self.assertEqual(batch.currencies(), ['USD', 'RUB'])
+        self.assertEqual([t.currency for t in batch.transactions()], ['USD', 'RUB'])
+        self.assertEqual(repr(items[0]), '<Expense: a, 10.00 USD, Category: x, Date: 2026-01-09>')
+        columns = TransactionBatch.from_columns([EXPENSE, INCOME], ['a', 'b'], [1, 2], ['2026-01-01'] * 2,
+                                                ['x', None], [None, 'y'], currencies=['EUR', None])
+        self.assertEqual(columns.currencies(), ['EUR', 'RUB'])
+        self.assertEqual(normalize_currency(''), 'RUB')
+        for bad in ('US', 'U$D', 'РУБ'):
+            with self.assertRaises(ValueError):
+                normalize_currency(bad)
+
+class TestMinorUnits(unittest.TestCase):
+    def test_exact_kopecks(self):
+        from decimal import Decimal
+        from fintracker.models import Expense, to_minor, from_minor
+        self.assertEqual(to_minor(0.1) + to_minor(0.2), to_minor(0.3))
+        self.assertEqual(to_minor('10,5'.replace(',', '.')), 1050)
+        self.assertEqual(to_minor(2.675), 268)
+        self.assertEqual(from_minor(1050), Decimal('10.50'))
+        e = Expense('test', 0.1, 'test', datetime(2026, 1, 9))
+        self.assertEqual(e.amount_minor, 10)
+        with self.assertRaises(ValueError):
+            Expense('test', 0.001, 'test')
+
+    def test_half_kopeck_rounding_matches_batch(self):
+        from fintracker.models import Expense, TransactionBatch, EXPENSE
+        amounts = [0.005, 0.015, 0.125, 1.005, 2.675, 10.345, 1234567.895]
+        single = [Expense('a', amount, 'x', datetime(2026, 1, 9)).amount_minor for amount in amounts]
+        self.assertEqual(single, [1, 2, 13, 101, 268, 1035, 123456790])
+        batch = TransactionBatch.from_columns([EXPENSE] * len(amounts), ['a'] * len(amounts), amounts,
+                                              ['2026-01-09'] * len(amounts), ['x'] * len(amounts), [None] * len(amounts))
+        self.assertEqual([t.amount_minor for t in batch.transactions()], single)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from fintracker import storage
+from fintracker.models import Expense, Income
+from fintracker.recurring import RecurringRule, add_rule, get_rules, delete_rule, materialize, project
+
+class TestRecurringRule(unittest.TestCase):
+    def test_monthly_clamps_day(self):
+        rule = RecurringRule(Expense('Аренда', 30000, 'Жилье'), 'monthly', datetime(2026, 1, 31))
+        self.assertEqual(rule.occurrences(datetime(2026, 4, 30)),
+                         [datetime(2026, 1, 31), datetime(2026, 2, 28), datetime(2026, 3, 31), datetime(2026, 4, 30)])
+
+    def test_day_before_start_skipped(self):
+        rule = RecurringRule(Income('Зарплата', 100000, 'Работа'), 'monthly', datetime(2026, 1, 20), day=5)
+        self.assertEqual(rule.occurrences(datetime(2026, 3, 5)), [datetime(2026, 2, 5), datetime(2026, 3, 5)])
+
+    def test_weekly_end_and_last(self):
+        rule = RecurringRule(Expense('Кофе', 300, 'Еда'), 'weekly', datetime(2026, 1, 1), every=2,
+                             end=datetime(2026, 2, 1), last=datetime(2026, 1, 1))
+        self.assertEqual(rule.occurrences(datetime(2026, 12, 31)), [datetime(2026, 1, 15), datetime(2026, 1, 29)])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            RecurringRule(Expense('Кофе', 300, 'Еда'), 'hourly')
+        with self.assertRaises(ValueError):
+            RecurringRule(Expense('Кофе', 300, 'Еда'), 'monthly', datetime(2026, 2, 1), end=datetime(2026, 1, 1))
+
+class TestMaterialize(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_file = storage.DATA_FILE
+        self.backup_dir = storage.BACKUP_DIR
+        storage.configure(os.path.join(self.tmp.name, 'test.db'), backup_dir=os.path.join(self.tmp.name, 'backups'))
+        add_rule(RecurringRule(Income('Зарплата', 100000, 'Работа'), 'monthly', datetime(2026, 1, 5)))
+        add_rule(RecurringRule(Expense('Аренда', 30000, 'Жилье'), 'monthly', datetime(2026, 1, 10)))
+
+    def tearDown(self):
+        storage.close_engine()
+        storage.DATA_FILE = self.data_file
+        storage.BACKUP_DIR = self.backup_dir
+        self.tmp.cleanup()
+
+    def test_idempotent(self):
+        self.assertEqual(materialize(datetime(2026, 3, 5)), 5)
+        self.assertEqual(materialize(datetime(2026, 3, 5)), 0)
+        self.assertEqual(storage.get_summary()[1:], (300000 * 100, 60000 * 100))
+        self.assertEqual(materialize(datetime(2026, 3, 10)), 1)
+        self.assertEqual([rule.last for rule in get_rules()], [datetime(2026, 3, 5), datetime(2026, 3, 10)])
+        self.assertEqual(storage.get_totals_by('category', storage.EXPENSE_TYPE), [('Жилье', 90000 * 100)])
+
+    def test_project_writes_nothing(self):
+        storage.add_expense(Income('Остаток', 1000, 'Работа', datetime(2026, 1, 1)))
+        opening, rows = project(datetime(2026, 2, 10))
+        self.assertEqual(opening, 1000 * 100)
+        self.assertEqual([(row[0], row[3]) for row in rows],
+                         [(datetime(2026, 1, 5), 101000 * 100), (datetime(2026, 1, 10), 71000 * 100),
+                          (datetime(2026, 2, 5), 171000 * 100), (datetime(2026, 2, 10), 141000 * 100)])
+        self.assertEqual(storage.get_summary()[0], 1)
+
+    def test_project_converts_currency(self):
+        add_rule(RecurringRule(Expense('Хостинг', 10, 'Сервисы', currency='USD'), 'monthly', datetime(2026, 1, 1)))
+        with self.assertRaisesRegex(ValueError, 'Нет курса USD'):
+            project(datetime(2026, 1, 5))
+        storage.set_rates([('USD', '2026-01-01', 90)])
+        self.assertEqual(project(datetime(2026, 1, 5))[1][0][2:], (-90000, -90000))
+        self.assertEqual(materialize(datetime(2026, 1, 5)), 2)
+        self.assertEqual(storage.get_batch().currencies(), ['USD', 'RUB'])
+
+    def test_delete_rule(self):
+        self.assertTrue(delete_rule(1))
+        self.assertFalse(delete_rule(1))
+        self.assertEqual(materialize(datetime(2026, 1, 31)), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from fintracker import storage
+from fintracker.models import Expense, Income
+from fintracker.report import generate_expenses, generate_incomings, gen_sum, generate_all, generate_timeseries
+
+class TestReport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_file = storage.DATA_FILE
+        storage.DATA_FILE = os.path.join(self.tmp.name, 'test.db')
+        storage.add_expense(Expense('Обед', 100, 'Еда', datetime(2026, 1, 1)))
+        storage.add_expense(Expense('Ужин', 150, 'Еда', datetime(2026, 1, 2)))
+        storage.add_expense(Expense('Такси', 300, 'Транспорт', datetime(2026, 1, 2)))
+        storage.add_expense(Income('Зарплата', 1000, 'Работа', datetime(2026, 1, 3)))
+
+    def tearDown(self):
+        storage.close_engine()
+        storage.DATA_FILE = self.data_file
+        self.tmp.cleanup()
+
+    def test_expenses(self):
+        report = generate_expenses()
+        self.assertEqual(list(report['category']), ['Транспорт', 'Еда'])
+        self.assertEqual(list(report['total_amount']), [300, 250])
+
+    def test_expenses_range(self):
+        report = generate_expenses(datetime(2026, 1, 1), datetime(2026, 1, 1, 23, 59, 59))
+        self.assertEqual(list(report['total_amount']), [100])
+
+    def test_incomings(self):
+        report = generate_incomings()
+        self.assertEqual(list(report['source']), ['Работа'])
+
+    def test_summary(self):
+        report = gen_sum(datetime(2026, 1, 1), datetime(2026, 1, 31))
+        self.assertEqual(report.loc['Баланс', 0], 450)
+
+    def test_summary_empty(self):
+        self.assertTrue(gen_sum(datetime(2025, 1, 1), datetime(2025, 1, 31)).empty)
+
+    def test_all_matches_single_reports(self):
+        start, end = datetime(2026, 1, 1, 12), datetime(2026, 1, 31)
+        reports = generate_all(start, end, self.tmp.name)
+        self.assertTrue(reports['categories'].equals(generate_expenses(start, end)))
+        self.assertTrue(reports['sources'].equals(generate_incomings(start, end)))
+        self.assertTrue(reports['summary'].equals(gen_sum(start, end)))
+        for file_name in ('expenses_by_category_report.csv', 'incomings_by_category_report.csv', 'summary_report.csv'):
+            self.assertTrue(os.path.exists(os.path.join(self.tmp.name, file_name)))
+
+    def test_timeseries(self):
+        storage.add_expense(Expense('Кино', 50.5, 'Досуг', datetime(2026, 2, 10, 18)))
+        daily = generate_timeseries(datetime(2026, 1, 2, 12), datetime(2026, 1, 4))
+        self.assertEqual(list(daily.index), ['2026-01-02', '2026-01-03', '2026-01-04'])
+        self.assertEqual(list(daily['expense']), [0, 0, 0])  # обед и ужин до начала периода
+        self.assertEqual(list(daily['running_balance']), [-550, 450, 450])
+        weekly = generate_timeseries(freq='W')
+        self.assertEqual(weekly.index[0], '2025-12-29')
+        self.assertEqual(weekly['expense'].sum(), 600.5)
+        monthly = generate_timeseries(freq='M', output_file=os.path.join(self.tmp.name, 'timeseries.csv'))
+        self.assertEqual(list(monthly.index), ['2026-01', '2026-02'])
+        self.assertEqual(list(monthly['balance']), [450, -50.5])
+        self.assertEqual(list(monthly['running_balance']), [450, 399.5])
+        with self.assertRaises(ValueError):
+            generate_timeseries(freq='Y')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import asyncio
+import io
+import os
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from fintracker import client, server, storage
+from main import build_parser
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_file = storage.DATA_FILE
+        self.db = os.path.join(self.tmp.name, 'test.db')
+        storage.configure(self.db)
+        self.address = os.path.join(self.tmp.name, 'fintr.sock')
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.loop = asyncio.new_event_loop()
+        self.server = self.loop.run_until_complete(server.start_server(build_parser(), self.address, self.executor,
+                                                                       root=self.tmp.name))
+        self.thread = threading.Thread(target=self.loop.run_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.server.close()
+        self.loop.run_until_complete(self.server.wait_closed())
+        self.loop.close()
+        self.executor.shutdown()
+        storage.close_engine()
+        storage.DATA_FILE = self.data_file
+        self.tmp.cleanup()
+
+    def run_remote(self, *argv, db=None, cache=None) -> tuple:
+        stdout, stderr = io.StringIO(), io.StringIO()
+        done = client.request(self.address, list(argv), db or self.db, stdout, stderr, cache=cache)
+        return done, stdout.getvalue(), stderr.getvalue()
+
+    def test_add_and_view(self):
+        done, out, _ = self.run_remote('add', '--description', 'Обед', '--sum', '150,5', '--expense', '--category', 'Еда',
+                                       '--date', '2026-01-01')
+        self.assertTrue(done)
+        self.assertIn('Добавлен расход', out)
+        done, out, _ = self.run_remote('view', '--format', 'csv')
+        self.assertTrue(done)
+        self.assertIn('Обед;150.50;Еда', out)
+        self.assertEqual(len(storage.get_transactions()), 1)
+
+    def test_parse_error(self):
+        done, _, err = self.run_remote('add', '--sum', 'abc')
+        self.assertTrue(done)
+        self.assertIn('usage', err)
+
+    def test_refused(self):
+        self.assertFalse(self.run_remote('view', db=os.path.join(self.tmp.name, 'other.db'))[0])
+        self.assertFalse(self.run_remote('backup')[0])
+        other_mode = 'off' if storage.CACHE_MODE != 'off' else 'memory'
+        self.assertFalse(self.run_remote('view', cache=other_mode)[0])
+        self.assertTrue(self.run_remote('view', cache=storage.CACHE_MODE)[0])
+
+    def test_tcp_only_on_loopback(self):
+        with self.assertRaises(ValueError):
+            asyncio.run(server.start_server(build_parser(), 'tcp://0.0.0.0:0', self.executor))
+
+        async def start_and_close():
+            tcp = await server.start_server(build_parser(), 'tcp://localhost:0', self.executor)
+            tcp.close()
+            await tcp.wait_closed()
+
+        asyncio.run(start_and_close())
+
+    def test_relative_db_path(self):
+        cwd = os.getcwd()
+        other = os.path.join(self.tmp.name, 'other')
+        os.makedirs(other)
+        try:
+            os.chdir(self.tmp.name)
+            self.assertTrue(self.run_remote('view', db='test.db')[0])
+            os.chdir(other)
+            self.assertFalse(self.run_remote('view', db='test.db')[0])
+            self.assertFalse(self.run_remote('view', db=':memory:')[0])
+        finally:
+            os.chdir(cwd)
+
+    def test_no_server(self):
+        self.assertFalse(client.request(os.path.join(self.tmp.name, 'missing.sock'), ['view'], self.db))
+
+    def test_socket_permissions_and_single_instance(self):
+        self.assertEqual(os.stat(self.address).st_mode & 0o777, 0o600)
+        address = os.path.join(self.tmp.name, 'run', 'other.sock')
+
+        async def start_and_close():
+            other = await server.start_server(build_parser(), address, self.executor)
+            other.close()
+            await other.wait_closed()
+
+        umask = os.umask(0o022)
+        try:
+            asyncio.run(start_and_close())
+            self.assertEqual(os.umask(0o022), 0o022)
+            self.assertEqual(os.stat(os.path.dirname(address)).st_mode & 0o777, 0o700)
+        finally:
+            os.umask(umask)
+        with self.assertRaises(RuntimeError):
+            asyncio.run(server.start_server(build_parser(), self.address, self.executor))
+
+    def test_output_only_inside_root(self):
+        self.run_remote('add', '--description', 'Обед', '--sum', '100', '--expense', '--category', 'Еда', '--date', '2026-01-01')
+        with tempfile.TemporaryDirectory() as outside:
+            done, _, _ = self.run_remote('report', '--report-type', 'summary', '--output', os.path.join(outside, 'r.csv'))
+            self.assertFalse(done)
+            self.assertFalse(os.path.exists(os.path.join(outside, 'r.csv')))
+            os.symlink(outside, os.path.join(self.tmp.name, 'link'))
+            self.assertFalse(self.run_remote('report', '--report-type', 'summary', '--output',
+                                             os.path.join(self.tmp.name, 'link', 'r.csv'))[0])
+            self.assertFalse(self.run_remote('report', '--report-type', 'summary', '--archive', outside)[0])
+        output = os.path.join(self.tmp.name, 'r.csv')
+        self.assertTrue(self.run_remote('report', '--report-type', 'summary', '--output', output)[0])
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, 'r.csv')))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,12 @@
 import pandas as pd
 from fintracker.models import Expense, Income
-from datetime import datetime
+from datetime import datetime, timedelta
 import unittest
+import os
+import sqlite3
+import tempfile
+import threading
+from fintracker import storage
 
 """
 Модуль storage - добавление, удаление транзакций.
@@ -148,3 +153,298 @@ class TestModels(unittest.TestCase):
         date = datetime(2026, 1, 9, 12, 00, 00)
         i = Income('test', 45, 'test', date)
         self.assertEqual(i.date, date)
+
+class TestStorageDB(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_file = storage.DATA_FILE
+        self.backup_file = storage.BACKUP_FILE
+        storage.DATA_FILE = os.path.join(self.tmp.name, 'test.db')
+
+    def tearDown(self):
+        storage.close_engine()
+        storage.DATA_FILE = self.data_file
+        storage.BACKUP_FILE = self.backup_file
+        self.tmp.cleanup()
+
+    def test_date_range(self):
+        for day in (1, 2, 3):
+            storage.add_expense(Expense('test', 10, 'test', datetime(2026, 1, day)))
+        df = storage.get_transactions(datetime(2026, 1, 2), datetime(2026, 1, 2, 23, 59, 59, 999999))
+        self.assertEqual(len(df), 1)
+        self.assertEqual(df['date'].iloc[0], datetime(2026, 1, 2))
+
+    def test_date_index(self):
+        conn = storage.get_engine().reader()
+        plan = conn.execute('EXPLAIN QUERY PLAN SELECT * FROM transactions WHERE date BETWEEN ? AND ?', ['a', 'b']).fetchall()
+        self.assertIn('idx_transactions_date', str(plan))
+
+    def test_add_keeps_existing_rows(self):
+        storage.add_expense(Expense('test', 10, 'test', datetime(2026, 1, 1)))
+        storage.add_expense(Income('test', 20, 'test', datetime(2026, 1, 2)))
+        df = storage.get_transactions()
+        self.assertEqual(list(df['type']), ['Расход', 'Доход'])
+        self.assertEqual(list(df['amount']), [10, 20])
+
+    def test_bulk_insert(self):
+        rows = (Expense('test', i + 1, 'test', datetime(2026, 1, 1)) for i in range(25))
+        self.assertEqual(storage.bulk_insert(rows, batch_size=10), 25)
+        self.assertEqual(len(storage.get_transactions()), 25)
+
+    def test_migration_adds_id(self):
+        conn = sqlite3.connect(storage.DATA_FILE)
+        conn.execute('CREATE TABLE transactions (type TEXT, description TEXT, amount REAL, category TEXT, source TEXT, date DATETIME)')
+        conn.execute("INSERT INTO transactions VALUES ('Расход', 'b', 2, 'test', NULL, '2026-01-02 00:00:00')")
+        conn.execute("INSERT INTO transactions VALUES ('Расход', 'a', 1, 'test', NULL, '2026-01-01 00:00:00')")
+        conn.commit()
+        conn.close()
+        df = storage.get_transactions()
+        self.assertEqual(list(df.index), [1, 2])
+        self.assertEqual(list(df['description']), ['a', 'b'])
+
+    def test_migration_amount_minor(self):
+        conn = sqlite3.connect(storage.DATA_FILE)
+        for migration in storage._MIGRATIONS[:3]:
+            migration(conn)
+        conn.execute('PRAGMA user_version = 3')
+        insert = 'INSERT INTO transactions (type, description, amount, category, source, date) VALUES (?, ?, ?, ?, ?, ?)'
+        conn.execute(insert, ('Расход', 'a', 0.1, 'test', None, '2026-01-01 00:00:00'))
+        conn.execute(insert, ('Расход', 'b', 0.2, 'test', None, '2026-01-02 00:00:00'))
+        conn.execute(insert, ('Расход', 'c', 5, 'test', None, '2026-01-03 00:00:00'))
+        conn.execute('DELETE FROM transactions WHERE id = 3')
+        conn.commit()
+        conn.close()
+        self.assertEqual(storage.get_summary(), (2, 0, 30))
+        self.assertEqual(storage.get_totals_by('category', 'Расход'), [('test', 30)])
+        storage.add_expense(Expense('d', 1, 'test', datetime(2026, 1, 4)))
+        self.assertEqual(list(storage.get_transactions().index), [1, 2, 4])
+        self.assertEqual(storage.get_engine().reader().execute('SELECT typeof(amount) FROM transactions').fetchone()[0], 'integer')
+
+    def test_lookup_tables(self):
+        storage.bulk_insert([Expense('a', 1, 'Еда', datetime(2026, 1, 1)), Income('b', 5, 'Зарплата', datetime(2026, 1, 2)),
+                             Expense('c', 2, 'Еда', datetime(2026, 1, 3)), Expense('d', 3, 'Дом', datetime(2026, 1, 4))])
+        conn = storage.get_engine().reader()
+        self.assertEqual(conn.execute('SELECT name FROM categories ORDER BY id').fetchall(), [('Еда',), ('Дом',)])
+        self.assertEqual(conn.execute('SELECT DISTINCT category_id FROM transactions ORDER BY 1').fetchall(), [(None,), (1,), (2,)])
+        self.assertEqual(storage.get_totals_by('category', 'Расход'), [('Еда', 300), ('Дом', 300)])
+        self.assertEqual(storage.get_totals_by('source', 'Доход'), [('Зарплата', 500)])
+        rows = [row for chunk in storage.iter_transactions(category='Еда') for row in chunk]
+        self.assertEqual([row[2] for row in rows], ['a', 'c'])
+        self.assertEqual(list(storage.iter_transactions(category='Нет такой')), [])
+        self.assertEqual(list(storage.get_transactions()['category'].fillna('')), ['Еда', '', 'Еда', 'Дом'])
+
+    def test_lookup_cache_rollback(self):
+        engine = storage.get_engine()
+        with self.assertRaises(sqlite3.Error):
+            with engine.write() as conn:
+                engine.lookup_id(conn, 'category', 'Еда')
+                conn.execute('INSERT INTO nowhere VALUES (1)')
+        storage.add_expense(Expense('a', 1, 'Еда', datetime(2026, 1, 1)))
+        self.assertEqual(list(storage.get_transactions()['category']), ['Еда'])
+
+    def test_delete_by_id(self):
+        for day in (1, 2, 3):
+            storage.add_expense(Expense('test', day, 'test', datetime(2026, 1, day)))
+        storage.delete_transaction(2)
+        df = storage.get_transactions()
+        self.assertEqual(list(df.index), [1, 3])
+        storage.add_expense(Expense('test', 4, 'test', datetime(2026, 1, 4)))
+        self.assertEqual(list(storage.get_transactions().index), [1, 3, 4])
+
+    def test_delete_many(self):
+        for day in range(1, 6):
+            storage.add_expense(Expense('test', day, 'test', datetime(2026, 1, day)))
+        self.assertEqual(storage.delete_transactions([1, 2, 42]), 2)
+        self.assertEqual(storage.delete_range(datetime(2026, 1, 4), datetime(2026, 1, 5)), 2)
+        self.assertEqual(list(storage.get_transactions().index), [3])
+
+    def test_rollups_match_raw_rows(self):
+        rows = []
+        for i in range(200):
+            when = datetime(2025, 11, 20) + timedelta(hours=11 * i)
+            if i % 4:
+                rows.append(Expense('test', i + 1, ['a', 'b'][i % 2], when))
+            else:
+                rows.append(Income('test', i + 1, 'c', when))
+        storage.bulk_insert(rows)
+        storage.delete_transactions(range(1, 200, 7))
+        df = storage.get_transactions()
+        ranges = [(None, None), (datetime(2025, 12, 3, 5), None), (None, datetime(2026, 1, 10, 12)),
+                  (datetime(2025, 12, 1), datetime(2026, 1, 31, 23, 59, 59, 999999)),
+                  (datetime(2025, 12, 5, 13), datetime(2025, 12, 5, 20)),
+                  (datetime(2025, 11, 25, 1), datetime(2026, 2, 2, 3))]
+        for start, end in ranges:
+            part = df
+            if start:
+                part = part[part['date'] >= start]
+            if end:
+                part = part[part['date'] <= end]
+            count, income, expense = storage.get_summary(start, end)
+            self.assertEqual(count, len(part))
+            self.assertEqual(income, round(part[part['type'] == 'Доход']['amount'].sum() * 100))
+            self.assertEqual(expense, round(part[part['type'] == 'Расход']['amount'].sum() * 100))
+            expected = {key: round(value * 100) for key, value in
+                        part[part['type'] == 'Расход'].groupby('category')['amount'].sum().items()}
+            self.assertEqual(dict(storage.get_totals_by('category', 'Расход', start, end)), expected)
+
+    def test_rebuild_rollups(self):
+        storage.add_expense(Expense('test', 10, 'test', datetime(2026, 1, 1)))
+        conn = storage.get_engine().writer()
+        conn.execute('DELETE FROM monthly_totals')
+        storage.rebuild_rollups()
+        self.assertEqual(storage.get_summary()[2], 1000)
+
+    def test_reader_not_blocked_by_writer(self):
+        storage.add_expense(Expense('test', 10, 'test', datetime(2026, 1, 1)))
+        results = []
+        with storage.get_engine().write() as conn:
+            conn.execute(storage._INSERT_SQL, ('Расход', 'test', 500, 1, None, '2026-01-02 00:00:00', 'RUB'))
+            reader = threading.Thread(target=lambda: results.append(storage.get_summary()))
+            reader.start()
+            reader.join(timeout=2)
+            self.assertFalse(reader.is_alive())
+        self.assertEqual(results[0][2], 1000)
+        self.assertEqual(storage.get_summary()[2], 1500)
+        self.assertEqual(storage.get_engine().writer().execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+
+    def test_memory_database(self):
+        storage.configure(':memory:')
+        storage.add_expense(Expense('test', 10, 'test', datetime(2026, 1, 1)))
+        self.assertEqual(storage.get_summary()[2], 1000)
+        self.assertEqual(len(storage.get_transactions()), 1)
+
+    def test_save_backup(self):
+        storage.configure(backup_file=os.path.join(self.tmp.name, 'backup.csv'))
+        storage.add_expense(Expense('Обед', 10, 'Еда', datetime(2026, 1, 1)))
+        storage.save_backup()
+        with open(storage.BACKUP_FILE, encoding='cp1251') as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines, ['type;description;amount;category;source;date;currency',
+                                 'Расход;Обед;10.00;Еда;;2026-01-01 00:00:00;RUB'])
+
+    def test_iter_transactions_pages(self):
+        storage.bulk_insert(Expense('test', i + 1, 'test', datetime(2026, 1, 1 + i % 3)) for i in range(10))
+        chunks = list(storage.iter_transactions(chunk_size=4))
+        self.assertEqual([len(chunk) for chunk in chunks], [4, 4, 2])
+        rows = [row for chunk in chunks for row in chunk]
+        first_page = [row for chunk in storage.iter_transactions(limit=5) for row in chunk]
+        last = first_page[-1]
+        second_page = [row for chunk in storage.iter_transactions(after=(last[6], last[0])) for row in chunk]
+        self.assertEqual(first_page + second_page, rows)
+        self.assertEqual([row for chunk in storage.iter_transactions(limit=2, offset=5) for row in chunk], rows[5:7])
+
+    def test_batch_roundtrip(self):
+        from fintracker.models import TransactionBatch
+        items = [Expense('a', 10, 'x', datetime(2026, 1, 1)), Income('b', 20, 'y', datetime(2026, 1, 2, 3))]
+        self.assertEqual(storage.bulk_insert(TransactionBatch.from_transactions(items)), 2)
+        batch = storage.get_batch()
+        self.assertEqual([repr(t) for t in batch.transactions()], [repr(t) for t in items])
+        self.assertEqual(storage.get_summary(), (2, 2000, 1000))
+
+    def test_buffered_writer(self):
+        day = datetime(2026, 1, 1)
+        with storage.BufferedWriter(max_rows=3, max_delay=0) as writer:
+            for i in range(4):
+                writer.add(Expense('a', 10, 'x', day))
+            self.assertEqual((writer.commits, len(writer)), (1, 1))
+            self.assertEqual(storage.get_summary()[0], 3)
+        self.assertEqual(storage.get_summary()[0], 4)
+        with self.assertRaises(ValueError):
+            storage.BufferedWriter(durability='disk')
+
+    def test_buffered_writer_timer(self):
+        import time
+        writer = storage.BufferedWriter(durability='memory', max_delay=0.05)
+        writer.add(Income('b', 20, 'y', datetime(2026, 1, 1)))
+        for _ in range(100):
+            if writer.commits:
+                break
+            time.sleep(0.01)
+        self.assertEqual(storage.get_summary()[0], 1)
+        writer.close()
+
+    def test_buffered_writer_recover(self):
+        writer = storage.BufferedWriter(max_delay=0)
+        writer.add(Expense('a', 10, 'x', datetime(2026, 1, 1)))
+        writer.flush()
+        writer.add(Expense('b', 20, 'x', datetime(2026, 1, 2)))
+        writer.add(Expense('c', 30, 'x', datetime(2026, 1, 3)))
+        writer._log.close()  # сбой процесса: буфер потерян, журнал остался
+        with open(writer.log_path, 'a', encoding='utf-8') as f:
+            f.write('[4, "Расх')  # недописанная строка
+        with storage.BufferedWriter(max_delay=0):
+            self.assertEqual(storage.get_summary(), (3, 0, 6000))
+        self.assertEqual(storage.get_summary(), (3, 0, 6000))
+        self.assertEqual(os.path.getsize(writer.log_path), 0)
+
+    def test_buffered_writer_recover_keeps_buffer(self):
+        writer = storage.BufferedWriter(max_delay=0)
+        writer.add(Expense('a', 10, 'x', datetime(2026, 1, 1)))
+        self.assertEqual(writer._recover(), 0)
+        writer.close()
+        self.assertEqual(storage.get_summary(), (1, 0, 1000))
+
+    def test_search(self):
+        storage.bulk_insert([Expense('Пятёрочка продукты', 10, 'Еда', datetime(2026, 1, 1)),
+                             Expense('Кофе в Пятерочке', 5, 'Еда', datetime(2026, 1, 2)),
+                             Expense('Пятерочка, пятерочка', 3, 'Еда', datetime(2026, 1, 3)),
+                             Income('Зарплата "Март"', 100, 'Работа', datetime(2026, 1, 4))])
+        self.assertEqual([row[0] for row in storage.search('пятерочка')], [3, 1])
+        self.assertEqual([row[0] for row in storage.search('ПЯТЁР')], [3, 1, 2])
+        self.assertEqual([row[0] for row in storage.search('пятер', datetime(2026, 1, 2), datetime(2026, 1, 2, 23))], [2])
+        self.assertEqual(storage.search('зарплата "март')[0][3], 10000)
+        self.assertEqual(storage.search('пятер', limit=1)[0][0], 3)
+        storage.delete_transaction(3)
+        with storage.get_engine().write() as conn:
+            conn.execute("UPDATE transactions SET description = 'Магнит' WHERE id = 2")
+        self.assertEqual([row[0] for row in storage.search('пятер')], [1])
+        self.assertEqual([row[0] for row in storage.search('магнит')], [2])
+        with self.assertRaises(ValueError):
+            storage.search('  ')
+
+    def test_budgets(self):
+        storage.add_expense(Expense('Обед', 300, 'Еда', datetime(2026, 1, 5)))
+        self.assertIsNone(storage.budget_status('Еда', datetime(2026, 1, 1)))
+        self.assertTrue(storage.set_budget('Еда', 500))
+        storage.set_budget('Транспорт', '100.50')
+        storage.add_expense(Expense('Ужин', 250, 'Еда', datetime(2026, 1, 20)))
+        storage.add_expense(Expense('Кафе', 1000, 'Еда', datetime(2026, 2, 1)))
+        self.assertEqual(storage.budget_status('Еда', datetime(2026, 1, 31)), (50000, 55000))
+        storage.delete_transaction(2)
+        self.assertEqual(storage.budget_status('Еда', '2026-01'), (50000, 30000))
+        self.assertEqual(storage.get_budgets('2026-01'), [('Еда', 50000, 30000), ('Транспорт', 10050, 0)])
+        self.assertFalse(storage.set_budget('Транспорт', 0))
+        self.assertEqual(len(storage.get_budgets('2026-01')), 1)
+        with self.assertRaises(ValueError):
+            storage.set_budget('Еда', -1)
+        with self.assertRaises(ValueError):
+            storage.get_budgets('январь')
+
+    def test_currency_conversion(self):
+        storage.add_expense(Expense('Кофе', 10, 'Еда', datetime(2026, 1, 15), 'usd'))
+        storage.add_expense(Expense('Обед', 300, 'Еда', datetime(2026, 2, 3, 12)))
+        storage.add_expense(Income('Фриланс', 100, 'Работа', datetime(2026, 2, 3, 18), 'USD'))
+        self.assertEqual(storage.get_batch().currencies(), ['USD', 'RUB', 'USD'])
+        with self.assertRaisesRegex(ValueError, 'Нет курса USD на 2026-01-15'):
+            storage.get_summary()
+        storage.set_rates([('EUR', '2026-01-01', 95)])
+        with self.assertRaisesRegex(ValueError, 'Нет курса USD'):
+            storage.get_summary()
+        self.assertEqual(storage.set_rates([('USD', '2026-01-01', '90.5'), ('usd', datetime(2026, 2, 1), 100)]), 2)
+        self.assertEqual(storage.get_rates('USD'), [('USD', '2026-01-01', 90.5), ('USD', '2026-02-01', 100.0)])
+        self.assertEqual(storage.get_summary(), (3, 1000000, 120500))
+        self.assertEqual(storage.get_totals_by('category', storage.EXPENSE_TYPE), [('Еда', 120500)])
+        # Неполный день берется из транзакций, курс - тот же
+        self.assertEqual(storage.get_daily_totals(datetime(2026, 2, 3, 13), datetime(2026, 2, 4)),
+                         [('2026-02-03', 1000000, 0)])
+        self.assertEqual(storage.get_all_totals()[1], [('Работа', 1000000)])
+        storage.set_budget('Еда', 1000)
+        self.assertEqual(storage.budget_status('Еда', '2026-01'), (100000, 90500))
+        # Новый курс сбрасывает кэш отчетов
+        self.assertEqual(storage.cached_query('summary', None, None, storage.get_summary)[2], 120500)
+        storage.set_rates([('USD', '2026-01-15', 80)])
+        self.assertEqual(storage.cached_query('summary', None, None, storage.get_summary)[2], 110000)
+        with self.assertRaises(ValueError):
+            storage.set_rates([('RUB', '2026-01-01', 1)])
+        with self.assertRaises(ValueError):
+            storage.set_rates([('EUR', '2026-01-01', 0)])